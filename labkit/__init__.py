@@ -0,0 +1,6 @@
+"""
+Общие вычислительные модули для лабораторных работ и орбитальных расчётов.
+
+Скрипты из каталогов лабораторных подключают пакет, добавляя корень
+репозитория в sys.path.
+"""
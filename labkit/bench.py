@@ -0,0 +1,285 @@
+"""
+Замеры производительности основных вычислительных путей репозитория.
+
+Каждый замер - функция подготовки, которая по размеру задачи возвращает
+вызываемый объект; время меряется повторными вызовами (минимум и медиана).
+Результаты сохраняются в JSON и сравниваются с сохранённым базовым прогоном.
+
+Запуск:
+    python -m labkit.bench [--quick] [-k фильтр] [--output результаты.json]
+                           [--compare база.json] [--threshold 0.1]
+
+Скрипты лабораторных выполняют расчёт при импорте, поэтому из них
+загружаются только определения функций (см. _load_defs).
+"""
+import argparse
+import ast
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GEO_DIR = os.path.join(ROOT, 'Геоинфа')
+LABS_DIR = os.path.join(ROOT, 'Физос', 'Лабы')
+DIFFUSION_DIR = os.path.join(LABS_DIR, '2.2.1', 'Б03-502')
+DEFAULT_OUTPUT = os.path.join(ROOT, '.bench', 'latest.json')
+
+_modules = {}
+
+
+def _load_module(path, name):
+    """Импорт скрипта с защитой __main__ как модуля по пути (имена m.py совпадают)"""
+    if name not in _modules:
+        # Соседние модули скрипта (например, elements.py для m.py)
+        directory = os.path.dirname(path)
+        if directory not in sys.path:
+            sys.path.insert(0, directory)
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        with contextlib.redirect_stdout(io.StringIO()):
+            spec.loader.exec_module(module)
+        _modules[name] = module
+    return _modules[name]
+
+
+def _load_defs(path, names):
+    """
+    Определения функций из скрипта, который выполняет расчёт и строит
+    графики при импорте: выполняются только импорты и нужные def.
+    """
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), path)
+    body = [node for node in tree.body
+            if isinstance(node, (ast.Import, ast.ImportFrom)) and 'matplotlib' not in ast.dump(node)
+            or isinstance(node, ast.FunctionDef) and node.name in names]
+    namespace = {'__file__': path}
+    exec(compile(ast.Module(body=body, type_ignores=[]), path, 'exec'), namespace)
+    return [namespace[name] for name in names]
+
+
+def _quiet(func):
+    """Вызов без вывода в stdout (функции скриптов печатают результаты)"""
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func()
+    return run
+
+
+# Подготовка замеров: по размеру задачи возвращается функция без аргументов
+
+def orbit_simulate(eccentricity):
+    def setup(n_points):
+        m = _load_module(os.path.join(GEO_DIR, 'm.py'), 'geo_m')
+        sim = m.OrbitalSimulator(1.496e11 if eccentricity == 0 else 3.0e12,
+                                 eccentricity=eccentricity, verbose=False)
+        return lambda: sim.simulate(sim.period, n_points=n_points)
+    return setup
+
+
+def kepler_loop(n_points):
+    m2 = _load_module(os.path.join(GEO_DIR, 'm2.py'), 'geo_m2')
+    sim = m2.OrbitalSimulator(1.496e11, 29780, verbose=False)
+    return lambda: sim.calculate_orbit(time_points=n_points)
+
+
+def tle_track(n_samples):
+    tle = _load_module(os.path.join(GEO_DIR, 'TLE.py'), 'geo_tle')
+    ts, satellite, observer = tle.setup()
+    times = ts.linspace(ts.utc(2026, 1, 1), ts.utc(2026, 1, 3), n_samples)
+    return lambda: tle.sky_track(satellite, observer, times)
+
+
+def tle_find_events(days):
+    tle = _load_module(os.path.join(GEO_DIR, 'TLE.py'), 'geo_tle')
+    ts, satellite, observer = tle.setup()
+    t0 = ts.utc(2026, 1, 1)
+    t1 = ts.utc(2026, 1, 1 + days)
+    return lambda: tle.find_passes(satellite, observer, t0, t1)
+
+
+def fft_reconstruct(n_per_period):
+    square_wave, reconstruct = _load_defs(os.path.join(GEO_DIR, 'kv_sig.py'),
+                                          ['square_wave', 'reconstruct'])
+    n_total = 5 * n_per_period
+    t = np.linspace(0, 5.0, n_total, endpoint=False)
+
+    def run():
+        fft_vals = np.fft.fft(square_wave(t, 1.0, 1.0))
+        np.abs(fft_vals) / n_total * 2
+        for K in (1, 3, 5, 15):
+            reconstruct(fft_vals, K)
+    return run
+
+
+def diffusion_file(name):
+    m = _load_module(os.path.join(DIFFUSION_DIR, 'm.py'), 'diffusion_m')
+    path = os.path.join(DIFFUSION_DIR, name)
+    m.process_file(path, 298.15, plot=False, verbose=False)   # импорт pandas и scipy вне замера
+    return lambda: m.process_file(path, 298.15, plot=False, verbose=False)
+
+
+def _line_data(n):
+    rng = np.random.default_rng(0)
+    x = np.linspace(1.0, 10.0, n)
+    return x, 2.0 * x + 1.0 + rng.normal(0, 0.1, n)
+
+
+def fit_mnk(n):
+    mnk, dmnk = _load_defs(os.path.join(LABS_DIR, '2.1.3', '2.1.3.py'), ['mnk', 'dmnk'])
+    x, y = _line_data(n)
+
+    def run():
+        k, b = mnk(x, y)
+        dmnk(x, y, k, b)
+    return _quiet(run)
+
+
+def fit_polyfit(n):
+    x, y = _line_data(n)
+    return lambda: np.polyfit(x, y, 1)
+
+
+def fit_york(n_series):
+    from labkit.regression import york_fit
+    x, y = _line_data(20)
+    X = np.broadcast_to(x, (n_series, 20))
+    Y = y + np.random.default_rng(1).normal(0, 0.1, (n_series, 20))
+    return lambda: york_fit(X, Y, 0.05, 0.1)
+
+
+# Имя -> (подготовка, размеры, размеры для --quick)
+BENCHMARKS = {
+    'orbit_simulate_e0': (orbit_simulate(0.0), [10**3, 10**4, 10**5], [10**3]),
+    'orbit_simulate_e09': (orbit_simulate(0.9), [10**3, 10**4, 10**5], [10**3]),
+    'kepler_loop': (kepler_loop, [10**3, 10**4, 10**5], [10**3]),
+    'tle_track': (tle_track, [10**3, 10**4, 10**5], [10**3]),
+    'tle_find_events': (tle_find_events, [1, 7, 30], [1]),
+    'fft_reconstruct': (fft_reconstruct, [256, 4096, 65536], [256]),
+    'diffusion_process_file': (diffusion_file, ['40.9.csv', '78.1.csv', '120.csv', '160.csv', '200.csv'],
+                               ['40.9.csv']),
+    'fit_mnk': (fit_mnk, [10, 10**3, 10**5], [10]),
+    'fit_polyfit': (fit_polyfit, [10, 10**3, 10**5], [10]),
+    'fit_york_batch': (fit_york, [1, 100, 10**4], [1]),
+}
+
+
+def time_call(func, min_time=0.2, max_repeat=50, min_repeat=3):
+    """Время вызовов func: прогрев, затем повторы до min_time секунд (не меньше min_repeat)"""
+    func()
+    times = []
+    total = 0.0
+    while len(times) < max_repeat and (len(times) < min_repeat or total < min_time):
+        t0 = time.perf_counter()
+        func()
+        dt = time.perf_counter() - t0
+        times.append(dt)
+        total += dt
+    return {'min': min(times), 'median': statistics.median(times),
+            'mean': statistics.fmean(times), 'repeat': len(times)}
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                             capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(names=None, quick=False, min_time=0.2, verbose=True):
+    """Выполнение замеров; возвращает словарь результатов для JSON"""
+    results = {}
+    for name, (setup, sizes, quick_sizes) in BENCHMARKS.items():
+        if names and not any(p in name for p in names):
+            continue
+        for size in (quick_sizes if quick else sizes):
+            key = f'{name}[{size}]'
+            try:
+                func = setup(size)
+                results[key] = time_call(func, min_time=min_time)
+            except ImportError as e:
+                # Например, skyfield не установлен - замер пропускается
+                results[key] = {'skipped': str(e)}
+            if verbose:
+                r = results[key]
+                if 'skipped' in r:
+                    print(f"{key:40s} пропущен: {r['skipped']}")
+                else:
+                    print(f"{key:40s} {r['median'] * 1e3:10.3f} мс (мин. {r['min'] * 1e3:.3f}, n={r['repeat']})")
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+            'quick': quick,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=0.1):
+    """
+    Сравнение медиан с базовым прогоном. Возвращает список записей
+    (замер, база, текущее, отношение, статус); статус 'slower' при замедлении
+    больше threshold, 'faster' - при ускорении больше threshold.
+    """
+    rows = []
+    for key, cur in current['results'].items():
+        base = baseline['results'].get(key)
+        if base is None or 'median' not in base or 'median' not in cur:
+            continue
+        ratio = cur['median'] / base['median']
+        status = 'slower' if ratio > 1 + threshold else 'faster' if ratio < 1 - threshold else 'same'
+        rows.append((key, base['median'], cur['median'], ratio, status))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры производительности")
+    parser.add_argument('-k', dest='filters', action='append', help="подстрока имени замера")
+    parser.add_argument('--quick', action='store_true', help="только наименьшие размеры")
+    parser.add_argument('--min-time', type=float, default=0.2, help="минимальное время замера, с")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="файл результатов JSON")
+    parser.add_argument('--compare', default=None, help="базовый прогон JSON для сравнения")
+    parser.add_argument('--threshold', type=float, default=0.1, help="допустимое относительное замедление")
+    parser.add_argument('--list', action='store_true', help="только вывести замеры и размеры")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, (_, sizes, _) in BENCHMARKS.items():
+            print(f"{name}: {', '.join(map(str, sizes))}")
+        return 0
+
+    current = run(args.filters, args.quick, args.min_time)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(current, f, indent=1, ensure_ascii=False)
+    print(f"Результаты: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows = compare(current, baseline, args.threshold)
+        print(f"\nСравнение с {args.compare} (commit {baseline['meta'].get('commit')}):")
+        for key, base, cur, ratio, status in rows:
+            print(f"{key:40s} {base * 1e3:10.3f} -> {cur * 1e3:10.3f} мс  x{ratio:.2f}  {status}")
+        if any(row[4] == 'slower' for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
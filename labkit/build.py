@@ -0,0 +1,176 @@
+"""
+Инкрементальная сборка отчётов по лабораторным работам.
+
+Для каждой работы строится граф зависимостей: скрипт и его данные -> рисунки
+(задания labkit.render) -> .tex (через \\includegraphics) -> .pdf. Сначала
+перерисовываются только устаревшие рисунки, затем параллельно по работам
+перекомпилируются только те отчёты, у которых изменились .tex или включённые рисунки.
+
+Запуск: python -m labkit.build [--force] [--jobs N] [--graph] [работа ...]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from labkit import render
+
+CACHE_FILE = os.path.join(render.ROOT, '.build_cache.json')
+INCLUDE_RE = re.compile(r'^[^%\n]*?\\includegraphics\s*(?:\[[^\]]*\])?\s*\{([^}]+)\}', re.MULTILINE)
+
+
+def labs():
+    """Каталоги работ, в которых есть отчёт <работа>.tex"""
+    names = []
+    for name in sorted(os.listdir(render.LABS_DIR)):
+        if os.path.isfile(os.path.join(render.LABS_DIR, name, name + '.tex')):
+            names.append(name)
+    return names
+
+
+def report_graph(lab):
+    """
+    Зависимости отчёта работы: tex, pdf, включённые рисунки и задания,
+    которые эти рисунки строят.
+    """
+    lab_dir = os.path.join(render.LABS_DIR, lab)
+    tex = os.path.join(lab_dir, lab + '.tex')
+    with open(tex, encoding='utf-8') as f:
+        figures = INCLUDE_RE.findall(f.read())
+    jobs = [job for job in render.JOBS if job['lab'] == lab]
+    produced = {out: job['id'] for job in jobs for out in job['outputs']}
+    return {
+        'tex': tex,
+        'pdf': os.path.join(lab_dir, lab + '.pdf'),
+        'figures': [os.path.join(lab_dir, fig) for fig in figures],
+        'figure_jobs': {fig: produced.get(fig) for fig in figures},
+        'jobs': jobs,
+    }
+
+
+def report_hash(graph):
+    """Хеш исходных файлов отчёта: .tex и все включённые рисунки"""
+    h = hashlib.sha256()
+    for path in [graph['tex']] + graph['figures']:
+        h.update(os.path.basename(path).encode())
+        if os.path.exists(path):
+            render._file_digest(path, h)
+        else:
+            h.update(b'<missing>')
+    return h.hexdigest()
+
+
+def latex_command():
+    """Команда компиляции: latexmk, если есть, иначе pdflatex (два прохода для оглавления)"""
+    if shutil.which('latexmk'):
+        return [['latexmk', '-pdf', '-interaction=nonstopmode', '-halt-on-error']]
+    if shutil.which('pdflatex'):
+        cmd = ['pdflatex', '-interaction=nonstopmode', '-halt-on-error']
+        return [cmd, cmd]
+    return None
+
+
+def compile_report(graph):
+    """Компиляция отчёта в каталоге работы; возвращает (успех, вывод)"""
+    commands = latex_command()
+    if commands is None:
+        return False, "Не найден ни latexmk, ни pdflatex"
+    lab_dir = os.path.dirname(graph['tex'])
+    output = []
+    for cmd in commands:
+        proc = subprocess.run(cmd + [os.path.basename(graph['tex'])], cwd=lab_dir,
+                              capture_output=True, text=True, errors='replace')
+        output.append(proc.stdout[-2000:] + proc.stderr[-2000:])
+        if proc.returncode != 0:
+            return False, '\n'.join(output)
+    return True, '\n'.join(output)
+
+
+def print_graph(lab, graph):
+    """Вывод графа зависимостей отчёта: рисунки -> задания -> исходные файлы"""
+    print(f"{lab}: {os.path.basename(graph['tex'])} -> {os.path.basename(graph['pdf'])}")
+    for fig, job_id in graph['figure_jobs'].items():
+        print(f"  {fig} <- {job_id or 'статический файл'}")
+    for job in graph['jobs']:
+        labkit_dir = os.path.join(render.ROOT, 'labkit')
+        sources, modules = [], []
+        for p in render.job_sources(job):
+            if p.startswith(labkit_dir + os.sep):
+                modules.append(os.path.splitext(os.path.relpath(p, labkit_dir))[0])
+            else:
+                sources.append(os.path.relpath(p, render.ROOT))
+        print(f"  [{job['id']}] {', '.join(sources)} + labkit: {', '.join(modules)}")
+
+
+def build(selected=None, force=False, workers=None, verbose=True):
+    """
+    Сборка отчётов выбранных работ (по умолчанию всех).
+    Возвращает словарь {работа: 'ok' | 'skip' | 'fail'}.
+    """
+    graphs = {lab: report_graph(lab) for lab in (selected or labs())}
+
+    # 1. Рисунки: перерисовываются только задания с изменившимся хешем
+    jobs = [job for graph in graphs.values() for job in graph['jobs']]
+    fig_status = render.render(jobs, force=force, workers=workers, verbose=verbose)
+    failed_jobs = {job_id for job_id, st in fig_status.items() if st == 'fail'}
+
+    # 2. Отчёты: компилируются только те, у которых изменились исходные файлы
+    try:
+        with open(CACHE_FILE, encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    status, todo, hashes = {}, [], {}
+    for lab, graph in graphs.items():
+        if failed_jobs & set(graph['figure_jobs'].values()):
+            status[lab] = 'fail'
+            continue
+        hashes[lab] = report_hash(graph)
+        if not force and cache.get(lab) == hashes[lab] and os.path.exists(graph['pdf']):
+            status[lab] = 'skip'
+        else:
+            todo.append(lab)
+
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for lab, (ok, output) in zip(todo, pool.map(lambda lab: compile_report(graphs[lab]), todo)):
+            status[lab] = 'ok' if ok else 'fail'
+            if ok:
+                cache[lab] = hashes[lab]
+            else:
+                cache.pop(lab, None)
+                if verbose:
+                    print(output)
+
+    with open(CACHE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    if verbose:
+        for lab in graphs:
+            print(f"[{status[lab]}] отчёт {lab}")
+    return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Инкрементальная сборка отчётов")
+    parser.add_argument('labs', nargs='*', help="работы (по умолчанию все с .tex)")
+    parser.add_argument('--force', action='store_true', help="пересобрать всё")
+    parser.add_argument('--jobs', type=int, default=None, help="число параллельных процессов")
+    parser.add_argument('--graph', action='store_true', help="только вывести граф зависимостей")
+    args = parser.parse_args(argv)
+
+    selected = args.labs or labs()
+    if args.graph:
+        for lab in selected:
+            print_graph(lab, report_graph(lab))
+        return 0
+    status = build(selected, force=args.force, workers=args.jobs)
+    return 1 if 'fail' in status.values() else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Общие аргументы и вывод результатов для расчётных точек входа скриптов.
+
+С флагом --no-plot скрипты ничего не рисуют (matplotlib даже не
+импортируется) и выводят результаты в JSON или CSV - в файл или на stdout.
+"""
+import csv
+import io
+import json
+import sys
+import numpy as np
+
+
+def add_output_arguments(parser):
+    """Аргументы --no-plot, --format и --output"""
+    parser.add_argument('--no-plot', action='store_true',
+                        help="только расчёт, без графиков; результаты в JSON/CSV")
+    parser.add_argument('--format', choices=('json', 'csv'), default='json',
+                        help="формат вывода при --no-plot")
+    parser.add_argument('--output', '-o', default=None, help="файл вывода (по умолчанию stdout)")
+    return parser
+
+
+def _plain(value):
+    """Преобразование массивов и скаляров numpy в типы JSON"""
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _csv_text(data):
+    """
+    CSV из списка записей (словарей) или словаря столбцов одинаковой длины;
+    скалярные элементы словаря столбцов повторяются в каждой строке.
+    """
+    if isinstance(data, dict):
+        lengths = {len(v) for v in data.values() if np.ndim(v) == 1}
+        n = lengths.pop() if lengths else 1
+        if lengths:
+            raise ValueError("Столбцы для CSV должны иметь одинаковую длину")
+        columns = {k: (v if np.ndim(v) == 1 else [v] * n) for k, v in data.items()}
+        rows = [dict(zip(columns, vals)) for vals in zip(*columns.values())]
+    else:
+        rows = list(data)
+    buf = io.StringIO()
+    if rows:
+        writer = csv.DictWriter(buf, fieldnames=list(rows[0]), lineterminator='\n')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(_plain(row))
+    return buf.getvalue()
+
+
+def write_result(data, fmt='json', path=None):
+    """
+    Вывод результата расчёта.
+
+    data: для JSON - любые словари/списки с числами и массивами numpy;
+          для CSV - список записей или словарь столбцов
+    """
+    if fmt == 'json':
+        text = json.dumps(_plain(data), ensure_ascii=False, indent=1) + '\n'
+    elif fmt == 'csv':
+        text = _csv_text(data)
+    else:
+        raise ValueError(f"Неизвестный формат вывода: {fmt}")
+    if path is None:
+        sys.stdout.write(text)
+    else:
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
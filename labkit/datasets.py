@@ -0,0 +1,162 @@
+"""
+Хранилище измерений лабораторной работы: один файл data.npz на каталог.
+
+Файл - несжатый архив numpy: столбец `column` серии `series` хранится под
+ключом "series/column", погрешности - в столбцах "err_<столбец>" или
+постоянными значениями в метаданных. Метаданные (описание, единицы,
+параметры установки) хранятся в JSON под ключом "__meta__".
+
+Архив не сжимается, поэтому каждый столбец отображается в память напрямую
+из файла: при чтении серии загружаются только её столбцы и только по мере
+обращения к данным.
+"""
+import json
+import struct
+import sys
+import zipfile
+import numpy as np
+
+META_KEY = '__meta__'
+
+
+def write_store(path, series, meta=None):
+    """
+    Запись хранилища.
+
+    series: {имя серии: {имя столбца: массив}}
+    meta: {'description': ..., 'series': {имя серии: {...}}} - произвольные
+          метаданные; для серий рекомендуются ключи 'units' ({столбец: единица}),
+          'errors' ({столбец: постоянная погрешность}) и параметры установки
+    """
+    arrays = {}
+    index = {}
+    for name, columns in series.items():
+        if '/' in name:
+            raise ValueError(f"Недопустимое имя серии: {name}")
+        index[name] = {}
+        for col, values in columns.items():
+            values = np.asarray(values)
+            if values.dtype == object:
+                raise TypeError(f"Столбец {name}/{col} должен иметь числовой тип")
+            arrays[f'{name}/{col}'] = values
+            index[name][col] = {'dtype': values.dtype.str, 'shape': list(values.shape)}
+    meta = dict(meta or {})
+    meta['index'] = index
+    arrays[META_KEY] = np.array(json.dumps(meta, ensure_ascii=False))
+    np.savez(path, **arrays)
+
+
+def _member_memmap(path, zf, key):
+    """Отображение в память несжатого члена архива key.npy; None, если невозможно"""
+    info = zf.getinfo(key + '.npy')
+    if info.compress_type != zipfile.ZIP_STORED:
+        return None
+    with open(path, 'rb') as f:
+        # Локальный заголовок zip: 30 байт + имя + дополнительное поле
+        f.seek(info.header_offset)
+        header = f.read(30)
+        name_len, extra_len = struct.unpack('<HH', header[26:30])
+        f.seek(info.header_offset + 30 + name_len + extra_len)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    if dtype.hasobject or int(np.prod(shape)) == 0:
+        return None
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape,
+                     order='F' if fortran else 'C')
+
+
+class Series:
+    """Одна серия измерений: столбцы загружаются при первом обращении"""
+
+    def __init__(self, store, name):
+        self.store = store
+        self.name = name
+        self.meta = store.meta.get('series', {}).get(name, {})
+        self.columns = list(store.meta['index'][name])
+        self._cache = {}
+
+    def __getitem__(self, column):
+        if column not in self._cache:
+            if column not in self.columns:
+                raise KeyError(f"В серии {self.name} нет столбца {column}")
+            self._cache[column] = self.store._read(f'{self.name}/{column}')
+        return self._cache[column]
+
+    def __contains__(self, column):
+        return column in self.columns
+
+    def error(self, column):
+        """Погрешность столбца: столбец err_<имя> или постоянное значение из метаданных"""
+        if 'err_' + column in self.columns:
+            return self['err_' + column]
+        return self.meta.get('errors', {}).get(column)
+
+    def __repr__(self):
+        return f"Series({self.name!r}, columns={self.columns})"
+
+
+class LabStore:
+    """Хранилище измерений, открытое для чтения (см. open_store)"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._zip = zipfile.ZipFile(self.path)
+        with self._zip.open(META_KEY + '.npy') as f:
+            self.meta = json.loads(str(np.lib.format.read_array(f)))
+        self.series = list(self.meta['index'])
+
+    def _read(self, key):
+        arr = _member_memmap(self.path, self._zip, key)
+        if arr is None:
+            with self._zip.open(key + '.npy') as f:
+                arr = np.lib.format.read_array(f)
+        return arr
+
+    def load(self, name):
+        """Серия измерений по имени; данные читаются лениво"""
+        if name not in self.meta['index']:
+            raise KeyError(f"В хранилище {self.path} нет серии {name}")
+        return Series(self, name)
+
+    __getitem__ = load
+
+    def close(self):
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_store(path):
+    """Открытие хранилища data.npz"""
+    return LabStore(path)
+
+
+def main(argv=None):
+    """Вывод содержимого хранилища: python -m labkit.datasets путь/data.npz [серия]"""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("Использование: python -m labkit.datasets data.npz [серия]")
+        return 1
+    with open_store(argv[0]) as store:
+        if store.meta.get('description'):
+            print(store.meta['description'])
+        names = argv[1:] or store.series
+        for name in names:
+            series = store.load(name)
+            print(f"\n[{name}] {json.dumps(series.meta, ensure_ascii=False)}")
+            for col in series.columns:
+                values = series[col]
+                print(f"  {col} ({values.dtype}, {values.shape}): {np.array2string(np.asarray(values), threshold=20)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
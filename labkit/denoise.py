@@ -0,0 +1,170 @@
+"""
+Предварительная очистка затухающих сигналов перед полулогарифмической
+аппроксимацией (напряжение на мосте в 2.2.1 и подобные записи).
+
+Простое отбрасывание точек с U <= 0 перед логарифмированием смещает τ:
+на хвосте, где сигнал сравним с шумом, остаются только положительные
+выбросы. Очистка выполняется за один проход по массиву:
+
+- decimate: усреднение блоками по factor точек (фильтр нижних частот и
+  прореживание; шум уменьшается в sqrt(factor) раз);
+- tail_stats: смещение нуля и шум по хвосту записи; шум - по медианному
+  отклонению первых разностей, поэтому медленный спад на него не влияет;
+  смещение вычитается, только если хвост вышел на постоянный уровень;
+- savgol: фильтр Савицкого-Голея блоками с перекрытием в полуокно -
+  результат совпадает с фильтрацией всего ряда, а память ограничена блоком;
+- обрезка по уровню шума: ряд обрывается на первой точке, где сглаженный
+  сигнал опускается ниже k·σ одной точки, - дальше логарифм определяется шумом.
+
+Сглаженный ряд служит только для выбора смещения, точки обрезки и весов.
+Аппроксимируются исходные (прореженные, без смещения) точки: шум соседних
+сглаженных точек сильно коррелирован, и погрешность наклона по ним
+оказалась бы многократно заниженной. fit_log_line - взвешенная прямая
+ln y(t) с весами y²/σ² (дисперсия ln y равна σ²/y²); в погрешность наклона
+входит и погрешность вычтенного смещения.
+
+scipy импортируется при первом вызове savgol.
+"""
+import numpy as np
+from collections import namedtuple
+
+from labkit.regression import batched_line_fit
+
+# t, y - точки до обрезки (прореженные, без смещения; y > 0); y_smooth - они же
+# после сглаживания; offset, offset_err - вычтенное смещение и его погрешность;
+# noise - σ одной точки после прореживания; floor - порог обрезки;
+# n_raw - длина исходного ряда
+Cleaned = namedtuple('Cleaned', 't y y_smooth offset offset_err noise floor n_raw')
+TailStats = namedtuple('TailStats', 'level noise drift flat n')
+# Прямая ln y = intercept + slope*t: поля как у scipy.stats.linregress
+LogLineFit = namedtuple('LogLineFit', 'slope intercept rvalue stderr intercept_stderr')
+
+MAD_TO_SIGMA = 1.4826
+
+
+def decimate(t, y, factor):
+    """Средние по блокам из factor точек (последний блок может быть короче)"""
+    t = np.asarray(t, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if factor <= 1:
+        return t, y
+    starts = np.arange(0, len(t), factor)
+    counts = np.diff(np.append(starts, len(t)))
+    return np.add.reduceat(t, starts) / counts, np.add.reduceat(y, starts) / counts
+
+
+def tail_stats(t, y, tail=0.1, k_flat=4.0):
+    """
+    Уровень и шум на последней доле tail записи. drift - изменение
+    линейного тренда за хвост; хвост считается постоянным (flat), если
+    drift меньше k_flat погрешностей этого изменения (σ·sqrt(12/n) для n
+    точек); порог с запасом, т.к. ошибочно «непостоянный» хвост оставляет
+    смещение невычтенным.
+    """
+    n_tail = max(int(len(y) * tail), 8)
+    t_tail, y_tail = t[-n_tail:], y[-n_tail:]
+    level = float(np.median(y_tail))
+    d = np.diff(y_tail)
+    noise = float(MAD_TO_SIGMA * np.median(np.abs(d - np.median(d))) / np.sqrt(2))
+    slope = np.polyfit(t_tail - t_tail[0], y_tail, 1)[0]
+    drift = float(abs(slope) * (t_tail[-1] - t_tail[0]))
+    return TailStats(level, noise, drift, drift < k_flat * noise * np.sqrt(12 / n_tail), n_tail)
+
+
+def savgol(y, window, polyorder=2, chunk=1 << 20):
+    """
+    Фильтр Савицкого-Голея (scipy.signal.savgol_filter, mode='interp')
+    блоками по chunk точек с перекрытием в полуокно с каждой стороны.
+    """
+    from scipy.signal import savgol_filter
+
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    window = min(window | 1, n if n % 2 else n - 1)
+    if window <= polyorder:
+        return y.copy()
+    if n <= chunk:
+        return savgol_filter(y, window, polyorder, mode='interp')
+    half = window // 2
+    out = np.empty(n)
+    for a in range(0, n, chunk):
+        b = min(n, a + chunk)
+        hi = min(n, b + half)
+        lo = max(0, min(a - half, hi - window))
+        # Внутри блока окно целиком лежит в [lo, hi): краевая подгонка
+        # mode='interp' затрагивает только перекрытие или края всего ряда
+        out[a:b] = savgol_filter(y[lo:hi], window, polyorder, mode='interp')[a - lo:b - lo]
+    return out
+
+
+def noise_gain(window, polyorder=2):
+    """Во сколько раз фильтр Савицкого-Голея уменьшает σ белого шума"""
+    from scipy.signal import savgol_coeffs
+
+    return float(np.sqrt(np.sum(savgol_coeffs(window | 1, polyorder) ** 2)))
+
+
+def clean(t, y, factor=1, window=31, polyorder=2, tail=0.1, k=3.0, offset='auto', chunk=1 << 20):
+    """
+    Очистка затухающего сигнала: прореживание, вычитание смещения нуля и
+    обрезка хвоста там, где сглаженный сигнал опускается ниже k·σ.
+
+    offset: 'auto' - уровень хвоста, если хвост постоянный, иначе 0;
+            число - известное смещение; None - без вычитания
+    Возвращает Cleaned; y - несглаженные точки до обрезки (редкие
+    неположительные выбросы перед порогом отброшены), их и следует
+    аппроксимировать.
+    """
+    n_raw = len(y)
+    t, y = decimate(t, y, factor)
+    stats = tail_stats(t, y, tail)
+    offset_err = 0.0
+    if offset == 'auto':
+        offset = stats.level if stats.flat else 0.0
+        if stats.flat:
+            # Погрешность медианы n точек: 1.2533·σ/√n
+            offset_err = 1.2533 * stats.noise / np.sqrt(stats.n)
+    elif offset is None:
+        offset = 0.0
+    window = min(window | 1, len(y) if len(y) % 2 else len(y) - 1)
+    y = y - offset
+    y_s = savgol(y, window, polyorder, chunk)
+    # Порог - по шуму одной точки: до него несглаженные точки почти всегда
+    # положительны и логарифм не искажается шумом
+    floor = k * stats.noise
+    below = np.flatnonzero(y_s <= floor)
+    end = below[0] if len(below) else len(y_s)
+    keep = y[:end] > 0
+    return Cleaned(t[:end][keep], y[:end][keep], y_s[:end][keep], float(offset), float(offset_err),
+                   stats.noise, floor, n_raw)
+
+
+def _weighted_line(t, y, y_smooth, noise):
+    ln_y = np.log(y)
+    w = y_smooth**2 / noise**2 if noise > 0 else y_smooth**2
+    a, b, sa, sb = batched_line_fit(t[None], ln_y[None], w[None], full=True, absolute_sigma=noise > 0)
+    # Если разброс остатков больше ожидаемого по шуму, погрешности масштабируются
+    chi2_red = np.sum(w * (ln_y - a[0] - b[0] * t)**2) / max(len(t) - 2, 1)
+    scale = np.sqrt(max(chi2_red, 1.0)) if noise > 0 else 1.0
+    return a[0], b[0], sa[0] * scale, sb[0] * scale, w
+
+
+def fit_log_line(cleaned):
+    """
+    Взвешенная прямая ln y(t) по несглаженным точкам Cleaned. Погрешность
+    смещения учитывается повторной подгонкой со смещением ± offset_err.
+    Возвращает LogLineFit.
+    """
+    t, y, y_s = cleaned.t, cleaned.y, cleaned.y_smooth
+    a, b, sa, sb, w = _weighted_line(t, y, y_s, cleaned.noise)
+    if cleaned.offset_err > 0:
+        slopes = []
+        for d in (-cleaned.offset_err, cleaned.offset_err):
+            ok = (y - d > 0) & (y_s - d > 0)
+            slopes.append(_weighted_line(t[ok], y[ok] - d, y_s[ok] - d, cleaned.noise)[1])
+        sb = np.hypot(sb, (slopes[1] - slopes[0]) / 2)
+    # Взвешенный коэффициент корреляции
+    ln_y = np.log(y)
+    tm, lm = np.average(t, weights=w), np.average(ln_y, weights=w)
+    r = np.sum(w * (t - tm) * (ln_y - lm)) / np.sqrt(np.sum(w * (t - tm)**2) * np.sum(w * (ln_y - lm)**2))
+    return LogLineFit(float(b), float(a), float(r), float(sb), float(sa))
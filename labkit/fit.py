@@ -0,0 +1,121 @@
+"""
+Аппроксимация прямой по сериям из хранилища измерений (data.npz) без
+запуска скриптов лабораторных.
+
+Запуск:
+    python -m labkit.fit Физос/Лабы/2.1.6/data.npz T20 T30 T50 --x P --y T --method york --no-plot
+    python -m labkit.fit Физос/Лабы/1.3.3/data.npz tube1 --x P --y Q --method segmented
+
+Методы: ols - МНК с погрешностями по остаткам, york - с погрешностями по
+обеим осям (err_<столбец> или постоянные погрешности из метаданных),
+segmented - кусочно-линейная с одной точкой излома.
+"""
+import argparse
+import sys
+import numpy as np
+
+from labkit.cli import add_output_arguments, write_result
+from labkit.datasets import open_store
+from labkit.regression import batched_line_fit, pad_series, segmented_fit, york_fit
+
+METHODS = ('ols', 'york', 'segmented')
+
+
+def _errors(series, column, n):
+    err = series.error(column)
+    if err is None:
+        raise ValueError(f"Для серии {series.name} не заданы погрешности столбца {column}")
+    return np.broadcast_to(np.asarray(err, dtype=float), (n,))
+
+
+def fit_series(store, names, x_col, y_col, method='ols'):
+    """
+    Аппроксимация y = a + b*x для нескольких серий одного хранилища сразу.
+    Возвращает список записей (по одной на серию).
+    """
+    if method not in METHODS:
+        raise ValueError(f"Неизвестный метод: {method}")
+    series = [store.load(name) for name in names]
+    xs = [np.asarray(s[x_col], dtype=float) for s in series]
+    ys = [np.asarray(s[y_col], dtype=float) for s in series]
+    X, Y = pad_series(xs), pad_series(ys)
+    records = []
+    if method == 'york':
+        SX = pad_series([_errors(s, x_col, len(x)) for s, x in zip(series, xs)])
+        SY = pad_series([_errors(s, y_col, len(y)) for s, y in zip(series, ys)])
+        res = york_fit(X, Y, SX, SY)
+        for i, name in enumerate(names):
+            records.append({'series': name, 'method': method, 'n': int(res.n_points[i]),
+                            'a': res.a[i], 'sa': res.sa[i], 'b': res.b[i], 'sb': res.sb[i],
+                            'chi2_red': res.chi2_red[i]})
+    elif method == 'ols':
+        for name, x, y in zip(names, xs, ys):
+            a, b, sa, sb = batched_line_fit(x[None, :], y[None, :], full=True)
+            records.append({'series': name, 'method': method, 'n': len(x),
+                            'a': a[0], 'sa': sa[0], 'b': b[0], 'sb': sb[0]})
+    else:
+        res = segmented_fit(X, Y)
+        for i, name in enumerate(names):
+            records.append({'series': name, 'method': method, 'n': len(xs[i]),
+                            'split': int(res.splits[i, 0]),
+                            'a1': res.a[i, 0], 'b1': res.b[i, 0],
+                            'a2': res.a[i, 1], 'b2': res.b[i, 1],
+                            'x_break': res.x_break[i, 0], 'y_break': res.y_break[i, 0],
+                            'sse': res.sse[i]})
+    return records
+
+
+def plot_fits(store, records, x_col, y_col):
+    """Точки серий и найденные прямые"""
+    import matplotlib.pyplot as plt
+    from labkit import lod
+
+    fig, ax = plt.subplots(figsize=(10, 7))
+    for rec in records:
+        s = store.load(rec['series'])
+        x, y = np.asarray(s[x_col], dtype=float), np.asarray(s[y_col], dtype=float)
+        order = np.argsort(x)
+        points = lod.plot(ax, x[order], y[order], 'o', label=rec['series'])[0]
+        if rec['method'] == 'segmented':
+            k = rec['split']
+            for xs, a, b in ((x[order][:k], rec['a1'], rec['b1']), (x[order][k - 1:], rec['a2'], rec['b2'])):
+                ax.plot(xs, a + b * xs, '-', color=points.get_color())
+        else:
+            xs = np.array([x.min(), x.max()])
+            ax.plot(xs, rec['a'] + rec['b'] * xs, '-', color=points.get_color())
+    ax.set_xlabel(x_col)
+    ax.set_ylabel(y_col)
+    ax.grid(True)
+    ax.legend()
+    plt.show()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Аппроксимация прямой по сериям из data.npz")
+    parser.add_argument('store', help="путь к data.npz")
+    parser.add_argument('series', nargs='+', help="имена серий")
+    parser.add_argument('--x', required=True, help="столбец x")
+    parser.add_argument('--y', required=True, help="столбец y")
+    parser.add_argument('--method', choices=METHODS, default='ols')
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with open_store(args.store) as store:
+        records = fit_series(store, args.series, args.x, args.y, args.method)
+        if args.no_plot:
+            write_result(records, args.format, args.output)
+            return 0
+        for rec in records:
+            if rec['method'] == 'segmented':
+                print(f"{rec['series']}: излом при {args.x} = {rec['x_break']:.4g}; "
+                      f"{args.y} = {rec['a1']:.4g} + {rec['b1']:.4g}·{args.x} | "
+                      f"{rec['a2']:.4g} + {rec['b2']:.4g}·{args.x}")
+            else:
+                print(f"{rec['series']}: {args.y} = ({rec['a']:.4g} ± {rec['sa']:.2g}) + "
+                      f"({rec['b']:.4g} ± {rec['sb']:.2g})·{args.x}")
+        plot_fits(store, records, args.x, args.y)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+import numpy as np
+from collections import namedtuple
+
+# Набор таблиц разной длины, упакованных подряд: таблица k занимает
+# элементы xp[offsets[k]:offsets[k+1]] (и так же в yp)
+PackedTables = namedtuple('PackedTables', 'xp yp offsets')
+
+
+def pack_tables(tables):
+    """
+    Упаковка таблиц (x, y) разной длины в общие массивы со смещениями.
+
+    tables: список пар (xp, yp); xp в каждой таблице строго возрастает,
+            в таблице не меньше двух точек
+    """
+    xs, ys, offsets = [], [], [0]
+    for xp, yp in tables:
+        xp = np.asarray(xp, dtype=float)
+        yp = np.asarray(yp, dtype=float)
+        if xp.shape != yp.shape or xp.ndim != 1:
+            raise ValueError("xp и yp должны быть одномерными массивами одной длины")
+        if len(xp) < 2:
+            raise ValueError("В таблице должно быть не меньше двух точек")
+        if np.any(np.diff(xp) <= 0):
+            raise ValueError("Значения xp в таблице должны строго возрастать")
+        xs.append(xp)
+        ys.append(yp)
+        offsets.append(offsets[-1] + len(xp))
+    return PackedTables(np.concatenate(xs), np.concatenate(ys), np.array(offsets))
+
+
+def interp_packed(x, table, packed):
+    """
+    Линейная интерполяция с линейной экстраполяцией по крайним отрезкам
+    (как interp_linear из 1.3.3/graf3.py) сразу для массива запросов.
+
+    x: точки запроса
+    table: номер таблицы для каждой точки (транслируется вместе с x)
+    packed: PackedTables из pack_tables
+
+    Поиск отрезка - векторный двоичный поиск внутри своей таблицы,
+    число шагов ~log2 длины самой длинной таблицы.
+    """
+    xp, yp, offsets = packed
+    x, table = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(table))
+    start = offsets[table]
+    # Левый конец отрезка ищется среди [start, end - 2]: так точки за
+    # пределами таблицы попадают на первый или последний отрезок
+    lo = start
+    hi = offsets[table + 1] - 2
+    n_steps = int(np.ceil(np.log2(np.max(np.diff(offsets))))) + 1
+    for _ in range(n_steps):
+        mid = (lo + hi + 1) // 2
+        cond = xp[mid] <= x
+        lo = np.where(cond, mid, lo)
+        hi = np.where(cond, hi, mid - 1)
+        hi = np.maximum(hi, lo)
+    x1, x2 = xp[lo], xp[lo + 1]
+    y1, y2 = yp[lo], yp[lo + 1]
+    return y1 + (x - x1) * (y2 - y1) / (x2 - x1)
+
+
+def interp_tables(x, tables):
+    """
+    Интерполяция сетки запросов по всем таблицам сразу.
+
+    x: массив формы (..., число таблиц) - последняя ось соответствует таблице;
+       общая для всех таблиц сетка задаётся как x[:, None]
+    tables: PackedTables или список пар (xp, yp)
+    Возвращает массив формы (..., число таблиц).
+    """
+    packed = tables if isinstance(tables, PackedTables) else pack_tables(tables)
+    n_tables = len(packed.offsets) - 1
+    return interp_packed(x, np.arange(n_tables), packed)
@@ -0,0 +1,153 @@
+"""
+Прореживание длинных рядов перед построением графиков.
+
+Отрисовка миллиона маркеров занимает больше времени, чем сама обработка,
+хотя на рисунке ширина оси - всего несколько сотен или тысяч пикселей.
+Ряд прореживается до числа столбцов пикселей оси с сохранением формы:
+
+- minmax: в каждом столбце пикселей остаются первая, последняя, минимальная
+  и максимальная точки - выбросы и фронты не теряются;
+- lttb: алгоритм Largest-Triangle-Three-Buckets (Steinarsson, 2013) -
+  по точке на корзину, максимизирующей площадь треугольника с соседями;
+- для параметрических кривых (орбиты, трассы на полярной диаграмме) -
+  экстремумы каждой координаты в корзинах по номеру точки.
+
+Короткие ряды рисуются без изменений.
+"""
+import numpy as np
+
+
+def _bucket_starts(x, n_bins):
+    """Начала корзин равной ширины по x (x отсортирован); пустые корзины отброшены"""
+    edges = np.linspace(x[0], x[-1], n_bins + 1)[:-1]
+    starts = np.searchsorted(x, edges, side='left')
+    return np.unique(starts)
+
+
+def minmax_indices(x, y, n_bins):
+    """
+    Номера точек, оставляемых при прореживании min/max: первая, последняя,
+    минимальная и максимальная точки каждой из n_bins корзин равной ширины по x.
+    x должен быть отсортирован по возрастанию.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n <= 4 * n_bins or x[-1] == x[0]:
+        return np.arange(n)
+    starts = _bucket_starts(x, n_bins)
+    ends = np.append(starts[1:], n) - 1
+    # Номер корзины каждой точки и аргминимум/аргмаксимум внутри корзин
+    bucket = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, n)))
+    # После сортировки по (корзина, y) корзина k занимает позиции starts[k]..ends[k]
+    order = np.lexsort((y, bucket))
+    idx = np.concatenate([starts, ends, order[starts], order[ends]])
+    return np.unique(idx)
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Номера точек по алгоритму Largest-Triangle-Three-Buckets: первая и
+    последняя точки и по одной точке из каждой из n_out - 2 корзин.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    # Границы корзин по номерам точек (без первой и последней)
+    bounds = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    # Средние точки корзин - третья вершина треугольника для предыдущей корзины
+    sums_x = np.add.reduceat(x[1:n - 1], bounds[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], bounds[:-1] - 1)
+    counts = np.diff(bounds)
+    avg_x = np.append(sums_x / counts, x[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for k in range(n_out - 2):
+        lo, hi = bounds[k], bounds[k + 1]
+        # Удвоенная площадь треугольника (a, точка корзины, среднее следующей корзины)
+        area = np.abs((x[a] - avg_x[k + 1]) * (y[lo:hi] - y[a])
+                      - (x[a] - x[lo:hi]) * (avg_y[k + 1] - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[k + 1] = a
+    return idx
+
+
+def path_indices(n_bins, *coords):
+    """
+    Номера точек параметрической кривой: корзины по номеру точки, в каждой -
+    первая и последняя точки и экстремумы каждой из координат.
+    """
+    n = len(coords[0])
+    if n <= (2 + 2 * len(coords)) * n_bins:
+        return np.arange(n)
+    starts = np.linspace(0, n, n_bins, endpoint=False).astype(np.int64)
+    ends = np.append(starts[1:], n) - 1
+    bucket = np.repeat(np.arange(n_bins), np.diff(np.append(starts, n)))
+    idx = [starts, ends]
+    for c in coords:
+        c = np.asarray(c, dtype=float)
+        # Аргминимум/аргмаксимум в корзинах через сортировку внутри корзин
+        order = np.lexsort((c, bucket))
+        idx += [order[starts], order[ends]]
+    return np.unique(np.concatenate(idx))
+
+
+def downsample(x, y, n_out, method='minmax'):
+    """Прореженные (x, y): method - 'minmax' (n_out корзин) или 'lttb' (n_out точек)"""
+    if method == 'minmax':
+        idx = minmax_indices(x, y, n_out)
+    elif method == 'lttb':
+        idx = lttb_indices(x, y, n_out)
+    else:
+        raise ValueError(f"Неизвестный метод прореживания: {method}")
+    return np.asarray(x)[idx], np.asarray(y)[idx]
+
+
+def pixel_width(ax, dpi=None):
+    """
+    Ширина оси в пикселях итогового изображения. По умолчанию берётся
+    наибольшее из разрешения рисунка и rcParams['savefig.dpi'].
+    """
+    import matplotlib as mpl
+    fig = ax.figure
+    if dpi is None:
+        dpi = fig.dpi
+        save_dpi = mpl.rcParams['savefig.dpi']
+        if save_dpi != 'figure':
+            dpi = max(dpi, float(save_dpi))
+    width_in = ax.get_position().width * fig.get_figwidth()
+    return max(1, int(np.ceil(width_in * dpi)))
+
+
+def plot(ax, x, y, *args, method='minmax', n_out=None, dpi=None, **kwargs):
+    """
+    ax.plot(x, y, ...) для отсортированного по x ряда с прореживанием до
+    ширины оси в пикселях. Для логарифмической шкалы после вызова
+    устанавливается ax.set_yscale('log') - прореживание min/max от шкалы не зависит.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(x) > 1 and np.any(np.diff(x) < 0):
+        # Неупорядоченный по x ряд прореживается как кривая
+        return plot_path(ax, x, y, *args, n_out=n_out, dpi=dpi, **kwargs)
+    if n_out is None:
+        n_out = pixel_width(ax, dpi)
+        if method == 'lttb':
+            n_out *= 2
+    x, y = downsample(x, y, n_out, method)
+    return ax.plot(x, y, *args, **kwargs)
+
+
+def plot_path(ax, x, y, *args, n_out=None, dpi=None, **kwargs):
+    """ax.plot(x, y, ...) для параметрической кривой с прореживанием по номеру точки"""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if n_out is None:
+        n_out = pixel_width(ax, dpi)
+    idx = path_indices(n_out, x, y)
+    return ax.plot(x[idx], y[idx], *args, **kwargs)
@@ -0,0 +1,25 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def process_pool(workers=None):
+    """
+    Пул процессов для параллельных расчётов.
+
+    Лабораторные скрипты выполняются без защиты if __name__ == '__main__',
+    поэтому по возможности процессы запускаются через fork, без повторного
+    выполнения скрипта в дочерних процессах.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    ctx = None
+    if 'fork' in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context('fork')
+    return ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+
+
+def chunk_sizes(total, chunk_size):
+    """Разбиение total элементов на блоки не больше chunk_size"""
+    n_chunks = max(1, -(-total // chunk_size))
+    return [chunk_size] * (n_chunks - 1) + [total - chunk_size * (n_chunks - 1)]
@@ -0,0 +1,138 @@
+"""
+Замер времени и пикового объёма памяти по именованным этапам расчёта.
+
+Включается переменной окружения LABKIT_PROFILE:
+    не задана, '' или '0' - выключено, stage() возвращает пустой контекст;
+    '1'                   - профиль в JSON выводится в stderr при завершении;
+    путь к файлу .json    - профиль записывается в файл;
+    путь к каталогу       - в каталог, файл <скрипт>-<время>-<pid>.json.
+LABKIT_PROFILE_MEMORY=0 отключает учёт памяти: tracemalloc заметно
+замедляет импорт модулей и расчёты с множеством мелких объектов.
+
+Использование:
+    from labkit.profiling import stage, profiled
+
+    with stage('read_csv'):
+        data = pd.read_csv(filename)
+
+    @profiled('simulate')
+    def simulate(...): ...
+
+Память считается через tracemalloc (пик выделений Python и numpy внутри
+этапа, включая вложенные этапы). Профиль содержит для каждого этапа число
+вызовов, суммарное и максимальное время и пик памяти.
+"""
+import atexit
+import contextlib
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ENV_VAR = 'LABKIT_PROFILE'
+_setting = os.environ.get(ENV_VAR, '')
+ENABLED = _setting not in ('', '0')
+MEMORY = ENABLED and os.environ.get('LABKIT_PROFILE_MEMORY', '1') != '0'
+
+_NULL = contextlib.nullcontext()
+_stats = {}       # имя этапа -> накопленные показатели
+_stack = []       # пики памяти открытых этапов (для вложенных этапов)
+_t_start = time.perf_counter()   # от первого импорта модуля
+
+
+def enabled():
+    return ENABLED
+
+
+class _Stage:
+    """Контекст одного этапа: время и пик памяти с учётом вложенных этапов"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        if not MEMORY:
+            self.t0 = time.perf_counter()
+            return self
+        if _stack:
+            # Пик внешнего этапа до начала вложенного сохраняется в стеке
+            _stack[-1] = max(_stack[-1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        self.base = tracemalloc.get_traced_memory()[0]
+        _stack.append(0)
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.t0
+        peak = base = 0
+        if MEMORY:
+            base = self.base
+            peak = max(_stack.pop(), tracemalloc.get_traced_memory()[1])
+            if _stack:
+                _stack[-1] = max(_stack[-1], peak)
+        entry = _stats.setdefault(self.name, {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0,
+                                              'peak_bytes': 0})
+        entry['calls'] += 1
+        entry['seconds'] += elapsed
+        entry['max_seconds'] = max(entry['max_seconds'], elapsed)
+        entry['peak_bytes'] = max(entry['peak_bytes'], peak - base)
+        return False
+
+
+def stage(name):
+    """Контекст этапа; при выключенном профилировании - пустой контекст"""
+    if not ENABLED:
+        return _NULL
+    return _Stage(name)
+
+
+def profiled(name=None):
+    """Декоратор: весь вызов функции - этап name (по умолчанию имя функции)"""
+    def wrap(func):
+        if not ENABLED:
+            return func
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Stage(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return wrap
+
+
+def report():
+    """Профиль текущего процесса в виде словаря"""
+    return {
+        'script': os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else '<interactive>',
+        'argv': sys.argv[1:],
+        'pid': os.getpid(),
+        'python': sys.version.split()[0],
+        'wall_seconds': time.perf_counter() - _t_start,
+        'memory': MEMORY,
+        'stages': {name: dict(entry) for name, entry in _stats.items()},
+    }
+
+
+def _write_report():
+    if not _stats:
+        return
+    text = json.dumps(report(), ensure_ascii=False, indent=1)
+    if _setting == '1':
+        sys.stderr.write(text + '\n')
+        return
+    path = _setting
+    if os.path.isdir(path):
+        name = os.path.splitext(report()['script'])[0] or 'profile'
+        path = os.path.join(path, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text + '\n')
+
+
+if ENABLED:
+    if MEMORY:
+        tracemalloc.start()
+    atexit.register(_write_report)
@@ -0,0 +1,374 @@
+import os
+import numpy as np
+from collections import namedtuple
+
+from labkit.parallel import process_pool, chunk_sizes
+
+# Результат аппроксимации прямой y = a + b*x
+YorkResult = namedtuple('YorkResult', 'a b sa sb chi2_red n_points n_iter')
+# Доверительная полоса прямой по повторным выборкам
+BandResult = namedtuple('BandResult', 'x y_fit lower upper coef_lower coef_upper n_valid')
+
+
+def pad_series(series):
+    """
+    Упаковка наборов разной длины в двумерный массив, дополненный NaN.
+
+    series: список одномерных массивов
+    Возвращает массив формы (число наборов, максимальная длина).
+    """
+    series = [np.asarray(s, dtype=float).ravel() for s in series]
+    n_max = max(len(s) for s in series)
+    out = np.full((len(series), n_max), np.nan)
+    for i, s in enumerate(series):
+        out[i, :len(s)] = s
+    return out
+
+
+def _as_batch(x, y, sx, sy, r):
+    """Приведение входных данных к форме (наборы, точки) и маске валидных точек"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    single = x.ndim == 1
+    x = np.atleast_2d(x)
+    y = np.atleast_2d(y)
+    sx = np.broadcast_to(np.atleast_2d(np.asarray(sx, dtype=float)), x.shape)
+    sy = np.broadcast_to(np.atleast_2d(np.asarray(sy, dtype=float)), x.shape)
+    r = np.broadcast_to(np.atleast_2d(np.asarray(r, dtype=float)), x.shape)
+
+    mask = np.isfinite(x) & np.isfinite(y) & (sx > 0) & (sy > 0)
+    # Невалидные точки (дополнение NaN) заменяем нулями и исключаем нулевым весом
+    x = np.where(mask, x, 0.0)
+    y = np.where(mask, y, 0.0)
+    wx = np.where(mask, 1.0 / np.where(mask, sx, 1.0)**2, 0.0)
+    wy = np.where(mask, 1.0 / np.where(mask, sy, 1.0)**2, 0.0)
+    r = np.where(mask, r, 0.0)
+    return single, x, y, wx, wy, r, mask
+
+
+def _york_step(b, x, y, wx, wy, r, mask):
+    """
+    Один проход York для текущего наклона b (форма (наборы, 1)).
+    Возвращает веса W, сумму весов, центры X_bar, Y_bar, отклонения U, V и поправки beta.
+    """
+    alpha = np.sqrt(wx * wy)
+    denom = wx + b**2 * wy - 2 * b * r * alpha
+    W = np.where(mask, wx * wy / np.where(mask, denom, 1.0), 0.0)
+    sW = np.sum(W, axis=1, keepdims=True)
+    X_bar = np.sum(W * x, axis=1, keepdims=True) / sW
+    Y_bar = np.sum(W * y, axis=1, keepdims=True) / sW
+    U = np.where(mask, x - X_bar, 0.0)
+    V = np.where(mask, y - Y_bar, 0.0)
+    beta = W * (U / np.where(mask, wy, 1.0) + b * V / np.where(mask, wx, 1.0)
+                - (b * U + V) * r / np.where(mask, alpha, 1.0))
+    return W, sW, X_bar, Y_bar, U, V, beta
+
+
+def york_fit(x, y, sx, sy, r=0.0, n_iter=10, tol=1e-12):
+    """
+    Аппроксимация прямой y = a + b*x с погрешностями по обеим осям
+    (метод York et al., 2004), одновременно для многих наборов данных.
+
+    Параметры:
+    x, y: данные; одномерные массивы для одного набора или двумерные
+          (наборы, точки), дополненные NaN (см. pad_series)
+    sx, sy: погрешности x и y (скаляр или массив той же формы)
+    r: коэффициент корреляции погрешностей x и y
+    n_iter: максимальное число итераций (все наборы обновляются
+            одной векторной операцией за итерацию)
+    tol: относительная точность наклона для досрочной остановки
+
+    Возвращает YorkResult: a, b, их погрешности sa, sb, приведённый хи-квадрат,
+    число точек и выполненное число итераций.
+    """
+    single, x, y, wx, wy, r, mask = _as_batch(x, y, sx, sy, r)
+    n = mask.sum(axis=1)
+    if np.any(n < 3):
+        raise ValueError("Для аппроксимации нужно не менее трёх точек в каждом наборе")
+
+    # Начальное приближение - обычный МНК
+    xm = np.sum(x, axis=1, keepdims=True) / n[:, None]
+    ym = np.sum(y, axis=1, keepdims=True) / n[:, None]
+    dx = np.where(mask, x - xm, 0.0)
+    dy = np.where(mask, y - ym, 0.0)
+    b = np.sum(dx * dy, axis=1, keepdims=True) / np.sum(dx**2, axis=1, keepdims=True)
+
+    it = 0
+    for it in range(1, n_iter + 1):
+        W, sW, X_bar, Y_bar, U, V, beta = _york_step(b, x, y, wx, wy, r, mask)
+        b_new = np.sum(W * beta * V, axis=1, keepdims=True) / np.sum(W * beta * U, axis=1, keepdims=True)
+        converged = np.all(np.abs(b_new - b) <= tol * np.abs(b_new))
+        b = b_new
+        if converged:
+            break
+
+    # Итоговые веса и погрешности для найденного наклона
+    W, sW, X_bar, Y_bar, U, V, beta = _york_step(b, x, y, wx, wy, r, mask)
+    a = Y_bar - b * X_bar
+
+    # Скорректированные значения x и их взвешенное среднее
+    xi = X_bar + beta
+    xi_bar = np.sum(W * xi, axis=1, keepdims=True) / sW
+    u = np.where(mask, xi - xi_bar, 0.0)
+    sb = np.sqrt(1.0 / np.sum(W * u**2, axis=1, keepdims=True))
+    sa = np.sqrt(1.0 / sW + xi_bar**2 * sb**2)
+
+    S = np.sum(W * (V - b * U)**2, axis=1)
+    chi2_red = S / (n - 2)
+
+    a, b, sa, sb = a[:, 0], b[:, 0], sa[:, 0], sb[:, 0]
+    if single:
+        return YorkResult(float(a[0]), float(b[0]), float(sa[0]), float(sb[0]),
+                          float(chi2_red[0]), int(n[0]), it)
+    return YorkResult(a, b, sa, sb, chi2_red, n, it)
+
+
+def batched_line_fit(X, Y, W=None, full=False, absolute_sigma=False):
+    """
+    МНК-прямые y = a + b*x сразу для всей пачки выборок одним решением
+    нормальных уравнений (форма (выборки, 2, 2)).
+
+    X, Y: массивы формы (выборки, точки); W - веса той же формы (по умолчанию 1)
+    full: вернуть также погрешности a и b, оценённые по разбросу остатков
+    absolute_sigma: веса - это 1/σ² известных погрешностей, и погрешности a, b
+                    берутся из (AᵀWA)⁻¹ без масштабирования по остаткам
+                    (как curve_fit(..., absolute_sigma=True)); точки с W = 0
+                    (например, дополнение пачки) в расчёт не входят
+    Возвращает a, b (и sa, sb при full=True) формы (выборки,);
+    для вырожденных выборок (все x совпадают) - NaN.
+    """
+    X = np.asarray(X, dtype=float)
+    Y = np.asarray(Y, dtype=float)
+    W = np.ones_like(X) if W is None else np.broadcast_to(np.asarray(W, dtype=float), X.shape)
+    A = np.stack([np.ones_like(X), X], axis=-1)                  # (выборки, точки, 2)
+    AtA = np.einsum('bni,bn,bnj->bij', A, W, A)
+    Aty = np.einsum('bni,bn,bn->bi', A, W, Y)
+    det = AtA[:, 0, 0] * AtA[:, 1, 1] - AtA[:, 0, 1]**2
+    bad = ~(np.abs(det) > 1e-12 * AtA[:, 0, 0] * AtA[:, 1, 1])
+    AtA[bad] = np.eye(2)
+    det = np.where(bad, 1.0, det)
+    coef = np.linalg.solve(AtA, Aty[..., None])[..., 0]
+    coef[bad] = np.nan
+    if not full:
+        return coef[:, 0], coef[:, 1]
+
+    # Ковариация коэффициентов: s² (AᵀWA)⁻¹, s² - взвешенная дисперсия остатков
+    if absolute_sigma:
+        s2 = np.ones(X.shape[0])
+    else:
+        n = X.shape[1]
+        resid = Y - coef[:, :1] - coef[:, 1:] * X
+        s2 = np.sum(W * resid**2, axis=1) / (n - 2)
+    var_a = s2 * AtA[:, 1, 1] / det
+    var_b = s2 * AtA[:, 0, 0] / det
+    var_a[bad] = np.nan
+    var_b[bad] = np.nan
+    return coef[:, 0], coef[:, 1], np.sqrt(var_a), np.sqrt(var_b)
+
+
+def _bootstrap_chunk(x, y, x_grid, size, seed, method):
+    """Повторные выборки одного блока: коэффициенты и предсказания на сетке"""
+    rng = np.random.default_rng(seed)
+    n = len(x)
+    idx = rng.integers(0, n, size=(size, n))
+    if method == 'pairs':
+        # Выборка пар (x, y) с возвращением
+        X, Y = x[idx], y[idx]
+    else:
+        # Выборка остатков с возвращением вокруг исходной прямой
+        a0, b0 = batched_line_fit(x[None, :], y[None, :])
+        fit = a0[0] + b0[0] * x
+        resid = (y - fit) * np.sqrt(n / (n - 2))
+        X = np.broadcast_to(x, (size, n))
+        Y = fit + resid[idx]
+    a, b = batched_line_fit(X, Y)
+    return a, b, a[:, None] + b[:, None] * x_grid
+
+
+def bootstrap_line(x, y, x_grid, n_boot=10**5, method='residual', level=95.0,
+                   seed=0, workers=None, chunk_size=2**14):
+    """
+    Поточечная доверительная полоса прямой y = a + b*x методом бутстрепа.
+
+    Параметры:
+    x, y: данные
+    x_grid: сетка, на которой строится полоса
+    n_boot: число повторных выборок
+    method: 'residual' - выборка остатков (устойчива при малом числе точек),
+            'pairs' - выборка пар точек
+    level: доверительный уровень в процентах
+    seed: зерно; блоки получают независимые потоки от SeedSequence,
+          поэтому результат не зависит от числа процессов
+    workers: число процессов (по умолчанию - число ядер, 1 - без пула)
+    chunk_size: число выборок в блоке
+
+    Возвращает BandResult: x, y_fit (исходная прямая), lower, upper (полоса),
+    coef_lower, coef_upper (интервалы для (a, b)) и число невырожденных выборок.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    x_grid = np.asarray(x_grid, dtype=float)
+    sizes = chunk_sizes(n_boot, chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(sizes))
+
+    if workers <= 1:
+        parts = [_bootstrap_chunk(x, y, x_grid, size, s, method) for size, s in zip(sizes, seeds)]
+    else:
+        with process_pool(workers) as pool:
+            futures = [pool.submit(_bootstrap_chunk, x, y, x_grid, size, s, method)
+                       for size, s in zip(sizes, seeds)]
+            parts = [fut.result() for fut in futures]
+
+    a = np.concatenate([p[0] for p in parts])
+    b = np.concatenate([p[1] for p in parts])
+    pred = np.concatenate([p[2] for p in parts])
+    valid = np.isfinite(a)
+    q = [(100 - level) / 2, (100 + level) / 2]
+    lower, upper = np.percentile(pred[valid], q, axis=0)
+    coef = np.stack([a[valid], b[valid]], axis=1)
+    coef_lower, coef_upper = np.percentile(coef, q, axis=0)
+
+    a0, b0 = batched_line_fit(x[None, :], y[None, :])
+    return BandResult(x_grid, a0[0] + b0[0] * x_grid, lower, upper,
+                      coef_lower, coef_upper, int(valid.sum()))
+
+
+def jackknife_line(x, y, x_grid):
+    """
+    Оценка погрешности прямой методом складного ножа: все n подвыборок
+    без одной точки решаются одной пачкой.
+    Возвращает стандартные ошибки предсказания на x_grid и коэффициентов (a, b).
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    keep = ~np.eye(n, dtype=bool)
+    X = np.broadcast_to(x, (n, n))[keep].reshape(n, n - 1)
+    Y = np.broadcast_to(y, (n, n))[keep].reshape(n, n - 1)
+    a, b = batched_line_fit(X, Y)
+    pred = a[:, None] + b[:, None] * np.asarray(x_grid, dtype=float)
+    factor = (n - 1) / n
+    se_pred = np.sqrt(factor * np.sum((pred - pred.mean(axis=0))**2, axis=0))
+    se_coef = np.sqrt(factor * np.array([np.sum((a - a.mean())**2), np.sum((b - b.mean())**2)]))
+    return se_pred, se_coef
+
+
+# Результат кусочно-линейной аппроксимации: для каждого набора - индексы
+# начала сегментов (splits, без нулевого), коэффициенты прямых по сегментам,
+# сумма квадратов остатков и точки излома (пересечения соседних прямых)
+SegmentedResult = namedtuple('SegmentedResult', 'splits a b sse x_break y_break')
+
+
+def _prefix_sums(x, y, mask):
+    """Префиксные суммы 1, x, y, x², xy, y² по оси точек (с нулём в начале)"""
+    terms = np.stack([mask, x, y, x * x, x * y, y * y]).astype(float)
+    terms *= mask
+    zero = np.zeros(terms.shape[:-1] + (1,))
+    return np.concatenate([zero, np.cumsum(terms, axis=-1)], axis=-1)
+
+
+def _segment_sse(S, i, j):
+    """
+    Сумма квадратов остатков МНК-прямой на точках [i, j) по префиксным суммам -
+    O(1) на сегмент. Также возвращает коэффициенты a, b этой прямой.
+    """
+    c, sx, sy, sxx, sxy, syy = (np.take_along_axis(S, j[None], -1) -
+                                np.take_along_axis(S, i[None], -1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dxx = sxx - sx * sx / c
+        dxy = sxy - sx * sy / c
+        dyy = syy - sy * sy / c
+        b = dxy / dxx
+        a = (sy - b * sx) / c
+        sse = np.maximum(dyy - dxy * b, 0.0)
+    return sse, a, b
+
+
+def segmented_fit(x, y, n_breaks=1, n_min=3):
+    """
+    Кусочно-линейная аппроксимация с оптимальными точками разбиения
+    (например, граница ламинарного и турбулентного участков).
+
+    x, y: один набор (одномерные массивы, x возрастает) или пачка наборов
+          (наборы, точки), дополненных NaN в конце (см. pad_series)
+    n_breaks: число точек разбиения (сегментов на одно больше)
+    n_min: минимальное число точек в сегменте
+
+    Стоимость любого сегмента считается за O(1) по префиксным суммам.
+    Для одного разбиения перебор всех вариантов - один векторный проход O(n);
+    для нескольких - динамическое программирование по матрице стоимостей O(n²).
+
+    Возвращает SegmentedResult; для одного набора - без оси наборов.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    single = x.ndim == 1
+    x = np.atleast_2d(x)
+    y = np.atleast_2d(y)
+    mask = np.isfinite(x) & np.isfinite(y)
+    n = mask.sum(axis=1)
+    n_seg = n_breaks + 1
+    if np.any(n < n_seg * n_min):
+        raise ValueError("Слишком мало точек для заданного числа сегментов")
+
+    # Центрирование улучшает точность сумм квадратов
+    x0 = np.nanmean(x, axis=1, keepdims=True)
+    y0 = np.nanmean(y, axis=1, keepdims=True)
+    xc = np.where(mask, x - x0, 0.0)
+    yc = np.where(mask, y - y0, 0.0)
+    S = _prefix_sums(xc, yc, mask)                       # (6, наборы, точки + 1)
+    m, n_max = x.shape
+    end = n[:, None]
+
+    if n_breaks == 1:
+        k = np.broadcast_to(np.arange(n_max + 1), (m, n_max + 1))
+        left, _, _ = _segment_sse(S, np.zeros_like(k), k)
+        right, _, _ = _segment_sse(S, k, np.broadcast_to(end, k.shape))
+        total = np.where((k >= n_min) & (k <= end - n_min), left + right, np.inf)
+        splits = np.argmin(total, axis=1)[:, None]
+    else:
+        # cost[i, j] - стоимость сегмента [i, j) для каждого набора
+        idx = np.arange(n_max + 1)
+        I = np.broadcast_to(idx[:, None], (n_max + 1, n_max + 1))
+        J = np.broadcast_to(idx[None, :], (n_max + 1, n_max + 1))
+        S_flat = S[..., None, :]
+        cost = np.empty((m, n_max + 1, n_max + 1))
+        for d in range(m):
+            sse, _, _ = _segment_sse(S_flat[:, d], I, J)
+            ok = (J - I >= n_min) & (J <= n[d])
+            cost[d] = np.where(ok, sse, np.inf)
+        best = cost[:, 0, :]                              # один сегмент [0, j)
+        back = []
+        for _ in range(n_breaks):
+            cand = best[:, :, None] + cost                # (наборы, i, j)
+            back.append(np.argmin(cand, axis=1))
+            best = np.min(cand, axis=1)
+        # Обратный проход от конца каждого набора
+        splits = np.empty((m, n_breaks), dtype=int)
+        j = n.copy()
+        for s in range(n_breaks - 1, -1, -1):
+            j = back[s][np.arange(m), j]
+            splits[:, s] = j
+
+    bounds = np.concatenate([np.zeros((m, 1), dtype=int), splits, end], axis=1)
+    sse, a, b = _segment_sse(S, bounds[:, :-1], bounds[:, 1:])
+    # Возврат к исходным (нецентрированным) координатам
+    a = a + y0 - b * x0
+    sse = sse.sum(axis=1)
+
+    # Точки излома - пересечения соседних прямых
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_break = (a[:, 1:] - a[:, :-1]) / (b[:, :-1] - b[:, 1:])
+    # Если пересечение вне промежутка между соседними точками, берём середину промежутка
+    x_lo = np.take_along_axis(x, splits - 1, axis=1)
+    x_hi = np.take_along_axis(x, splits, axis=1)
+    outside = ~((x_break >= x_lo) & (x_break <= x_hi))
+    x_break = np.where(outside, (x_lo + x_hi) / 2, x_break)
+    y_break = a[:, :-1] + b[:, :-1] * x_break
+
+    if single:
+        return SegmentedResult(splits[0], a[0], b[0], float(sse[0]), x_break[0], y_break[0])
+    return SegmentedResult(splits, a, b, sse, x_break, y_break)
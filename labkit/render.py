@@ -0,0 +1,302 @@
+"""
+Пакетная перерисовка рисунков для отчётов.
+
+Каждое задание - скрипт лабораторной работы (или функция из него) и список
+файлов, в которые по порядку сохраняются его рисунки. Задания выполняются
+без окон (backend Agg) в отдельных процессах параллельно. Для каждого
+задания считается хеш исходных данных и кода - скрипта, импортируемых им
+модулей labkit и соседних модулей, используемых файлов данных; если хеш не
+изменился и рисунки на месте, задание пропускается.
+
+Запуск: python -m labkit.render [--force] [--jobs N] [--out-dir DIR] [--list] [фильтр ...]
+"""
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LABS_DIR = os.path.join(ROOT, 'Физос', 'Лабы')
+CACHE_FILE = os.path.join(ROOT, '.render_cache.json')
+
+# Задания: lab - каталог работы, script - путь к скрипту относительно него,
+# outputs - имена файлов рисунков в порядке их создания скриптом,
+# call - функция скрипта и её аргументы (если рисунок строит функция),
+# inputs - дополнительные файлы данных относительно каталога скрипта
+JOBS = [
+    {'id': '1.3.3/graf1', 'lab': '1.3.3', 'script': 'graf1.py', 'outputs': ['Figure_1.png']},
+    {'id': '1.3.3/graf2', 'lab': '1.3.3', 'script': 'graf2.py',
+     'outputs': ['Figure_2.png', 'Figure_3.png', 'Figure_4.png']},
+    {'id': '1.3.3/graf3', 'lab': '1.3.3', 'script': 'graf3.py',
+     'outputs': ['Figure_5.png', 'beta_lambda.png']},
+    # Активный набор данных в 2.1.3.py - последняя серия измерений
+    {'id': '2.1.3/2.1.3', 'lab': '2.1.3', 'script': '2.1.3.py', 'outputs': ['55.png']},
+    {'id': '2.1.6/20', 'lab': '2.1.6', 'script': '20.py', 'outputs': ['20.png']},
+    {'id': '2.1.6/30', 'lab': '2.1.6', 'script': '30.py', 'outputs': ['30.png']},
+    {'id': '2.1.6/50', 'lab': '2.1.6', 'script': '50.py', 'outputs': ['50.png']},
+    {'id': '2.1.6/kT', 'lab': '2.1.6', 'script': 'kT.py', 'outputs': ['kT.png', 'kT_band.png']},
+    {'id': '2.5.1/2.5.1', 'lab': '2.5.1', 'script': '2.5.1.py',
+     'outputs': ['surface_tension_plots.png', 'sigma_vs_t_C.png']},
+] + [
+    # Обработка каждого файла диффузии при температуре в лаборатории 25 °C
+    {'id': f'2.2.1/{name}', 'lab': '2.2.1', 'script': 'Б03-502/m.py',
+     'call': ['process_file', [f'{csv}.csv', 298.15]], 'inputs': [f'{csv}.csv'],
+     'outputs': [f'{name}.png']}
+    for csv, name in [('40.9', '40'), ('78.1', '78'), ('120', '120'), ('160', '160'), ('200', '200')]
+]
+
+
+def _file_digest(path, h):
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+
+
+def job_paths(job):
+    """Абсолютные пути скрипта, каталога скрипта и выходных файлов задания"""
+    lab_dir = os.path.join(LABS_DIR, job['lab'])
+    script = os.path.join(lab_dir, job['script'])
+    return script, os.path.dirname(script), [os.path.join(lab_dir, o) for o in job['outputs']]
+
+
+def _imported_names(tree, package=None):
+    """
+    Абсолютные имена модулей из всех import в дереве, включая импорты
+    внутри функций (ленивые импорты matplotlib, scipy и модулей labkit).
+    """
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ''
+            if node.level and package:
+                parent = package.rsplit('.', node.level - 1)[0]
+                base = f'{parent}.{base}' if base else parent
+            names.add(base)
+            # from labkit import lod - подмодуль, а не имя из __init__
+            names.update(f'{base}.{alias.name}' for alias in node.names)
+    return names
+
+
+def _module_files(name, script_dir):
+    """
+    Файлы модуля labkit (вместе с __init__.py пакетов, которые выполняются
+    при импорте) или соседнего модуля из каталога скрипта; для внешних
+    модулей - пустой список.
+    """
+    parts = name.split('.')
+    if parts[0] == 'labkit':
+        files = []
+        for k in range(1, len(parts) + 1):
+            path = os.path.join(ROOT, *parts[:k])
+            for candidate in (os.path.join(path, '__init__.py'), path + '.py'):
+                if os.path.isfile(candidate):
+                    files.append(candidate)
+                    break
+        return files
+    if len(parts) == 1:
+        candidate = os.path.join(script_dir, name + '.py')
+        if os.path.isfile(candidate):
+            return [candidate]
+    return []
+
+
+def job_sources(job):
+    """
+    Файлы, от которых зависят рисунки задания: скрипт; модули labkit и
+    соседние модули из каталога скрипта, которые он импортирует (транзитивно,
+    по разбору import); файлы данных из каталога скрипта, имена которых
+    встречаются в этом коде строками (data.npz), и указанные входные файлы.
+    """
+    script, script_dir, _ = job_paths(job)
+    # Рисунки заданий - результаты, а не входные данные, даже если их имена есть в коде
+    outputs = {path for other in JOBS for path in job_paths(other)[2]}
+    data_names = {name for name in os.listdir(script_dir)
+                  if not name.endswith('.py') and os.path.isfile(os.path.join(script_dir, name))
+                  and os.path.join(script_dir, name) not in outputs}
+    files, queue = set(), [script]
+    while queue:
+        path = queue.pop()
+        if path in files:
+            continue
+        files.add(path)
+        with open(path, 'rb') as f:
+            tree = ast.parse(f.read(), filename=path)
+        rel = os.path.relpath(path, ROOT)
+        package = None
+        if rel.startswith('labkit' + os.sep):
+            package = os.path.dirname(rel).replace(os.sep, '.')
+        for name in _imported_names(tree, package):
+            queue.extend(_module_files(name, script_dir))
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str) and node.value in data_names:
+                files.add(os.path.join(script_dir, node.value))
+    files.update(os.path.join(script_dir, name) for name in job.get('inputs', []))
+    return sorted(files)
+
+
+def job_hash(job):
+    """Хеш задания: описание задания и содержимое всех исходных файлов"""
+    h = hashlib.sha256(json.dumps(job, sort_keys=True, ensure_ascii=False).encode())
+    for path in job_sources(job):
+        h.update(os.path.relpath(path, ROOT).encode())
+        _file_digest(path, h)
+    return h.hexdigest()
+
+
+def load_cache():
+    try:
+        with open(CACHE_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache):
+    with open(CACHE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=1, sort_keys=True, ensure_ascii=False)
+
+
+def _worker(job, out_dir, dpi):
+    """
+    Выполнение одного задания внутри дочернего процесса: plt.show заменяется
+    сохранением открытых рисунков в очередные выходные файлы.
+    """
+    import builtins
+    import runpy
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    import matplotlib.pyplot as plt
+    # Разрешение сохранения учитывается при прореживании рядов (labkit.lod)
+    matplotlib.rcParams['savefig.dpi'] = dpi
+
+    script, script_dir, outputs = job_paths(job)
+    if out_dir:
+        outputs = [os.path.join(out_dir, os.path.basename(o)) for o in outputs]
+    saved = []
+
+    def show(*args, **kwargs):
+        for num in plt.get_fignums():
+            fig = plt.figure(num)
+            if len(saved) < len(outputs):
+                fig.savefig(outputs[len(saved)], dpi=dpi)
+                saved.append(outputs[len(saved)])
+            plt.close(fig)
+
+    def no_input(prompt=''):
+        raise EOFError("Интерактивный ввод недоступен при пакетной отрисовке")
+
+    plt.show = show
+    builtins.input = no_input
+    # Рисунки, которые скрипт сохраняет сам по относительному пути, тоже
+    # попадают в out_dir; функции получают пути к данным относительно каталога скрипта
+    os.chdir(out_dir if out_dir and 'call' not in job else script_dir)
+    sys.path.insert(0, script_dir)
+    sys.argv = [script]
+    if 'call' in job:
+        namespace = runpy.run_path(script, run_name='__render__')
+        func, args = job['call']
+        namespace[func](*args)
+    else:
+        runpy.run_path(script, run_name='__main__')
+    show()
+    if len(saved) < len(outputs):
+        raise RuntimeError(f"Скрипт построил {len(saved)} рисунков из {len(outputs)} ожидаемых")
+
+
+def _run_subprocess(job, out_dir, dpi):
+    """Запуск задания в отдельном процессе интерпретатора; возвращает (код, время, вывод)"""
+    env = dict(os.environ, MPLBACKEND='Agg')
+    cmd = [sys.executable, '-m', 'labkit.render', '--worker',
+           json.dumps({'job': job, 'out_dir': out_dir, 'dpi': dpi}, ensure_ascii=False)]
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True)
+    return proc.returncode, time.perf_counter() - t0, proc.stdout + proc.stderr
+
+
+def select_jobs(patterns):
+    """Задания, идентификатор которых содержит хотя бы одну из подстрок (все - без фильтра)"""
+    if not patterns:
+        return list(JOBS)
+    return [job for job in JOBS if any(p in job['id'] for p in patterns)]
+
+
+def render(jobs, force=False, workers=None, out_dir=None, dpi=300, verbose=True):
+    """
+    Перерисовка заданий, у которых изменился хеш или отсутствуют рисунки.
+    Возвращает словарь {id: 'ok' | 'skip' | 'fail'}.
+    """
+    cache = load_cache()
+    todo, status, hashes = [], {}, {}
+    for job in jobs:
+        hashes[job['id']] = job_hash(job)
+        _, _, outputs = job_paths(job)
+        if out_dir:
+            outputs = [os.path.join(out_dir, os.path.basename(o)) for o in outputs]
+        entry = cache.get(job['id'], {})
+        fresh = (entry.get('hash') == hashes[job['id']] and entry.get('out_dir') == out_dir
+                 and all(os.path.exists(o) for o in outputs))
+        if fresh and not force:
+            status[job['id']] = 'skip'
+        else:
+            todo.append(job)
+
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = pool.map(lambda job: (job, _run_subprocess(job, out_dir, dpi)), todo)
+        for job, (code, elapsed, output) in results:
+            if code == 0:
+                status[job['id']] = 'ok'
+                cache[job['id']] = {'hash': hashes[job['id']], 'out_dir': out_dir,
+                                    'outputs': job['outputs'], 'seconds': round(elapsed, 3)}
+            else:
+                status[job['id']] = 'fail'
+                cache.pop(job['id'], None)
+            if verbose:
+                print(f"[{status[job['id']]}] {job['id']} ({elapsed:.1f} с)")
+                if code != 0:
+                    print(output)
+    save_cache(cache)
+    if verbose:
+        for job in jobs:
+            if status[job['id']] == 'skip':
+                print(f"[skip] {job['id']}")
+    return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетная перерисовка рисунков для отчётов")
+    parser.add_argument('patterns', nargs='*', help="фильтр по идентификатору задания")
+    parser.add_argument('--force', action='store_true', help="перерисовать всё без учёта кэша")
+    parser.add_argument('--jobs', type=int, default=None, help="число параллельных процессов")
+    parser.add_argument('--out-dir', default=None, help="каталог для рисунков вместо каталогов работ")
+    parser.add_argument('--dpi', type=int, default=300)
+    parser.add_argument('--list', action='store_true', help="только вывести задания")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        spec = json.loads(args.worker)
+        _worker(spec['job'], spec['out_dir'], spec['dpi'])
+        return 0
+
+    jobs = select_jobs(args.patterns)
+    if args.list:
+        for job in jobs:
+            print(f"{job['id']}: {job['lab']}/{job['script']} -> {', '.join(job['outputs'])}")
+        return 0
+    out_dir = os.path.abspath(args.out_dir) if args.out_dir else None
+    status = render(jobs, force=args.force, workers=args.jobs, out_dir=out_dir, dpi=args.dpi)
+    return 1 if 'fail' in status.values() else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+import os
+import numpy as np
+from collections import namedtuple
+
+from labkit.parallel import process_pool, chunk_sizes
+from labkit.profiling import profiled
+
+# Результат распространения погрешностей методом Монте-Карло
+MCResult = namedtuple('MCResult', 'mean std cov q percentiles n_draws')
+
+
+# Распределения входных величин. Параметры могут быть массивами - тогда
+# выборка имеет форму (size, *форма параметров), например для серии точек.
+
+class Normal:
+    """Нормальное распределение входной величины: среднее и стандартное отклонение"""
+
+    def __init__(self, mean, sd):
+        self.mean = mean
+        self.sd = sd
+
+    def sample(self, rng, size):
+        return rng.normal(self.mean, self.sd, (size,) + np.broadcast(self.mean, self.sd).shape)
+
+
+class Uniform:
+    """Равномерное распределение: например, погрешность отсчёта по шкале прибора"""
+
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+    def sample(self, rng, size):
+        return rng.uniform(self.low, self.high, (size,) + np.broadcast(self.low, self.high).shape)
+
+
+class Const:
+    """Величина без погрешности (табличное значение)"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def sample(self, rng, size):
+        return np.full((size,) + np.shape(self.value), self.value, dtype=float)
+
+
+def _evaluate(func, inputs, rng, size):
+    """
+    Выборка входных величин и векторный расчёт выходных.
+    Выходы формы (size,) дают по одной строке, формы (size, k) - по k строк;
+    результат имеет форму (выходы, size).
+    """
+    draws = {name: dist.sample(rng, size) for name, dist in inputs.items()}
+    out = func(**draws)
+    if not isinstance(out, (tuple, list)):
+        out = (out,)
+    rows = []
+    for o in out:
+        o = np.asarray(o, dtype=float)
+        if o.ndim <= 1:
+            rows.append(np.broadcast_to(o, (size,))[None, :])
+        else:
+            rows.append(o.reshape(size, -1).T)
+    return np.concatenate(rows, axis=0)
+
+
+def _run_chunk(func, inputs, size, seed, edges):
+    """
+    Обработка одного блока выборки: возвращает только накопленные статистики
+    (среднее, матрицу сумм квадратов отклонений, гистограммы), а не сами значения.
+    """
+    rng = np.random.default_rng(seed)
+    out = _evaluate(func, inputs, rng, size)
+    mean = out.mean(axis=1)
+    dev = out - mean[:, None]
+    m2 = dev @ dev.T
+    # Сетка равномерная, поэтому номер бина считается арифметически;
+    # индекс 0 - значения левее сетки, последний - правее
+    n_bins = edges.shape[1] - 1
+    lo = edges[:, :1]
+    width = (edges[:, -1:] - lo) / n_bins
+    idx = np.floor((out - lo) / width)
+    idx = np.clip(idx, -1, n_bins).astype(np.int64) + 1
+    idx += np.arange(out.shape[0])[:, None] * (n_bins + 2)
+    counts = np.bincount(idx.ravel(), minlength=out.shape[0] * (n_bins + 2))
+    return size, mean, m2, counts.reshape(out.shape[0], n_bins + 2)
+
+
+def _merge(acc, part):
+    """Объединение статистик двух блоков (формула Чана для среднего и ковариации)"""
+    if acc is None:
+        return part
+    n_a, mean_a, m2_a, counts_a = acc
+    n_b, mean_b, m2_b, counts_b = part
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * n_b / n
+    m2 = m2_a + m2_b + np.outer(delta, delta) * n_a * n_b / n
+    return n, mean, m2, counts_a + counts_b
+
+
+def _quantiles(counts, edges, q):
+    """Квантили по накопленным гистограммам (линейная интерполяция внутри бина)"""
+    result = np.empty((counts.shape[0], len(q)))
+    for k in range(counts.shape[0]):
+        cdf = np.cumsum(counts[k]) / counts[k].sum()
+        # cdf[j] - доля значений левее edges[k][j]; за пределами сетки - граница сетки
+        result[k] = np.interp(np.asarray(q) / 100.0, cdf[:-1], edges[k])
+    return result
+
+
+@profiled('propagate')
+def propagate(func, inputs, n_draws=10**7, chunk_size=2**18, workers=None,
+              seed=0, q=(2.5, 16, 50, 84, 97.5), n_bins=2**14):
+    """
+    Распространение погрешностей методом Монте-Карло.
+
+    Параметры:
+    func: векторная функция, принимающая входные величины по именам (массивы)
+          и возвращающая массив или кортеж массивов выходных величин
+          (первая ось - выборка, вторая - номер точки серии, если есть);
+          для расчёта в пуле процессов должна быть определена на уровне модуля
+    inputs: словарь {имя: распределение} (Normal, Uniform, Const)
+    n_draws: полный объём выборки
+    chunk_size: размер блока; память ограничена одним блоком на процесс
+    workers: число процессов (по умолчанию - число ядер, 1 - без пула)
+    seed: зерно генератора; блоки получают независимые потоки от SeedSequence,
+          поэтому результат не зависит от числа процессов
+    q: уровни квантилей в процентах
+    n_bins: число бинов гистограммы для вычисления квантилей
+
+    Возвращает MCResult: mean, std, cov (по выходным величинам),
+    q (уровни) и percentiles (форма (выходы, уровни)), n_draws.
+    """
+    sizes = chunk_sizes(n_draws, chunk_size)
+    n_chunks = len(sizes)
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks + 1)
+
+    # Пробный блок задаёт диапазон гистограмм: среднее ± 8 сигм с запасом
+    pilot = _evaluate(func, inputs, np.random.default_rng(seeds[-1]), min(chunk_size, 10**5))
+    center = pilot.mean(axis=1)
+    spread = np.maximum(pilot.max(axis=1) - pilot.min(axis=1), 8 * pilot.std(axis=1))
+    spread = np.where(spread > 0, spread, np.maximum(np.abs(center), 1.0) * 1e-12)
+    lo = np.minimum(pilot.min(axis=1), center - spread)
+    hi = np.maximum(pilot.max(axis=1), center + spread)
+    edges = np.linspace(lo, hi, n_bins + 1, axis=1)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, n_chunks)
+
+    acc = None
+    if workers <= 1:
+        for size, s in zip(sizes, seeds[:-1]):
+            acc = _merge(acc, _run_chunk(func, inputs, size, s, edges))
+    else:
+        with process_pool(workers) as pool:
+            futures = [pool.submit(_run_chunk, func, inputs, size, s, edges)
+                       for size, s in zip(sizes, seeds[:-1])]
+            for fut in futures:
+                acc = _merge(acc, fut.result())
+
+    n, mean, m2, counts = acc
+    cov = m2 / (n - 1)
+    std = np.sqrt(np.diag(cov))
+    percentiles = _quantiles(counts, edges, q)
+    return MCResult(mean, std, cov, tuple(q), percentiles, n)
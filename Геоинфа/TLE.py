@@ -1,55 +1,168 @@
-
-
-import matplotlib.pyplot as plt
+import argparse
+import os
+import sys
 import numpy as np
-from skyfield.api import load, wgs84, EarthSatellite
-
-ts = load.timescale()
-
-t_start = ts.utc(2026, 1, 1)
-t_end = ts.utc(2026, 3, 1)
 
+# Подключение общих модулей из корня репозитория
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from labkit.cli import add_output_arguments, write_result
+from labkit.profiling import profiled
 
 line1 = '1 33591U 09005A   26055.21485026  .00000032  00000-0  40752-4 0  9998'
 line2 = '2 33591  98.9636 125.9615 0013475 354.3600   5.7419 14.13453966878522'
 
-satellite = EarthSatellite(line1, line2, 'NOAA19', ts)
+# Долгопрудный
+LAT, LON = +55.9496, +37.5018
 
-dolgoprudny = wgs84.latlon(+55.9496, +37.5018)
-
-t, events = satellite.find_events(dolgoprudny, t_start, t_end, altitude_degrees=0)
 event_names = 'above ', 'culminate', 'below '
-for ti, event in zip(t, events):
-    if event == 0:
-        ans = event_names[event] + ti.utc_strftime('%Y %b %d %H:%M:%S')
-
-    if event == 2:
-        ans = ans +" "+ event_names[event] + ti.utc_strftime('%Y %b %d %H:%M:%S')
-        print(ans)
-
-difference = satellite - dolgoprudny
-
-t_start = ts.utc(2026, 1, 1)
-t_end = ts.utc(2026, 1, 3)
-
-
-times = ts.linspace(t_start, t_end, 10000)
-
-azimuts = []
-altitudes = []
-
-for t in times:
-    topocentric = difference.at(t)
-    alt, az, distance = topocentric.altaz()
-    if alt.degrees > 0:
-        azimuts.append(az.degrees)
-        altitudes.append(alt.degrees)
-
-fig, ax = plt.subplots(subplot_kw={'projection': 'polar'})
-ax.set_theta_zero_location('N')
-ax.set_theta_direction(-1)
-ax.set_ylim(90, 0)
-ax.set_yticks(range(0, 91, 30))
-
-ax.plot(np.radians(azimuts), altitudes, linewidth=1)
-plt.show()
\ No newline at end of file
+FMT = '%Y %b %d %H:%M:%S'
+
+
+@profiled('setup')
+def setup(l1=line1, l2=line2, name='NOAA19', lat=LAT, lon=LON):
+    """Шкала времени, спутник и наблюдатель (skyfield импортируется здесь)"""
+    from skyfield.api import load, wgs84, EarthSatellite
+    ts = load.timescale()
+    satellite = EarthSatellite(l1, l2, name, ts)
+    observer = wgs84.latlon(lat, lon)
+    return ts, satellite, observer
+
+
+def _pair_events(events):
+    """Пары (восход, заход) из последовательности (момент, код события)"""
+    passes = []
+    rise = None
+    for ti, event in events:
+        if event == 0:
+            rise = ti
+        if event == 2 and rise is not None:
+            passes.append((rise, ti))
+    return passes
+
+
+@profiled('find_events')
+def find_passes(satellite, observer, t_start, t_end, altitude_degrees=0):
+    """Пролёты над горизонтом: список пар (восход, заход) моментов skyfield"""
+    t, events = satellite.find_events(observer, t_start, t_end, altitude_degrees=altitude_degrees)
+    return _pair_events(zip(t, events))
+
+
+def history_segments(ts, history, norad, t_start, t_end, name=None):
+    """
+    Спутники по отрезкам [t_start, t_end] с набором элементов ближайшей эпохи
+    (tle_store.TLEHistory): список (начало, конец, EarthSatellite).
+    """
+    from skyfield.api import EarthSatellite
+
+    out = []
+    for seg in history.segments(norad, t_start.ut1, t_end.ut1):
+        satellite = EarthSatellite(seg.line1, seg.line2, name or str(norad), ts)
+        out.append((ts.ut1_jd(seg.jd_start), ts.ut1_jd(seg.jd_end), satellite))
+    return out
+
+
+@profiled('find_events')
+def find_passes_segments(segments, observer, altitude_degrees=0):
+    """
+    Пролёты по отрезкам с разными наборами элементов; пролёт, пересекающий
+    границу отрезков, собирается из восхода на одном и захода на другом.
+    """
+    events = []
+    for t0, t1, satellite in segments:
+        t, codes = satellite.find_events(observer, t0, t1, altitude_degrees=altitude_degrees)
+        events.extend(zip(t, codes))
+    return _pair_events(events)
+
+
+@profiled('altaz')
+def sky_track(satellite, observer, times):
+    """
+    Азимут и высота (градусы) для всех моментов сразу: один векторный
+    вызов at/altaz вместо цикла по моментам. Возвращает только точки над горизонтом.
+    """
+    alt, az, distance = (satellite - observer).at(times).altaz()
+    above = alt.degrees > 0
+    return az.degrees[above], alt.degrees[above]
+
+
+@profiled('altaz')
+def sky_track_segments(segments, observer, times):
+    """sky_track по отрезкам: каждый момент считается по набору своего отрезка"""
+    bounds = np.array([t0.tt for t0, _, _ in segments[1:]])
+    index = np.searchsorted(bounds, times.tt, side='right')
+    azimuts, altitudes = [], []
+    for k, (_, _, satellite) in enumerate(segments):
+        sel = np.flatnonzero(index == k)
+        if len(sel):
+            az, alt = sky_track(satellite, observer, times[sel])
+            azimuts.append(az)
+            altitudes.append(alt)
+    return np.concatenate(azimuts), np.concatenate(altitudes)
+
+
+@profiled('plot')
+def plot_track(azimuts, altitudes):
+    import matplotlib.pyplot as plt
+    from labkit import lod
+
+    fig, ax = plt.subplots(subplot_kw={'projection': 'polar'})
+    ax.set_theta_zero_location('N')
+    ax.set_theta_direction(-1)
+    ax.set_ylim(90, 0)
+    ax.set_yticks(range(0, 91, 30))
+
+    lod.plot_path(ax, np.radians(azimuts), altitudes, linewidth=1)
+    plt.show()
+
+
+def _utc(ts, date):
+    """Момент времени из строки ГГГГ-ММ-ДД"""
+    y, m, d = (int(v) for v in date.split('-'))
+    return ts.utc(y, m, d)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пролёты NOAA 19 над Долгопрудным")
+    parser.add_argument('--start', default='2026-01-01', help="начало поиска пролётов, ГГГГ-ММ-ДД")
+    parser.add_argument('--end', default='2026-03-01', help="конец поиска пролётов")
+    parser.add_argument('--track-start', default='2026-01-01', help="начало трассы на небе")
+    parser.add_argument('--track-end', default='2026-01-03', help="конец трассы на небе")
+    parser.add_argument('--samples', type=int, default=10000, help="число точек трассы")
+    parser.add_argument('--history', nargs='+', metavar='TLE',
+                        help="файлы истории TLE: на каждом отрезке - набор ближайшей эпохи")
+    parser.add_argument('--norad', type=int, default=33591, help="номер NORAD спутника в истории")
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    ts, satellite, observer = setup()
+    times = ts.linspace(_utc(ts, args.track_start), _utc(ts, args.track_end), args.samples)
+    if args.history:
+        from tle_store import TLEHistory
+
+        history = TLEHistory.from_files(args.history)
+        name = history.names.get(args.norad)
+        passes = find_passes_segments(history_segments(ts, history, args.norad, _utc(ts, args.start),
+                                                       _utc(ts, args.end), name), observer)
+        azimuts, altitudes = sky_track_segments(history_segments(ts, history, args.norad, times[0],
+                                                                 times[-1], name), observer, times)
+    else:
+        passes = find_passes(satellite, observer, _utc(ts, args.start), _utc(ts, args.end))
+        azimuts, altitudes = sky_track(satellite, observer, times)
+
+    if args.no_plot:
+        records = [{'rise': rise.utc_iso(), 'set': set_.utc_iso()} for rise, set_ in passes]
+        if args.format == 'csv':
+            write_result(records, 'csv', args.output)
+        else:
+            write_result({'passes': records, 'track': {'az': azimuts, 'alt': altitudes}},
+                         'json', args.output)
+        return 0
+
+    for rise, set_ in passes:
+        print(event_names[0] + rise.utc_strftime(FMT) + " " + event_names[2] + set_.utc_strftime(FMT))
+    plot_track(azimuts, altitudes)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,19 @@
+import argparse
 import matplotlib.pyplot as plt
 import numpy as np
 from skyfield.api import EarthSatellite, load, wgs84
+import os
+import sys
+
+# Подключение общих модулей из корня репозитория
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from labkit import lod
+
+# --heatmap N: вместо линии трассы - карта занятости неба за N суток
+parser = argparse.ArgumentParser(description="Пролёты NOAA 19 над Долгопрудным")
+parser.add_argument('--heatmap', type=float, metavar='СУТ',
+                    help="карта занятости неба за указанное число суток от 1 января")
+args = parser.parse_args()
 
 # Шкала времени
 ts = load.timescale()
@@ -31,6 +44,15 @@ for ti, code in zip(t_ev, ev):
 #Построение трассы над горизонтом 1–3 января (включительно) 2026
 diff = sat - loc
 t3 = ts.utc(2026, 1, 1)
+
+if args.heatmap:
+    # Точки всех пролётов накапливаются в гистограмме блоками (sky_heatmap.py)
+    from sky_heatmap import accumulate
+    hist = accumulate([sat], loc, ts, t3, ts.tt_jd(t3.tt + args.heatmap), step=30)
+    hist.plot(title=f'Занятость неба над Долгопрудным за {args.heatmap:g} сут')
+    plt.show()
+    sys.exit(0)
+
 t4 = ts.utc(2026, 1, 4)
 times = ts.linspace(t3, t4, 10000)
 
@@ -48,6 +70,6 @@ ax.set_theta_zero_location('N')
 ax.set_theta_direction(-1)
 ax.set_ylim(90, 0)
 ax.set_yticks(range(0, 91, 30))
-ax.plot(np.radians(az), alt, lw=1, color='black')
+lod.plot_path(ax, np.radians(az), alt, lw=1, color='black')
 ax.set_title('Полярный график пролета спутника над Долгопрудным', fontsize=10)
 plt.show()
\ No newline at end of file
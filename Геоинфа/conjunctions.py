@@ -0,0 +1,310 @@
+"""
+Поиск тесных сближений спутников каталога TLE.
+
+Этапы:
+    1. фильтр по высотам: спутник, чей интервал [перигей, апогей] не
+       пересекается ни с одним другим (с запасом), из расчёта исключается,
+       найденные пары проверяются на пересечение интервалов;
+    2. все спутники прогнозируются на общей сетке времени одним вызовом
+       SatrecArray.sgp4 (блоками по времени для ограничения памяти);
+    3. на каждом шаге положения раскладываются в k-d дерево (cKDTree) и
+       ищутся пары ближе порога с запасом на движение за шаг - без перебора
+       всех O(N²) пар;
+    4. для каждой встречи пары момент наибольшего сближения (TCA) уточняется
+       двумя сгущающимися сетками около лучшего шага и параболой.
+
+Запуск:
+    python conjunctions.py [каталог.tle] [--hours 24] [--step 60] [--threshold 10]
+    python conjunctions.py --synthetic 3000 --no-plot --format csv
+"""
+import argparse
+import os
+import sys
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+import numpy as np
+
+# Подключение общих модулей из корня репозитория
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from labkit.cli import add_output_arguments, write_result
+from labkit.profiling import profiled, stage
+
+Conjunction = namedtuple('Conjunction', 'i j name_i name_j jd miss_km speed_km_s')
+
+MU_EARTH = 398600.8     # км³/с², WGS72
+
+
+def read_tle(path):
+    """
+    Спутники из файла TLE (формат из двух или трёх строк на спутник).
+    Возвращает списки имён и объектов Satrec.
+    """
+    from sgp4.api import Satrec
+
+    names, sats = [], []
+    with open(path, encoding='utf-8') as f:
+        lines = [line.rstrip() for line in f if line.strip()]
+    k = 0
+    while k < len(lines):
+        if lines[k].startswith('1 ') and k + 1 < len(lines) and lines[k + 1].startswith('2 '):
+            name, l1, l2 = lines[k][2:7].strip(), lines[k], lines[k + 1]
+            k += 2
+        elif k + 2 < len(lines) and lines[k + 1].startswith('1 ') and lines[k + 2].startswith('2 '):
+            name, l1, l2 = lines[k].lstrip('0 ').strip(), lines[k + 1], lines[k + 2]
+            k += 3
+        else:
+            raise ValueError(f"{path}: строка {k + 1} не похожа на TLE: {lines[k]!r}")
+        names.append(name)
+        sats.append(Satrec.twoline2rv(l1, l2))
+    return names, sats
+
+
+def synthetic_catalog(n, epoch=datetime(2026, 1, 1, tzinfo=timezone.utc), seed=0):
+    """
+    Случайный каталог из n спутников на низких орбитах (высоты 500-1200 км,
+    несколько групп близких наклонений) - для проверки и замеров без файла TLE.
+    """
+    from sgp4.api import Satrec, WGS72
+
+    rng = np.random.default_rng(seed)
+    epoch_days = (epoch - datetime(1949, 12, 31, tzinfo=timezone.utc)).total_seconds() / 86400
+    radius = 6378.135
+    alt = rng.uniform(500, 1200, n)
+    incl = np.radians(rng.choice([53.0, 70.0, 87.9, 97.6], n) + rng.normal(0, 0.05, n))
+    ecc = rng.uniform(0, 0.01, n)
+    no_kozai = np.sqrt(MU_EARTH / (radius + alt)**3) * 60      # рад/мин
+    names, sats = [], []
+    for k in range(n):
+        sat = Satrec()
+        sat.sgp4init(WGS72, 'i', 90000 + k, epoch_days, 1e-5, 0.0, 0.0, ecc[k],
+                     rng.uniform(0, 2 * np.pi), incl[k], rng.uniform(0, 2 * np.pi),
+                     no_kozai[k], rng.uniform(0, 2 * np.pi))
+        names.append(f'SYN{90000 + k}')
+        sats.append(sat)
+    return names, sats
+
+
+def altitude_bands(sats):
+    """Радиусы перигея и апогея (км) по элементам TLE"""
+    radius = np.array([s.radiusearthkm for s in sats])
+    a = np.array([s.a for s in sats]) * radius
+    e = np.array([s.ecco for s in sats])
+    return a * (1 - e), a * (1 + e)
+
+
+def overlapping(perigee, apogee, margin):
+    """
+    Признак: интервал [перигей, апогей] спутника пересекается (с запасом
+    margin) хотя бы с одним другим. O(N log N) через сортировку границ.
+    """
+    lo, hi = perigee - margin, apogee + margin
+    lo_sorted, hi_sorted = np.sort(lo), np.sort(hi)
+    # Число интервалов j с lo_j <= hi_i и hi_j >= lo_i, включая сам i
+    count = np.searchsorted(lo_sorted, hi, side='right') - np.searchsorted(hi_sorted, lo, side='left')
+    return count > 1
+
+
+def _time_grid(start, hours, step):
+    """Сетка моментов: юлианские даты (целая и дробная части)"""
+    from sgp4.api import jday
+
+    jd0, fr0 = jday(start.year, start.month, start.day, start.hour, start.minute,
+                    start.second + start.microsecond * 1e-6)
+    n = int(hours * 3600 // step) + 1
+    fr = fr0 + np.arange(n) * step / 86400
+    return np.full(n, jd0), fr
+
+
+@profiled('screen')
+def screen(sats, start, hours=24.0, step=60.0, threshold=10.0, names=None, time_chunk=256):
+    """
+    Сближения ближе threshold (км) на интервале hours часов от start (datetime
+    UTC) с шагом сетки step (с). Возвращает список Conjunction, упорядоченный
+    по расстоянию; моменты - юлианские даты.
+    """
+    from scipy.spatial import cKDTree
+    from sgp4.api import SatrecArray
+
+    names = names or [str(s.satnum) for s in sats]
+    perigee, apogee = altitude_bands(sats)
+    keep = np.flatnonzero(overlapping(perigee, apogee, threshold))
+    if len(keep) < 2:
+        return []
+    array = SatrecArray([sats[k] for k in keep])
+    jd, fr = _time_grid(start, hours, step)
+    # Относительное ускорение не больше 2·μ/r²_min; отклонение за step - a·step²/2
+    curve = 0.5 * 2 * MU_EARTH / max(perigee[keep].min(), 6378.0)**2 * step**2
+
+    found = []     # (i, j, шаг, расстояние) в номерах keep
+    for t0 in range(0, len(jd), time_chunk):
+        with stage('sgp4'):
+            err, r, v = array.sgp4(jd[t0:t0 + time_chunk], fr[t0:t0 + time_chunk])
+        r[err != 0] = np.nan
+        # Запас на сближение между узлами сетки: |v_отн|·step/2 <= v_max·step
+        pad = np.nanmax(np.linalg.norm(v, axis=2)) * step
+        with stage('kdtree'):
+            for k in range(r.shape[1]):
+                valid = np.flatnonzero(np.isfinite(r[:, k, 0]))
+                pairs = cKDTree(r[valid, k]).query_pairs(threshold + pad, output_type='ndarray')
+                if not len(pairs):
+                    continue
+                i, j = valid[pairs[:, 0]], valid[pairs[:, 1]]
+                # Прямолинейное сближение в пределах ±step от узла; запас curve -
+                # отклонение от прямой за счёт относительного ускорения
+                dr, dv = r[i, k] - r[j, k], v[i, k] - v[j, k]
+                tau = np.clip(-np.sum(dr * dv, axis=1) / np.sum(dv**2, axis=1), -step, step)
+                d = np.linalg.norm(dr + dv * tau[:, None], axis=1)
+                near = d <= threshold + curve
+                found.append(np.column_stack([np.minimum(i, j)[near], np.maximum(i, j)[near],
+                                              np.full(near.sum(), t0 + k), d[near]]))
+    if not found:
+        return []
+    found = np.concatenate(found)
+    i, j, k, d = found[:, 0].astype(int), found[:, 1].astype(int), found[:, 2].astype(int), found[:, 3]
+
+    # Пары, которые не могут сблизиться по высотам, отбрасываются
+    ok = (perigee[keep[i]] - threshold <= apogee[keep[j]]) & (perigee[keep[j]] - threshold <= apogee[keep[i]])
+    i, j, k, d = i[ok], j[ok], k[ok], d[ok]
+
+    # Встречи: подряд идущие шаги одной пары; от каждой - шаг с минимумом
+    order = np.lexsort((k, j, i))
+    i, j, k, d = i[order], j[order], k[order], d[order]
+    new = np.ones(len(i), dtype=bool)
+    new[1:] = (i[1:] != i[:-1]) | (j[1:] != j[:-1]) | (k[1:] != k[:-1] + 1)
+    encounter = np.cumsum(new) - 1
+    by_dist = np.lexsort((d, encounter))
+    first = np.ones(len(by_dist), dtype=bool)
+    first[1:] = encounter[by_dist][1:] != encounter[by_dist][:-1]
+    best = by_dist[first]
+
+    with stage('refine'):
+        pi, pj = keep[i[best]], keep[j[best]]
+        jd_tca, miss, speed = refine_many(sats, pi, pj, jd[k[best]], fr[k[best]], step)
+        results = []
+        accepted = {}      # (i, j) -> моменты уже принятых сближений пары
+        for n in np.argsort(miss):
+            if not miss[n] <= threshold:
+                break
+            pair = (int(pi[n]), int(pj[n]))
+            tcas = accepted.setdefault(pair, [])
+            if any(abs(t - jd_tca[n]) * 86400 < step for t in tcas):
+                continue
+            tcas.append(jd_tca[n])
+            results.append(Conjunction(pair[0], pair[1], names[pair[0]], names[pair[1]],
+                                       float(jd_tca[n]), float(miss[n]), float(speed[n])))
+    return results
+
+
+def refine_many(sats, pi, pj, jd, fr, step, n_grid=41):
+    """
+    Моменты наибольшего сближения пар (sats[pi], sats[pj]) около узлов сетки
+    (jd, fr) в пределах ±step: сетка из n_grid точек и парабола по трём
+    ближайшим к минимуму квадратам расстояний (при почти прямолинейном
+    относительном движении квадрат расстояния - парабола по времени).
+
+    Кандидаты с общим узлом считаются вместе: SatrecArray из их спутников
+    и два вызова sgp4 - сетка смещений и найденные моменты.
+    Возвращает массивы (юлианская дата, расстояние км, относительная скорость км/с).
+    """
+    from sgp4.api import SatrecArray
+
+    pi, pj = np.asarray(pi), np.asarray(pj)
+    jd, fr = np.asarray(jd, dtype=float), np.asarray(fr, dtype=float)
+    n = len(pi)
+    jd_tca, miss, speed = np.empty(n), np.full(n, np.nan), np.full(n, np.nan)
+    offsets = np.linspace(-step, step, n_grid)
+    h = offsets[1] - offsets[0]
+    nodes, node_of = np.unique(np.column_stack([jd, fr]), axis=0, return_inverse=True)
+    node_of = node_of.ravel()
+    order = np.argsort(node_of, kind='stable')
+    bounds = np.searchsorted(node_of[order], np.arange(len(nodes) + 1))
+    for g, (jd0, fr0) in enumerate(nodes):
+        idx = order[bounds[g]:bounds[g + 1]]
+        m = len(idx)
+        members, inv = np.unique(np.concatenate([pi[idx], pj[idx]]), return_inverse=True)
+        a, b = inv[:m], inv[m:]
+        array = SatrecArray([sats[x] for x in members])
+        err, r, _ = array.sgp4(np.full(n_grid, jd0), fr0 + offsets / 86400)
+        r[err != 0] = np.nan
+        dist2 = np.sum((r[a] - r[b])**2, axis=2)                 # (кандидаты, n_grid)
+        best = np.clip(np.argmin(np.where(np.isnan(dist2), np.inf, dist2), axis=1), 1, n_grid - 2)
+        rows = np.arange(m)
+        d0, d1, d2 = dist2[rows, best - 1], dist2[rows, best], dist2[rows, best + 1]
+        denom = d0 - 2 * d1 + d2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            shift = np.where(denom > 0, 0.5 * h * (d0 - d2) / denom, 0.0)
+        t_best = offsets[best] + np.clip(np.nan_to_num(shift), -h, h)
+        err, r, v = array.sgp4(np.full(m, jd0), fr0 + t_best / 86400)
+        r[err != 0] = np.nan
+        jd_tca[idx] = jd0 + fr0 + t_best / 86400
+        miss[idx] = np.linalg.norm(r[a, rows] - r[b, rows], axis=1)
+        speed[idx] = np.linalg.norm(v[a, rows] - v[b, rows], axis=1)
+    return jd_tca, miss, speed
+
+
+def refine_tca(si, sj, jd, fr, step, n_grid=41):
+    """
+    Момент наибольшего сближения одной пары около узла сетки (jd, fr)
+    (см. refine_many). Возвращает (юлианская дата, расстояние км,
+    относительная скорость км/с).
+    """
+    jd_tca, miss, speed = refine_many([si, sj], [0], [1], [jd], [fr], step, n_grid)
+    return float(jd_tca[0]), float(miss[0]), float(speed[0])
+
+
+def _iso(jd):
+    """Юлианская дата -> строка UTC"""
+    moment = datetime(2000, 1, 1, 12, tzinfo=timezone.utc) + timedelta(days=jd - 2451545.0)
+    return moment.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+
+@profiled('plot')
+def plot_conjunctions(conjunctions):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    jd0 = min(c.jd for c in conjunctions)
+    ax.scatter([(c.jd - jd0) * 24 for c in conjunctions], [c.miss_km for c in conjunctions],
+               c=[c.speed_km_s for c in conjunctions], cmap='plasma')
+    ax.set_xlabel('Время от первого сближения, ч')
+    ax.set_ylabel('Расстояние, км')
+    ax.set_title(f'Тесные сближения: {len(conjunctions)}')
+    ax.grid(True, alpha=0.3)
+    plt.show()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Поиск тесных сближений по каталогу TLE")
+    parser.add_argument('catalog', nargs='?', help="файл TLE")
+    parser.add_argument('--synthetic', type=int, default=2000,
+                        help="размер случайного каталога, если файл не задан")
+    parser.add_argument('--start', default='2026-01-01T00:00', help="начало, UTC (ISO)")
+    parser.add_argument('--hours', type=float, default=24.0, help="длительность, ч")
+    parser.add_argument('--step', type=float, default=60.0, help="шаг сетки, с")
+    parser.add_argument('--threshold', type=float, default=10.0, help="порог сближения, км")
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    start = datetime.fromisoformat(args.start).replace(tzinfo=timezone.utc)
+    if args.catalog:
+        names, sats = read_tle(args.catalog)
+    else:
+        names, sats = synthetic_catalog(args.synthetic, start)
+    conjunctions = screen(sats, start, args.hours, args.step, args.threshold, names)
+
+    records = [{'sat1': c.name_i, 'sat2': c.name_j, 'tca': _iso(c.jd), 'miss_km': c.miss_km,
+                'speed_km_s': c.speed_km_s} for c in conjunctions]
+    if args.no_plot:
+        write_result(records, args.format, args.output)
+        return 0
+    print(f"Спутников: {len(sats)}, сближений ближе {args.threshold} км: {len(records)}")
+    for rec in records[:20]:
+        print(f"{rec['tca']}  {rec['sat1']:>10s} - {rec['sat2']:<10s} "
+              f"{rec['miss_km']:8.3f} км  {rec['speed_km_s']:6.2f} км/с")
+    if conjunctions:
+        plot_conjunctions(conjunctions)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
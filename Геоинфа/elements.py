@@ -0,0 +1,101 @@
+"""
+Пересчёт кеплеровых элементов (a, e, i, Ω, ω, ν) в вектор состояния (r, v)
+и обратно для массивов тел сразу.
+
+Все функции принимают массивы одинаковой (согласуемой) формы; углы - в
+радианах. Поворот из перифокальной системы в инерциальную - стопка матриц
+Rz(Ω)·Rx(i)·Rz(ω) формы (..., 3, 3).
+
+Вырожденные случаи при обратном пересчёте:
+    экваториальная орбита (i = 0 или π) - Ω = 0, ω отсчитывается от оси x;
+    круговая орбита (e = 0) - ω = 0, ν - аргумент широты (от узла);
+    круговая экваториальная - ν - истинная долгота (от оси x).
+С этими соглашениями прямой пересчёт восстанавливает исходный (r, v).
+"""
+from collections import namedtuple
+import numpy as np
+
+MU_SUN = 1.32712440018e20
+
+Elements = namedtuple('Elements', 'a e i raan argp nu')
+
+
+def rotation_matrices(i, raan, argp):
+    """Матрицы перехода из перифокальной системы в инерциальную, форма (..., 3, 3)"""
+    i, raan, argp = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (i, raan, argp)))
+    ci, si = np.cos(i), np.sin(i)
+    cO, sO = np.cos(raan), np.sin(raan)
+    cw, sw = np.cos(argp), np.sin(argp)
+    R = np.empty(i.shape + (3, 3))
+    R[..., 0, 0] = cO * cw - sO * sw * ci
+    R[..., 0, 1] = -cO * sw - sO * cw * ci
+    R[..., 0, 2] = sO * si
+    R[..., 1, 0] = sO * cw + cO * sw * ci
+    R[..., 1, 1] = -sO * sw + cO * cw * ci
+    R[..., 1, 2] = -cO * si
+    R[..., 2, 0] = sw * si
+    R[..., 2, 1] = cw * si
+    R[..., 2, 2] = ci
+    return R
+
+
+def elements_to_state(a, e, i, raan, argp, nu, mu=MU_SUN):
+    """
+    Векторы состояния по элементам орбиты. Для гиперболы a < 0.
+    Возвращает r, v формы (..., 3).
+    """
+    a, e, nu = (np.asarray(x, dtype=float) for x in (a, e, nu))
+    p = a * (1 - e**2)                       # фокальный параметр
+    r = p / (1 + e * np.cos(nu))
+    k = np.sqrt(mu / p)
+    zero = np.zeros(np.broadcast_shapes(r.shape, np.shape(i), np.shape(raan), np.shape(argp)))
+    r_pf = np.stack([r * np.cos(nu) + zero, r * np.sin(nu) + zero, zero], axis=-1)
+    v_pf = np.stack([-k * np.sin(nu) + zero, k * (e + np.cos(nu)) + zero, zero], axis=-1)
+    R = rotation_matrices(i, raan, argp)
+    return np.einsum('...ij,...j->...i', R, r_pf), np.einsum('...ij,...j->...i', R, v_pf)
+
+
+def _signed_angle(u, w, axis):
+    """Угол от u до w (единичные векторы) против часовой стрелки вокруг axis, [0, 2π)"""
+    cross = np.cross(u, w)
+    angle = np.arctan2(np.sum(cross * axis, axis=-1), np.sum(u * w, axis=-1))
+    return np.mod(angle, 2 * np.pi)
+
+
+def state_to_elements(r, v, mu=MU_SUN, tol=1e-10):
+    """
+    Элементы орбиты по векторам состояния r, v формы (..., 3).
+    tol - порог для экваториальных и круговых орбит (относительно |h| и e).
+    """
+    r = np.asarray(r, dtype=float)
+    v = np.asarray(v, dtype=float)
+    r, v = np.broadcast_arrays(r, v)
+    r_norm = np.linalg.norm(r, axis=-1)
+    v2 = np.sum(v**2, axis=-1)
+    rv = np.sum(r * v, axis=-1)
+
+    h = np.cross(r, v)
+    h_norm = np.linalg.norm(h, axis=-1)
+    h_hat = h / h_norm[..., None]
+    node = np.stack([-h[..., 1], h[..., 0], np.zeros_like(h_norm)], axis=-1)   # z × h
+    node_norm = np.linalg.norm(node, axis=-1)
+    e_vec = ((v2 - mu / r_norm)[..., None] * r - rv[..., None] * v) / mu
+    e = np.linalg.norm(e_vec, axis=-1)
+
+    a = 1 / (2 / r_norm - v2 / mu)
+    i = np.arccos(np.clip(h[..., 2] / h_norm, -1, 1))
+
+    equatorial = node_norm < tol * h_norm
+    circular = e < tol
+    # Опорное направление узла: линия узлов или ось x для экваториальных орбит
+    x_axis = np.broadcast_to([1.0, 0.0, 0.0], node.shape)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        n_hat = np.where(equatorial[..., None], x_axis, node / node_norm[..., None])
+        e_hat = np.where(circular[..., None], n_hat, e_vec / e[..., None])
+    r_hat = r / r_norm[..., None]
+
+    raan = np.where(equatorial, 0.0, np.mod(np.arctan2(node[..., 1], node[..., 0]), 2 * np.pi))[()]
+    argp = np.where(circular, 0.0, _signed_angle(n_hat, e_hat, h_hat))[()]
+    # Для круговой орбиты e_hat совпадает с направлением узла
+    nu = _signed_angle(e_hat, r_hat, h_hat)
+    return Elements(a, e, i, raan, argp, nu)
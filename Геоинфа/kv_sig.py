@@ -1,5 +1,25 @@
 import numpy as np
 import matplotlib.pyplot as plt
+import os
+import sys
+
+# Подключение общих модулей из корня репозитория
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from labkit import lod
+
+
+def square_wave(t, T_period, A):
+    """Меандр: +1 на первой половине каждого периода, -1 на второй"""
+    return A * ( (t % T_period) < (T_period/2) ) * 2 - 1  # приводит к значениям +1 и -1
+
+
+def reconstruct(fft_vals, K):
+    """Восстановление сигнала по первым K положительным частотам и соответствующим отрицательным"""
+    N = len(fft_vals)
+    fft_trunc = fft_vals.copy()
+    fft_trunc[K:N-K] = 0
+    return np.fft.ifft(fft_trunc).real
+
 
 # Параметры сигнала
 f = 1.0                 # частота 1 Гц
@@ -15,7 +35,7 @@ t = np.linspace(0, T_total, N_total, endpoint=False)
 dt = t[1] - t[0]
 
 # Генерируем меандр: +1 на первой половине каждого периода, -1 на второй
-signal = A * ( (t % T_period) < (T_period/2) ) * 2 - 1  # приводит к значениям +1 и -1
+signal = square_wave(t, T_period, A)
 
 # Вычисляем ДПФ
 fft_vals = np.fft.fft(signal)
@@ -29,7 +49,7 @@ plt.figure(figsize=(14, 12))
 
 # 1. Сигнал
 plt.subplot(3, 2, 1)
-plt.plot(t, signal, 'b-', linewidth=1)
+lod.plot(plt.gca(), t, signal, 'b-', linewidth=1)
 plt.title(f'Периодический прямоугольный сигнал (меандр) {n_periods} периодов')
 plt.xlabel('Время, с')
 plt.ylabel('Амплитуда')
@@ -49,14 +69,12 @@ plt.xlim(0, 20)
 # Восстановление по первым гармоникам
 K_list = [1, 3, 5, 15]  # количество сохраняемых положительных гармоник
 for idx, K in enumerate(K_list):
-    fft_trunc = fft_vals.copy()
     # Оставляем только первые K положительных частот и соответствующие отрицательные
-    fft_trunc[K:N_total-K] = 0
-    recon = np.fft.ifft(fft_trunc).real
+    recon = reconstruct(fft_vals, K)
     
     plt.subplot(3, 2, 3 + idx)
-    plt.plot(t, signal, 'k--', linewidth=1, alpha=0.5, label='Исходный')
-    plt.plot(t, recon, 'r', linewidth=1.5, label=f'{K} гармоник')
+    lod.plot(plt.gca(), t, signal, 'k--', linewidth=1, alpha=0.5, label='Исходный')
+    lod.plot(plt.gca(), t, recon, 'r', linewidth=1.5, label=f'{K} гармоник')
     plt.title(f'Восстановление по первым {K} гармоникам')
     plt.xlabel('Время, с')
     plt.ylabel('Амплитуда')
@@ -0,0 +1,297 @@
+"""
+Задача Ламберта и диаграммы «свиная отбивная» (porkchop) для перелётов
+между телами, заданными OrbitalSimulator.
+
+Решатель - универсальные переменные с функциями Штумпфа; итерации Ньютона
+с защитной вилкой выполняются сразу для всего массива задач. Сетка
+дата старта × время перелёта (до 10^6 ячеек) делится на блоки строк,
+которые считаются в пуле процессов.
+
+Запуск:
+    python lambert.py [--n-dep 1000 --n-tof 1000] [--jobs N] [--no-plot]
+    python lambert.py --check
+"""
+import argparse
+import os
+import sys
+from collections import namedtuple
+import numpy as np
+
+# Подключение общих модулей из корня репозитория
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from labkit.cli import add_output_arguments, write_result
+from labkit.parallel import process_pool, chunk_sizes
+from labkit.profiling import profiled
+
+from m import OrbitalSimulator
+
+DAY = 86400.0
+
+LambertSolution = namedtuple('LambertSolution', 'v1 v2 converged n_iter')
+Porkchop = namedtuple('Porkchop', 't_dep tof dv_dep dv_arr dv_total c3 v_inf_arr')
+
+
+def stumpff_c(z):
+    """C(z) = (1 - cos√z)/z с рядом Тейлора около нуля"""
+    z = np.asarray(z, dtype=float)
+    out = np.empty_like(z)
+    pos, neg = z > 1e-6, z < -1e-6
+    small = ~(pos | neg)
+    sz = np.sqrt(z[pos])
+    out[pos] = (1 - np.cos(sz)) / z[pos]
+    sz = np.sqrt(-z[neg])
+    out[neg] = (np.cosh(sz) - 1) / -z[neg]
+    out[small] = 1 / 2 - z[small] / 24 + z[small]**2 / 720
+    return out
+
+
+def stumpff_s(z):
+    """S(z) = (√z - sin√z)/√z³ с рядом Тейлора около нуля"""
+    z = np.asarray(z, dtype=float)
+    out = np.empty_like(z)
+    pos, neg = z > 1e-6, z < -1e-6
+    small = ~(pos | neg)
+    sz = np.sqrt(z[pos])
+    out[pos] = (sz - np.sin(sz)) / sz**3
+    sz = np.sqrt(-z[neg])
+    out[neg] = (np.sinh(sz) - sz) / sz**3
+    out[small] = 1 / 6 - z[small] / 120 + z[small]**2 / 5040
+    return out
+
+
+@profiled('lambert')
+def lambert(r1, r2, tof, mu=1.32712440018e20, prograde=True, tol=1e-10, max_iter=60):
+    """
+    Задача Ламберта без полных оборотов для массивов задач.
+
+    r1, r2 - радиус-векторы формы (..., 3), tof - время перелёта (с),
+    форма которого согласуется с r1[..., 0]. Направление перелёта
+    (prograde - против часовой стрелки вокруг оси z) определяет выбор
+    короткой или длинной дуги. Возвращает LambertSolution: скорости v1, v2
+    формы (..., 3), признак сходимости и число итераций. Для вырожденных
+    перелётов (угол 0 или π) скорости - NaN.
+    """
+    r1 = np.asarray(r1, dtype=float)
+    r2 = np.asarray(r2, dtype=float)
+    shape = np.broadcast_shapes(r1.shape[:-1], r2.shape[:-1], np.shape(tof))
+    r1 = np.broadcast_to(r1, shape + (3,)).reshape(-1, 3)
+    r2 = np.broadcast_to(r2, shape + (3,)).reshape(-1, 3)
+    t = np.broadcast_to(np.asarray(tof, dtype=float), shape).ravel()
+
+    n1 = np.linalg.norm(r1, axis=1)
+    n2 = np.linalg.norm(r2, axis=1)
+    cos_dnu = np.clip(np.einsum('ij,ij->i', r1, r2) / (n1 * n2), -1, 1)
+    cross_z = r1[:, 0] * r2[:, 1] - r1[:, 1] * r2[:, 0]
+    dnu = np.arccos(cos_dnu)
+    long_way = cross_z < 0 if prograde else cross_z >= 0
+    dnu = np.where(long_way, 2 * np.pi - dnu, dnu)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        A = np.sin(dnu) * np.sqrt(n1 * n2 / (1 - cos_dnu))
+    valid = np.isfinite(A) & (np.abs(np.sin(dnu)) > 1e-9) & (t > 0)
+    A = np.where(valid, A, 1.0)
+    sqrt_mu_t = np.sqrt(mu) * t
+
+    def y_of(z, C, S):
+        return n1 + n2 + A * (z * S - 1) / np.sqrt(C)
+
+    def F_of(z):
+        """Невязка уравнения времени; при y < 0 решение лежит правее (F = -inf)"""
+        C, S = stumpff_c(z), stumpff_s(z)
+        y = y_of(z, C, S)
+        neg_y = y < 0
+        y_pos = np.where(neg_y, 1.0, y)
+        F = (y_pos / C)**1.5 * S + A * np.sqrt(y_pos) - sqrt_mu_t
+        return np.where(neg_y, -np.inf, F), y_pos, C, S
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        # Вилка по z: сверху - почти полный оборот (z < 4π²), снизу - гиперболы;
+        # для коротких перелётов по длинной дуге нижняя граница сдвигается
+        # вниз, пока F(lo) не станет отрицательной
+        lo = np.full_like(t, -4 * np.pi**2)
+        hi = np.full_like(t, 4 * np.pi**2 * (1 - 1e-9))
+        for _ in range(12):
+            up = valid & ~(F_of(lo)[0] < 0)
+            if not np.any(up):
+                break
+            lo = np.where(up, 2 * lo, lo)
+        z = np.zeros_like(t)
+        done = ~valid
+        n_iter = 0
+        for n_iter in range(1, max_iter + 1):
+            F, y_pos, C, S = F_of(z)
+            # Сходимость - по невязке: остановка у края вилки ею не считается
+            done |= np.abs(F) < tol * sqrt_mu_t
+            if np.all(done):
+                break
+            lo = np.where(F < 0, z, lo)
+            hi = np.where(F > 0, z, hi)
+            dF = np.where(
+                np.abs(z) > 1e-6,
+                (y_pos / C)**1.5 * ((C - 1.5 * S / C) / (2 * z) + 0.75 * S**2 / C)
+                + A / 8 * (3 * S / C * np.sqrt(y_pos) + A * np.sqrt(C / y_pos)),
+                np.sqrt(2) / 40 * y_pos**1.5 + A / 8 * (np.sqrt(y_pos) + A / np.sqrt(2 * y_pos)))
+            z_new = z - F / dF
+            outside = ~np.isfinite(z_new) | (z_new <= lo) | (z_new >= hi)
+            z_new = np.where(outside, (lo + hi) / 2, z_new)
+            z = np.where(done, z, z_new)
+
+        C, S = stumpff_c(z), stumpff_s(z)
+        y = y_of(z, C, S)
+        f = 1 - y / n1
+        g = A * np.sqrt(y / mu)
+        g_dot = 1 - y / n2
+        v1 = (r2 - f[:, None] * r1) / g[:, None]
+        v2 = (g_dot[:, None] * r2 - r1) / g[:, None]
+    v1[~valid] = np.nan
+    v2[~valid] = np.nan
+    converged = done & valid
+    return LambertSolution(v1.reshape(shape + (3,)), v2.reshape(shape + (3,)),
+                           converged.reshape(shape), n_iter)
+
+
+def _porkchop_rows(departure, arrival, t_dep, tof, t_peri_dep, t_peri_arr, prograde):
+    """Блок строк диаграммы: все времена перелёта для части дат старта"""
+    T_dep, TOF = np.meshgrid(t_dep, tof, indexing='ij')
+    r1, v_dep = departure.state_at(T_dep, t_peri_dep)
+    r2, v_arr = arrival.state_at(T_dep + TOF, t_peri_arr)
+    sol = lambert(r1, r2, TOF, mu=departure.mu, prograde=prograde)
+    v_inf_dep = np.linalg.norm(sol.v1 - v_dep, axis=-1)
+    v_inf_arr = np.linalg.norm(sol.v2 - v_arr, axis=-1)
+    return v_inf_dep, v_inf_arr
+
+
+@profiled('porkchop')
+def porkchop(departure, arrival, t_dep, tof, t_peri_dep=0.0, t_peri_arr=0.0,
+             prograde=True, workers=None, chunk_size=2**16):
+    """
+    Диаграмма перелёта departure -> arrival (объекты OrbitalSimulator) по
+    сетке дат старта t_dep × времён перелёта tof (секунды, одномерные массивы).
+    t_peri_* - моменты прохождения перигелия телами, задающие их фазы.
+
+    Сетка делится на блоки примерно по chunk_size ячеек (целыми строками);
+    при workers > 1 блоки считаются в пуле процессов. Δv - гиперболические
+    избытки скорости относительно тел (без учёта гравитации планет),
+    в м/с; C3 = v∞² при старте.
+    """
+    t_dep = np.asarray(t_dep, dtype=float)
+    tof = np.asarray(tof, dtype=float)
+    rows = max(1, chunk_size // max(1, len(tof)))
+    sizes = chunk_sizes(len(t_dep), rows)
+    bounds = np.concatenate([[0], np.cumsum(sizes)])
+    args = [(departure, arrival, t_dep[i0:i1], tof, t_peri_dep, t_peri_arr, prograde)
+            for i0, i1 in zip(bounds[:-1], bounds[1:])]
+
+    if workers == 1 or len(args) == 1:
+        parts = [_porkchop_rows(*a) for a in args]
+    else:
+        with process_pool(workers) as pool:
+            parts = list(pool.map(_porkchop_rows, *zip(*args)))
+
+    dv_dep = np.concatenate([p[0] for p in parts])
+    dv_arr = np.concatenate([p[1] for p in parts])
+    return Porkchop(t_dep, tof, dv_dep, dv_arr, dv_dep + dv_arr, dv_dep**2, dv_arr)
+
+
+def best_transfer(pc):
+    """Ячейка с минимальным суммарным Δv: (t_dep, tof, dv_dep, dv_arr, dv_total)"""
+    i, j = np.unravel_index(np.nanargmin(pc.dv_total), pc.dv_total.shape)
+    return pc.t_dep[i], pc.tof[j], pc.dv_dep[i, j], pc.dv_arr[i, j], pc.dv_total[i, j]
+
+
+@profiled('plot')
+def plot_porkchop(pc, levels=None, title=None):
+    """Изолинии суммарного Δv (км/с) в осях дата старта (сут) - время перелёта (сут)"""
+    import matplotlib.pyplot as plt
+
+    dv = pc.dv_total / 1e3
+    if levels is None:
+        vmin = np.nanmin(dv)
+        levels = np.linspace(vmin, vmin + 10, 21)
+    fig, ax = plt.subplots(figsize=(10, 8))
+    cs = ax.contourf(pc.t_dep / DAY, pc.tof / DAY, dv.T, levels=levels, cmap='viridis_r', extend='max')
+    ax.contour(pc.t_dep / DAY, pc.tof / DAY, dv.T, levels=levels, colors='k', linewidths=0.3)
+    fig.colorbar(cs, ax=ax, label='Суммарный Δv, км/с')
+    t, tof, _, _, total = best_transfer(pc)
+    ax.plot(t / DAY, tof / DAY, 'r*', markersize=12, label=f'минимум {total / 1e3:.2f} км/с')
+    ax.set_xlabel('Дата старта, сут')
+    ax.set_ylabel('Время перелёта, сут')
+    ax.set_title(title or 'Диаграмма перелёта')
+    ax.legend()
+    plt.show()
+
+
+def check(mu=1.32712440018e20, rtol=1e-6):
+    """
+    Контрольные задачи: скорость v1 интегрируется на время перелёта, конец
+    траектории должен попасть в r2. В наборе - короткие гиперболические
+    перелёты по длинной дуге (Δν = 307°), для которых мала исходная вилка.
+    Возвращает список (Δν, tof в сутках, относительный промах, converged).
+    """
+    from scipy.integrate import solve_ivp
+
+    au = 1.496e11
+    cases = [(dnu, tof) for dnu in (75.0, 180.5, 307.0) for tof in (9.0, 30.0, 200.0)]
+    out = []
+    for dnu, tof in cases:
+        r1 = np.array([au, 0.0, 0.0])
+        r2 = 1.524 * au * np.array([np.cos(np.radians(dnu)), np.sin(np.radians(dnu)), 0.0])
+        sol = lambert(r1, r2, tof * DAY, mu=mu)
+
+        def rhs(_, s):
+            return np.concatenate([s[3:], -mu * s[:3] / np.linalg.norm(s[:3])**3])
+
+        end = solve_ivp(rhs, (0, tof * DAY), np.concatenate([r1, sol.v1]),
+                        method='DOP853', rtol=1e-11, atol=1e-3).y[:3, -1]
+        miss = np.linalg.norm(end - r2) / np.linalg.norm(r2)
+        out.append((dnu, tof, float(miss), bool(sol.converged)))
+        if not (sol.converged and miss < rtol):
+            raise AssertionError(f"Ламберт: Δν = {dnu}°, tof = {tof} сут - промах {miss:.2e}, "
+                                 f"converged = {bool(sol.converged)}")
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Диаграмма перелёта Земля - Марс по задаче Ламберта")
+    parser.add_argument('--n-dep', type=int, default=1000, help="число дат старта")
+    parser.add_argument('--n-tof', type=int, default=1000, help="число времён перелёта")
+    parser.add_argument('--dep-span', type=float, default=800, help="интервал дат старта, сут")
+    parser.add_argument('--tof-min', type=float, default=100, help="минимальное время перелёта, сут")
+    parser.add_argument('--tof-max', type=float, default=500, help="максимальное время перелёта, сут")
+    parser.add_argument('--mars-phase', type=float, default=0.0,
+                        help="момент прохождения перигелия Марсом относительно Земли, сут")
+    parser.add_argument('--jobs', type=int, default=None, help="число процессов")
+    parser.add_argument('--check', action='store_true',
+                        help="проверка решателя интегрированием контрольных перелётов")
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.check:
+        for dnu, tof, miss, converged in check():
+            print(f"Δν = {dnu:5.1f}°, перелёт {tof:5.1f} сут: промах {miss:.1e}, сходимость {converged}")
+        return 0
+
+    earth = OrbitalSimulator(1.496e11, eccentricity=0.0167, body_name="Земля", verbose=False)
+    mars = OrbitalSimulator(2.279e11, eccentricity=0.0934, body_name="Марс", verbose=False)
+    t_dep = np.linspace(0, args.dep_span * DAY, args.n_dep)
+    tof = np.linspace(args.tof_min * DAY, args.tof_max * DAY, args.n_tof)
+    pc = porkchop(earth, mars, t_dep, tof, t_peri_arr=args.mars_phase * DAY, workers=args.jobs)
+    t, tof_best, dv_dep, dv_arr, total = best_transfer(pc)
+
+    if args.no_plot:
+        best = {'t_dep_days': t / DAY, 'tof_days': tof_best / DAY, 'dv_dep': dv_dep,
+                'dv_arr': dv_arr, 'dv_total': total}
+        if args.format == 'csv':
+            write_result([best], 'csv', args.output)
+        else:
+            write_result({'best': best, 't_dep_days': pc.t_dep / DAY, 'tof_days': pc.tof / DAY,
+                          'dv_total': pc.dv_total}, 'json', args.output)
+        return 0
+
+    print(f"Минимальный Δv = {total / 1e3:.3f} км/с (старт {dv_dep / 1e3:.3f}, "
+          f"прибытие {dv_arr / 1e3:.3f}): старт на {t / DAY:.1f} сут, перелёт {tof_best / DAY:.1f} сут")
+    plot_porkchop(pc, title='Земля - Марс')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,11 +1,82 @@
+import argparse
+from collections import namedtuple
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
-from scipy.integrate import solve_ivp
+import os
+import sys
+
+# Подключение общих модулей из корня репозитория
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from labkit.cli import add_output_arguments, write_result
+from labkit.profiling import profiled, stage
+
+from elements import elements_to_state
+
+# matplotlib и scipy импортируются внутри методов: расчёт без графиков
+# (--no-plot) не тратит время на их загрузку
+
+# Блок траектории из потокового интегрирования (OrbitalSimulator.propagate)
+TrajectoryBlock = namedtuple('TrajectoryBlock', 't r v')
+
+
+def solve_kepler(M, e, tol=1e-12, max_iter=50):
+    """
+    Эксцентрическая аномалия E из уравнения Кеплера M = E - e*sin(E)
+    методом Ньютона сразу для массива средних аномалий M (e < 1).
+    """
+    M = np.asarray(M, dtype=float)
+    # Начальное приближение Дэнби: сходится при любых M и e < 1
+    E = M + 0.85 * e * np.sign(np.sin(M))
+    for _ in range(max_iter):
+        delta = (E - e * np.sin(E) - M) / (1 - e * np.cos(E))
+        E = E - delta
+        if np.all(np.abs(delta) < tol):
+            break
+    return E
+
+
+SAMPLINGS = ('time', 'eccentric', 'true')
+
+
+def sample_times(t_span, period, e, n_points, sampling='time'):
+    """
+    Моменты вывода на отрезке [0, t_span] для орбиты с перигелием в t = 0.
+
+    'time'      - равномерно по времени;
+    'eccentric' - равномерно по эксцентрической аномалии: шаг по дуге
+                  почти постоянен, у перигелия точек больше;
+    'true'      - равномерно по истинной аномалии: равный угол поворота
+                  между точками, сгущение у перигелия сильнее всего.
+    При e = 0.9 одинаковая точность графиков у перигелия достигается на
+    порядок меньшим числом точек, чем при равномерной по времени выборке.
+    """
+    if sampling not in SAMPLINGS:
+        raise ValueError(f"Неизвестная выборка: {sampling}; допустимы {', '.join(SAMPLINGS)}")
+    if sampling == 'time' or e == 0:
+        return np.linspace(0, t_span, n_points)
+    # Конечная эксцентрическая аномалия с учётом полных оборотов
+    M_end = 2 * np.pi * t_span / period
+    turns = np.floor(M_end / (2 * np.pi))
+    E_end = 2 * np.pi * turns + solve_kepler(M_end - 2 * np.pi * turns, e)
+    if sampling == 'eccentric':
+        E = np.linspace(0, E_end, n_points)
+    else:
+        nu_red = np.mod(E_end, 2 * np.pi)
+        nu_end = 2 * np.pi * np.floor(E_end / (2 * np.pi)) + \
+            2 * np.arctan2(np.sqrt(1 + e) * np.sin(nu_red / 2), np.sqrt(1 - e) * np.cos(nu_red / 2))
+        nu = np.linspace(0, nu_end, n_points)
+        nu_turns = np.floor(nu / (2 * np.pi))
+        half = np.mod(nu, 2 * np.pi) / 2
+        E = 2 * np.pi * nu_turns + \
+            2 * np.arctan2(np.sqrt(1 - e) * np.sin(half), np.sqrt(1 + e) * np.cos(half))
+    t = (E - e * np.sin(E)) * period / (2 * np.pi)
+    t[0], t[-1] = 0.0, t_span
+    return t
+
 
 class OrbitalSimulator:
     def __init__(self, semi_major_axis, initial_velocity=None, eccentricity=None, 
-                 body_name="Тело", mu=1.32712440018e20):
+                 body_name="Тело", mu=1.32712440018e20, verbose=True,
+                 inclination=0.0, raan=0.0, arg_periapsis=0.0):
         """
         Инициализация орбитального симулятора
         
@@ -15,8 +86,14 @@ class OrbitalSimulator:
         eccentricity: эксцентриситет орбиты (0-1)
         body_name: название тела
         mu: гравитационный параметр (м³/с²) для Солнца
+        verbose: вывести параметры орбиты
+        inclination, raan, arg_periapsis: наклонение, долгота восходящего узла
+            и аргумент перигелия (рад); по умолчанию орбита в плоскости XY
         """
         self.semi_major_axis = semi_major_axis
+        self.inclination = inclination
+        self.raan = raan
+        self.arg_periapsis = arg_periapsis
         self.mu = mu
         self.body_name = body_name
         
@@ -37,36 +114,38 @@ class OrbitalSimulator:
         # Орбитальные параметры
         self.period = 2 * np.pi * np.sqrt(semi_major_axis**3 / mu)  # Период по 3-му закону Кеплера
         
+        if not verbose:
+            return
         print(f"Параметры орбиты для {body_name}:")
         print(f"  Большая полуось: {semi_major_axis:.3e} м")
         print(f"  Эксцентриситет: {self.eccentricity:.6f}")
         print(f"  Орбитальный период: {self.period/86400:.2f} дней")
         if initial_velocity is not None:
             print(f"  Начальная скорость: {initial_velocity:.2f} м/с")
+        if inclination:
+            print(f"  Наклонение: {np.degrees(inclination):.3f}°")
         
     def orbital_elements_to_state(self, true_anomaly):
-        """Преобразование орбитальных элементов в вектор состояния"""
-        # Параметры орбиты
-        a = self.semi_major_axis
+        """
+        Преобразование орбитальных элементов в вектор состояния; для массива
+        аномалий - векторы формы (..., 3) (см. elements.py)
+        """
+        return elements_to_state(self.semi_major_axis, self.eccentricity, self.inclination,
+                                 self.raan, self.arg_periapsis, true_anomaly, self.mu)
+
+    def state_at(self, t, t_peri=0.0):
+        """
+        Вектор состояния в моменты t (число или массив) по уравнению Кеплера,
+        без численного интегрирования; t_peri - момент прохождения перигелия.
+        Возвращает r, v формы (..., 3).
+        """
         e = self.eccentricity
-        mu = self.mu
-        
-        # Расстояние до фокуса
-        r = a * (1 - e**2) / (1 + e * np.cos(true_anomaly))
-        
-        # Положение в орбитальной плоскости
-        x_orb = r * np.cos(true_anomaly)
-        y_orb = r * np.sin(true_anomaly)
-        
-        # Скорость в орбитальной плоскости
-        h = np.sqrt(mu * a * (1 - e**2))  # Удельный угловой момент
-        v_r = (mu / h) * e * np.sin(true_anomaly)  # Радиальная скорость
-        v_theta = (mu / h) * (1 + e * np.cos(true_anomaly))  # Тангенциальная скорость
-        
-        vx_orb = v_r * np.cos(true_anomaly) - v_theta * np.sin(true_anomaly)
-        vy_orb = v_r * np.sin(true_anomaly) + v_theta * np.cos(true_anomaly)
-        
-        return np.array([x_orb, y_orb, 0]), np.array([vx_orb, vy_orb, 0])
+        # Средняя аномалия приводится к [-π, π), чтобы Ньютон сходился быстро
+        M = np.mod(2 * np.pi * (np.asarray(t, dtype=float) - t_peri) / self.period + np.pi,
+                   2 * np.pi) - np.pi
+        E = solve_kepler(M, e)
+        nu = 2 * np.arctan2(np.sqrt(1 + e) * np.sin(E / 2), np.sqrt(1 - e) * np.cos(E / 2))
+        return self.orbital_elements_to_state(nu)
     
     def equations_of_motion(self, t, y):
         """Уравнения движения для интегрирования"""
@@ -76,43 +155,152 @@ class OrbitalSimulator:
         acceleration = -self.mu * r / r_norm**3
         return np.concatenate([v, acceleration])
     
-    def simulate(self, t_span, n_points=1000):
-        """Моделирование движения с численным интегрированием"""
+    def simulate(self, t_span, n_points=1000, store=None, precision='float64', chunk_points=65536,
+                 sampling='time'):
+        """
+        Моделирование движения с численным интегрированием.
+
+        sampling - расположение точек вывода (см. sample_times): 'time' -
+        равномерно по времени, 'eccentric' и 'true' - равномерно по
+        эксцентрической или истинной аномалии, т.е. сгущаются у перигелия.
+
+        С store (путь к каталогу) траектория пишется на диск блоками по
+        chunk_points точек (см. traj_store.py) и в памяти не накапливается;
+        self.t, self.r, self.v тогда - столбцы хранилища с ленивым чтением.
+        precision='float32' вдвое уменьшает размер r и v на диске.
+        """
+        from scipy.integrate import solve_ivp
+
         # Начальные условия (в перигелии)
         r0, v0 = self.orbital_elements_to_state(0)
         y0 = np.concatenate([r0, v0])
+        t_eval = sample_times(t_span, self.period, self.eccentricity, n_points, sampling)
         
+        if store is not None:
+            return self._simulate_to_store(t_eval, y0, store, precision, chunk_points)
+
         # Интегрирование уравнений движения
-        sol = solve_ivp(
-            self.equations_of_motion,
-            [0, t_span],
-            y0,
-            method='RK45',
-            t_eval=np.linspace(0, t_span, n_points),
-            rtol=1e-9,
-            atol=1e-12
-        )
+        with stage('solve_ivp'):
+            sol = solve_ivp(
+                self.equations_of_motion,
+                [0, t_span],
+                y0,
+                method='RK45',
+                t_eval=t_eval,
+                rtol=1e-9,
+                atol=1e-12
+            )
         
         self.t = sol.t
         self.r = sol.y[:3].T
         self.v = sol.y[3:].T
         
         return self.t, self.r, self.v
-    
+
+    def propagate(self, dt, block_points=4096, t_end=None, rtol=1e-9, atol=1e-12):
+        """
+        Потоковое интегрирование: генератор блоков TrajectoryBlock(t, r, v)
+        по block_points точек с шагом вывода dt, начиная с перигелия.
+
+        Состояние интегратора (шаговый RK45 из scipy) переносится между
+        блоками, поэтому результат совпадает с одним вызовом solve_ivp, а
+        память не зависит от длительности. Без t_end генератор бесконечен;
+        с t_end последний блок может быть короче, а моменты не выходят за t_end
+        (k*dt с ошибкой округления может оказаться чуть больше t_end).
+        """
+        n_total = None if t_end is None else int(np.floor(t_end / dt * (1 + 1e-12))) + 1
+
+        def time_blocks():
+            k = 0   # номер первой точки блока
+            while n_total is None or k < n_total:
+                n = block_points if n_total is None else min(block_points, n_total - k)
+                t = (k + np.arange(n)) * dt
+                yield t if t_end is None else np.minimum(t, t_end)
+                k += n
+
+        return self.propagate_at(time_blocks(), t_end, rtol, atol)
+
+    def propagate_at(self, time_blocks, t_end=None, rtol=1e-9, atol=1e-12):
+        """
+        То же, что propagate, для произвольных возрастающих моментов вывода:
+        time_blocks - последовательность массивов моментов (блоков).
+        """
+        from scipy.integrate import RK45
+
+        r0, v0 = self.orbital_elements_to_state(0)
+        y0 = np.concatenate([r0, v0])
+        solver = RK45(self.equations_of_motion, 0.0, y0, np.inf if t_end is None else t_end,
+                      rtol=rtol, atol=atol)
+        for t in time_blocks:
+            n = len(t)
+            y = np.empty((n, 6))
+            filled = 0
+            with stage('integrate_block'):
+                while filled < n:
+                    # Точки, попавшие в уже сделанный шаг, - из плотного вывода
+                    last = np.searchsorted(t, solver.t, side='right')
+                    if last > filled:
+                        if solver.t_old is None:
+                            y[filled:last] = solver.y      # начальный момент
+                        else:
+                            y[filled:last] = solver.dense_output()(t[filled:last]).T
+                        filled = last
+                        continue
+                    if solver.status != 'running':
+                        raise RuntimeError(f"Интегрирование остановлено: {solver.status}")
+                    message = solver.step()
+                    if solver.status == 'failed':
+                        raise RuntimeError(f"Интегрирование не удалось: {message}")
+            yield TrajectoryBlock(t, y[:, :3], y[:, 3:])
+
+    def _simulate_to_store(self, t_eval, y0, path, precision, chunk_points):
+        """Потоковое интегрирование (propagate_at) с записью каждого блока на диск"""
+        from traj_store import TrajectoryWriter, open_trajectory
+
+        attrs = {'body_name': self.body_name, 'semi_major_axis': self.semi_major_axis,
+                 'eccentricity': self.eccentricity, 'inclination': self.inclination,
+                 'raan': self.raan, 'arg_periapsis': self.arg_periapsis,
+                 'mu': self.mu, 'period': self.period}
+        blocks = (t_eval[i0:i0 + chunk_points] for i0 in range(0, len(t_eval), chunk_points))
+        with TrajectoryWriter(path, {'t': (), 'r': (3,), 'v': (3,)}, precision=precision,
+                              chunk_rows=chunk_points, attrs=attrs) as writer:
+            for block in self.propagate_at(blocks, t_end=t_eval[-1]):
+                with stage('store_write'):
+                    writer.append(t=block.t, r=block.r, v=block.v)
+
+        trajectory = open_trajectory(path)
+        self.t, self.r, self.v = trajectory['t'], trajectory['r'], trajectory['v']
+        return self.t, self.r, self.v
+
+    def _plot_data(self, max_points=10**6):
+        """
+        Траектория для графиков в виде массивов. Траектория из хранилища
+        читается с прореживанием до max_points точек, а не целиком.
+        """
+        step = max(1, -(-len(self.t) // max_points))
+        if isinstance(self.t, np.ndarray) and step == 1:
+            return self.t, self.r, self.v
+        return np.asarray(self.t[::step]), np.asarray(self.r[::step]), np.asarray(self.v[::step])
+
+    @profiled('plot_orbit')
     def plot_orbit(self, t_span=None):
         """Визуализация орбиты"""
+        import matplotlib.pyplot as plt
+        from labkit import lod
+
         if not hasattr(self, 'r'):
             if t_span is None:
                 t_span = self.period
             self.simulate(t_span)
         
+        t, r, v = self._plot_data()
         fig, axes = plt.subplots(2, 2, figsize=(12, 10))
         
         # Орбита в плоскости XY
         ax1 = axes[0, 0]
-        ax1.plot(self.r[:, 0], self.r[:, 1], 'b-', linewidth=1, alpha=0.7)
+        lod.plot_path(ax1, r[:, 0], r[:, 1], 'b-', linewidth=1, alpha=0.7)
         ax1.plot(0, 0, 'yo', markersize=15, label='Солнце')
-        ax1.plot(self.r[0, 0], self.r[0, 1], 'ro', label='Начало')
+        ax1.plot(r[0, 0], r[0, 1], 'ro', label='Начало')
         ax1.set_xlabel('X (м)')
         ax1.set_ylabel('Y (м)')
         ax1.set_title(f'Орбита {self.body_name}')
@@ -122,8 +310,8 @@ class OrbitalSimulator:
         
         # Расстояние от Солнца
         ax2 = axes[0, 1]
-        distances = np.linalg.norm(self.r, axis=1)
-        ax2.plot(self.t/86400, distances, 'g-')
+        distances = np.linalg.norm(r, axis=1)
+        lod.plot(ax2, t/86400, distances, 'g-')
         ax2.set_xlabel('Время (дни)')
         ax2.set_ylabel('Расстояние от Солнца (м)')
         ax2.set_title('Расстояние от Солнца')
@@ -131,8 +319,8 @@ class OrbitalSimulator:
         
         # Скорость
         ax3 = axes[1, 0]
-        speeds = np.linalg.norm(self.v, axis=1)
-        ax3.plot(self.t/86400, speeds, 'r-')
+        speeds = np.linalg.norm(v, axis=1)
+        lod.plot(ax3, t/86400, speeds, 'r-')
         ax3.set_xlabel('Время (дни)')
         ax3.set_ylabel('Скорость (м/с)')
         ax3.set_title('Скорость тела')
@@ -140,10 +328,10 @@ class OrbitalSimulator:
         
         # Энергия (должна сохраняться)
         ax4 = axes[1, 1]
-        kinetic = 0.5 * np.linalg.norm(self.v, axis=1)**2
-        potential = -self.mu / np.linalg.norm(self.r, axis=1)
+        kinetic = 0.5 * np.linalg.norm(v, axis=1)**2
+        potential = -self.mu / np.linalg.norm(r, axis=1)
         total_energy = kinetic + potential
-        ax4.plot(self.t/86400, total_energy, 'purple')
+        lod.plot(ax4, t/86400, total_energy, 'purple')
         ax4.set_xlabel('Время (дни)')
         ax4.set_ylabel('Удельная энергия (м²/с²)')
         ax4.set_title('Сохраняющаяся полная энергия')
@@ -154,15 +342,20 @@ class OrbitalSimulator:
     
     def animate_orbit(self, t_span=None, interval=50):
         """Анимация движения по орбите"""
+        import matplotlib.pyplot as plt
+        from matplotlib.animation import FuncAnimation
+        from labkit import lod
+
         if not hasattr(self, 'r'):
             if t_span is None:
                 t_span = self.period
             self.simulate(t_span)
         
+        t, r, v = self._plot_data()
         fig, ax = plt.subplots(figsize=(10, 10))
         
         # Орбита
-        ax.plot(self.r[:, 0], self.r[:, 1], 'b-', linewidth=0.5, alpha=0.5)
+        lod.plot_path(ax, r[:, 0], r[:, 1], 'b-', linewidth=0.5, alpha=0.5)
         
         # Солнце
         sun = ax.plot(0, 0, 'yo', markersize=20, label='Солнце')[0]
@@ -179,7 +372,7 @@ class OrbitalSimulator:
         ax.legend()
         
         # Пределы графика
-        max_range = np.max(np.abs(self.r)) * 1.1
+        max_range = np.max(np.abs(r)) * 1.1
         ax.set_xlim(-max_range, max_range)
         ax.set_ylim(-max_range, max_range)
         
@@ -190,22 +383,22 @@ class OrbitalSimulator:
         
         def update(frame):
             # Обновление позиции тела
-            body.set_data(self.r[frame, 0], self.r[frame, 1])
+            body.set_data(r[frame, 0], r[frame, 1])
             
             # Обновление следа (последние 100 точек)
             start = max(0, frame - 100)
-            trail.set_data(self.r[start:frame, 0], self.r[start:frame, 1])
+            trail.set_data(r[start:frame, 0], r[start:frame, 1])
             
             # Информация в заголовке
-            speed = np.linalg.norm(self.v[frame])
-            distance = np.linalg.norm(self.r[frame])
-            ax.set_title(f'{self.body_name} - Время: {self.t[frame]/86400:.1f} дней, '
+            speed = np.linalg.norm(v[frame])
+            distance = np.linalg.norm(r[frame])
+            ax.set_title(f'{self.body_name} - Время: {t[frame]/86400:.1f} дней, '
                         f'Скорость: {speed:.1f} м/с, '
                         f'Расстояние: {distance:.3e} м')
             
             return body, trail
         
-        ani = FuncAnimation(fig, update, frames=len(self.t),
+        ani = FuncAnimation(fig, update, frames=len(t),
                           init_func=init, blit=True, interval=interval)
         
         plt.show()
@@ -213,7 +406,8 @@ class OrbitalSimulator:
 
 
 # Пример использования
-if __name__ == "__main__":
+def demo():
+    """Примеры: Земля, комета и тело с параметрами, введёнными пользователем"""
     # Пример 1: Земля (круговая орбита)
     earth_sim = OrbitalSimulator(
         semi_major_axis=1.496e11,  # 1 а.е.
@@ -259,4 +453,87 @@ if __name__ == "__main__":
         custom_sim.plot_orbit()
         
     except ValueError:
-        print("Ошибка ввода. Используются значения по умолчанию.")
\ No newline at end of file
+        print("Ошибка ввода. Используются значения по умолчанию.")
+
+
+def check():
+    """
+    Контроль потокового интегрирования: t_end, кратное dt в плавающей
+    точке (3·0.1 > 0.3), и совпадение propagate с одним вызовом solve_ivp.
+    Возвращает наибольшее расхождение положений, м.
+    """
+    sim = OrbitalSimulator(1.496e11, eccentricity=0.1, verbose=False)
+    for dt, t_end in ((0.1, 0.3), (0.1, 0.7), (86400 * 0.1, 86400 * 0.3)):
+        blocks = list(sim.propagate(dt, block_points=2, t_end=t_end))
+        t = np.concatenate([b.t for b in blocks])
+        if t[-1] > t_end or len(t) != round(t_end / dt) + 1:
+            raise AssertionError(f"propagate: неверные моменты вывода для dt = {dt}, t_end = {t_end}")
+    t_span = sim.period
+    t, r, _ = sim.simulate(t_span, n_points=501)
+    blocks = list(sim.propagate(t_span / 500, block_points=64, t_end=t_span))
+    diff = float(np.max(np.abs(np.concatenate([b.r for b in blocks]) - r)))
+    if diff > 1e-9 * sim.semi_major_axis:
+        raise AssertionError(f"propagate расходится с solve_ivp: {diff:.3e} м")
+    return diff
+
+
+def main(argv=None):
+    """
+    Точка входа. Без аргументов - примеры из demo(); с параметрами орбиты -
+    моделирование одного тела, с --no-plot - вывод траектории в JSON/CSV.
+    """
+    parser = argparse.ArgumentParser(description="Моделирование орбиты численным интегрированием")
+    parser.add_argument('--a', type=float, help="большая полуось, м")
+    parser.add_argument('--v0', type=float, help="начальная скорость в перигелии, м/с")
+    parser.add_argument('--e', type=float, help="эксцентриситет (вместо --v0)")
+    parser.add_argument('--i', type=float, default=0.0, help="наклонение, градусы")
+    parser.add_argument('--raan', type=float, default=0.0, help="долгота восходящего узла, градусы")
+    parser.add_argument('--argp', type=float, default=0.0, help="аргумент перигелия, градусы")
+    parser.add_argument('--name', default="Тело")
+    parser.add_argument('--periods', type=float, default=1.0, help="длительность в периодах")
+    parser.add_argument('--points', type=int, default=1000, help="число точек траектории")
+    parser.add_argument('--sampling', choices=SAMPLINGS, default='time',
+                        help="расположение точек: по времени или по аномалии")
+    parser.add_argument('--store', help="каталог для записи траектории на диск (traj_store)")
+    parser.add_argument('--float32', action='store_true', help="хранить r и v в float32")
+    parser.add_argument('--check', action='store_true', help="проверка потокового интегрирования")
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.check:
+        print(f"propagate: расхождение с solve_ivp {check():.2e} м")
+        return 0
+
+    if args.a is None:
+        demo()
+        return 0
+
+    sim = OrbitalSimulator(args.a, initial_velocity=args.v0, eccentricity=args.e,
+                           body_name=args.name, verbose=not args.no_plot,
+                           inclination=np.radians(args.i), raan=np.radians(args.raan),
+                           arg_periapsis=np.radians(args.argp))
+    t, r, v = sim.simulate(sim.period * args.periods, n_points=args.points, store=args.store,
+                           precision='float32' if args.float32 else 'float64', sampling=args.sampling)
+    if not args.no_plot:
+        sim.plot_orbit()
+        return 0
+    if args.store:
+        # Траектория уже на диске: выводится только сводка
+        on_disk, raw = t.store.nbytes()
+        write_result({'body': sim.body_name, 'store': args.store, 'points': len(t),
+                      'bytes_on_disk': on_disk, 'bytes_raw': raw}, 'json', args.output)
+        return 0
+    trajectory = {'t': t, 'x': r[:, 0], 'y': r[:, 1], 'z': r[:, 2],
+                  'vx': v[:, 0], 'vy': v[:, 1], 'vz': v[:, 2]}
+    if args.format == 'csv':
+        write_result(trajectory, 'csv', args.output)
+    else:
+        write_result({'body': sim.body_name, 'semi_major_axis': sim.semi_major_axis,
+                      'eccentricity': sim.eccentricity, 'inclination': sim.inclination,
+                      'raan': sim.raan, 'arg_periapsis': sim.arg_periapsis, 'period': sim.period,
+                      'trajectory': trajectory}, 'json', args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,25 @@
+import argparse
+from collections import namedtuple
 import numpy as np
-import matplotlib.pyplot as plt
+import os
+import sys
+
+# Подключение общих модулей из корня репозитория
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from labkit.cli import add_output_arguments, write_result
+from labkit.profiling import profiled, stage
+
+from m import SAMPLINGS, sample_times
+
+# matplotlib импортируется только при построении графиков
+
+# Блок рассчитанной орбиты (OrbitalSimulator.kepler_block и stream)
+OrbitBlock = namedtuple('OrbitBlock', 't r v acc x y')
+
 
 class OrbitalSimulator:
-    def __init__(self, semi_major_axis, initial_velocity, body_name="Тело", mu=1.32712440018e20):
+    def __init__(self, semi_major_axis, initial_velocity, body_name="Тело", mu=1.32712440018e20,
+                 verbose=True):
         """
         Упрощенный орбитальный симулятор
         
@@ -11,6 +28,7 @@ class OrbitalSimulator:
         initial_velocity: начальная скорость (м/с)
         body_name: название тела
         mu: гравитационный параметр Солнца (м³/с²)
+        verbose: вывести параметры орбиты
         """
         self.a = semi_major_axis
         self.v0 = initial_velocity
@@ -24,6 +42,8 @@ class OrbitalSimulator:
         self.calculate_orbital_parameters()
         
         # Вывод информации
+        if not verbose:
+            return
         print(f"Параметры орбиты для {body_name}:")
         print(f"  Большая полуось: {self.a:.3e} м")
         print(f"  Начальная скорость: {self.v0:.2f} м/с")
@@ -49,60 +69,127 @@ class OrbitalSimulator:
         self.r_min = self.a*(1 - self.e)
         self.r_max = self.a*(1 + self.e)
     
-    def calculate_orbit(self, time_points=1000, num_periods=1):
-        """Вычисление орбиты для заданного времени"""
-        self.time = np.linspace(0, num_periods*self.T, time_points)
-        
-        # Инициализация массивов
-        self.r_values = np.zeros(len(self.time))  # расстояния
-        self.v_values = np.zeros(len(self.time))  # скорости
-        self.a_values = np.zeros(len(self.time))  # ускорения
-        self.x_values = np.zeros(len(self.time))  # координата x
-        self.y_values = np.zeros(len(self.time))  # координата y
-        
-        # Для каждого момента времени решаем уравнение Кеплера
-        for i, t in enumerate(self.time):
-            # Средняя аномалия
-            M = 2*np.pi*t/self.T
-            
-            # Решение уравнения Кеплера M = E - e*sin(E) методом Ньютона
-            E = M  # начальное приближение
-            for _ in range(20):  # итерации Ньютона
-                delta = (E - self.e*np.sin(E) - M)/(1 - self.e*np.cos(E))
-                E -= delta
-                if abs(delta) < 1e-12:
-                    break
-            
-            # Истинная аномалия
-            nu = 2*np.arctan(np.sqrt((1+self.e)/(1-self.e))*np.tan(E/2))
-            
-            # Расстояние
-            r = self.a*(1 - self.e**2)/(1 + self.e*np.cos(nu))
-            self.r_values[i] = r
-            
-            # Координаты (в плоскости орбиты)
-            self.x_values[i] = r*np.cos(nu)
-            self.y_values[i] = r*np.sin(nu)
-            
-            # Скорость (из закона сохранения энергии)
-            v = np.sqrt(2*(self.mu/r + self.v0**2/2 - self.mu/self.r0))
-            self.v_values[i] = v
-            
-            # Ускорение (из закона всемирного тяготения)
-            self.a_values[i] = self.mu/r**2
+    def kepler_block(self, t):
+        """
+        Положение, расстояние, скорость и ускорение для массива моментов t
+        (уравнение Кеплера решается методом Ньютона сразу для всех точек).
+        Возвращает OrbitBlock(t, r, v, acc, x, y).
+        """
+        t = np.asarray(t, dtype=float)
+        # Средняя аномалия
+        M = 2*np.pi*t/self.T
+        
+        # Решение уравнения Кеплера M = E - e*sin(E) методом Ньютона
+        E = M.copy()  # начальное приближение
+        active = np.ones(M.shape, dtype=bool)
+        for _ in range(20):  # итерации Ньютона
+            delta = (E[active] - self.e*np.sin(E[active]) - M[active])/(1 - self.e*np.cos(E[active]))
+            E[active] -= delta
+            # Сошедшиеся точки больше не уточняются, как и в поточечном цикле
+            idx = np.flatnonzero(active)
+            active[idx[np.abs(delta) < 1e-12]] = False
+            if not active.any():
+                break
+        
+        # Истинная аномалия
+        nu = 2*np.arctan(np.sqrt((1+self.e)/(1-self.e))*np.tan(E/2))
+        
+        # Расстояние и координаты (в плоскости орбиты)
+        r = self.a*(1 - self.e**2)/(1 + self.e*np.cos(nu))
+        x = r*np.cos(nu)
+        y = r*np.sin(nu)
+        
+        # Скорость (из закона сохранения энергии) и ускорение (закон тяготения)
+        v = np.sqrt(2*(self.mu/r + self.v0**2/2 - self.mu/self.r0))
+        acc = self.mu/r**2
+        return OrbitBlock(t, r, v, acc, x, y)
     
+    def stream(self, dt, block_points=4096, t_end=None):
+        """
+        Генератор блоков OrbitBlock по block_points точек с шагом dt: орбита
+        любой длительности считается при постоянной памяти. Без t_end
+        генератор бесконечен.
+        """
+        n_total = None if t_end is None else int(np.floor(t_end / dt * (1 + 1e-12))) + 1
+        k = 0
+        while n_total is None or k < n_total:
+            n = block_points if n_total is None else min(block_points, n_total - k)
+            t = (k + np.arange(n)) * dt
+            yield self.kepler_block(t if t_end is None else np.minimum(t, t_end))
+            k += n
+    
+    @profiled('calculate_orbit')
+    def calculate_orbit(self, time_points=1000, num_periods=1, sampling='time', store=None,
+                        precision='float64', chunk_points=65536):
+        """
+        Вычисление орбиты для заданного времени; sampling='eccentric' или
+        'true' сгущает точки у перигелия (см. m.sample_times).
+
+        С store (путь к каталогу) ряды считаются блоками по chunk_points
+        точек и пишутся на диск (см. traj_store.py), не накапливаясь в памяти;
+        self.time, self.r_values и остальные ряды тогда - столбцы хранилища
+        с ленивым чтением. precision='float32' вдвое уменьшает их размер.
+        """
+        time = sample_times(num_periods*self.T, self.T, self.e, time_points, sampling)
+        if store is not None:
+            self._calculate_to_store(time, store, precision, chunk_points)
+            return
+        self.time = time
+        block = self.kepler_block(self.time)
+        
+        self.r_values = block.r  # расстояния
+        self.v_values = block.v  # скорости
+        self.a_values = block.acc  # ускорения
+        self.x_values = block.x  # координата x
+        self.y_values = block.y  # координата y
+    
+    def _calculate_to_store(self, time, path, precision, chunk_points):
+        """Расчёт блоками kepler_block с записью каждого блока на диск"""
+        from traj_store import TrajectoryWriter, open_trajectory
+
+        attrs = {'body_name': self.body_name, 'semi_major_axis': self.a, 'eccentricity': self.e,
+                 'mu': self.mu, 'period': self.T, 'v0': self.v0}
+        columns = {name: () for name in OrbitBlock._fields}
+        with TrajectoryWriter(path, columns, precision=precision, chunk_rows=chunk_points,
+                              attrs=attrs) as writer:
+            for i0 in range(0, len(time), chunk_points):
+                block = self.kepler_block(time[i0:i0 + chunk_points])
+                with stage('store_write'):
+                    writer.append(**block._asdict())
+
+        orbit = open_trajectory(path)
+        self.time = orbit['t']
+        self.r_values, self.v_values, self.a_values = orbit['r'], orbit['v'], orbit['acc']
+        self.x_values, self.y_values = orbit['x'], orbit['y']
+
+    def _plot_data(self, max_points=10**6):
+        """
+        Ряды для графиков в виде OrbitBlock массивов. Ряды из хранилища
+        читаются с прореживанием до max_points точек, а не целиком.
+        """
+        series = (self.time, self.r_values, self.v_values, self.a_values, self.x_values, self.y_values)
+        step = max(1, -(-len(self.time) // max_points))
+        if isinstance(self.time, np.ndarray) and step == 1:
+            return OrbitBlock(*series)
+        return OrbitBlock(*(np.asarray(s[::step]) for s in series))
+    
+    @profiled('plot_results')
     def plot_results(self):
         """Построение графиков результатов"""
+        import matplotlib.pyplot as plt
+        from labkit import lod
+
         if not hasattr(self, 'time'):
             self.calculate_orbit()
         
+        orbit = self._plot_data()
         fig, axes = plt.subplots(2, 2, figsize=(12, 10))
         
         # 1. Орбита в плоскости XY
         ax1 = axes[0, 0]
-        ax1.plot(self.x_values, self.y_values, 'b-', linewidth=1)
+        lod.plot_path(ax1, orbit.x, orbit.y, 'b-', linewidth=1)
         ax1.plot(0, 0, 'yo', markersize=15, label='Солнце')
-        ax1.plot(self.x_values[0], self.y_values[0], 'ro', label='Начало')
+        ax1.plot(orbit.x[0], orbit.y[0], 'ro', label='Начало')
         ax1.set_xlabel('X (м)')
         ax1.set_ylabel('Y (м)')
         ax1.set_title(f'Орбита {self.body_name}')
@@ -112,7 +199,7 @@ class OrbitalSimulator:
         
         # 2. Расстояние от Солнца от времени
         ax2 = axes[0, 1]
-        ax2.plot(self.time/86400, self.r_values, 'g-', linewidth=1)
+        lod.plot(ax2, orbit.t/86400, orbit.r, 'g-', linewidth=1)
         ax2.set_xlabel('Время (дни)')
         ax2.set_ylabel('Расстояние от Солнца (м)')
         ax2.set_title('Расстояние от времени')
@@ -120,7 +207,7 @@ class OrbitalSimulator:
         
         # 3. Скорость от времени
         ax3 = axes[1, 0]
-        ax3.plot(self.time/86400, self.v_values, 'r-', linewidth=1)
+        lod.plot(ax3, orbit.t/86400, orbit.v, 'r-', linewidth=1)
         ax3.set_xlabel('Время (дни)')
         ax3.set_ylabel('Скорость (м/с)')
         ax3.set_title('Скорость от времени')
@@ -128,7 +215,7 @@ class OrbitalSimulator:
         
         # 4. Ускорение от времени
         ax4 = axes[1, 1]
-        ax4.plot(self.time/86400, self.a_values, 'purple', linewidth=1)
+        lod.plot(ax4, orbit.t/86400, orbit.acc, 'purple', linewidth=1)
         ax4.set_xlabel('Время (дни)')
         ax4.set_ylabel('Ускорение (м/с²)')
         ax4.set_title('Ускорение от времени')
@@ -140,13 +227,17 @@ class OrbitalSimulator:
     
     def create_animation(self, num_periods=1, interval=50):
         """Простая анимация движения по орбите"""
+        import matplotlib.pyplot as plt
+        from labkit import lod
+
         if not hasattr(self, 'time'):
             self.calculate_orbit(num_periods=num_periods)
         
+        orbit = self._plot_data()
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
         
         # Левая панель: орбита
-        ax1.plot(self.x_values, self.y_values, 'b-', linewidth=0.5, alpha=0.5)
+        lod.plot_path(ax1, orbit.x, orbit.y, 'b-', linewidth=0.5, alpha=0.5)
         ax1.plot(0, 0, 'yo', markersize=20, label='Солнце')
         body_orbit = ax1.plot([], [], 'ro', markersize=8)[0]
         trail = ax1.plot([], [], 'r-', linewidth=1, alpha=0.7)[0]
@@ -166,7 +257,7 @@ class OrbitalSimulator:
         ax2.grid(True, alpha=0.3)
         ax2.legend()
         ax2.set_xlim(0, num_periods*self.T/86400)
-        ax2.set_ylim(0, max(np.max(self.v_values), np.max(self.r_values))*1.1)
+        ax2.set_ylim(0, max(np.max(orbit.v), np.max(orbit.r))*1.1)
         
         def init():
             body_orbit.set_data([], [])
@@ -177,21 +268,21 @@ class OrbitalSimulator:
         
         def update(frame):
             # Обновление позиции на орбите
-            body_orbit.set_data(self.x_values[frame], self.y_values[frame])
+            body_orbit.set_data(orbit.x[frame], orbit.y[frame])
             
             # Обновление следа
             start = max(0, frame - 50)
-            trail.set_data(self.x_values[start:frame], self.y_values[start:frame])
+            trail.set_data(orbit.x[start:frame], orbit.y[start:frame])
             
             # Обновление графиков
-            current_time = self.time[:frame+1]/86400
-            ax2_velocity.set_data(current_time, self.v_values[:frame+1])
-            ax2_distance.set_data(current_time, self.r_values[:frame+1])
+            current_time = orbit.t[:frame+1]/86400
+            ax2_velocity.set_data(current_time, orbit.v[:frame+1])
+            ax2_distance.set_data(current_time, orbit.r[:frame+1])
             
             return body_orbit, trail, ax2_velocity, ax2_distance
         
         from matplotlib.animation import FuncAnimation
-        ani = FuncAnimation(fig, update, frames=len(self.time), 
+        ani = FuncAnimation(fig, update, frames=len(orbit.t), 
                           init_func=init, blit=True, interval=interval)
         
         plt.tight_layout()
@@ -200,7 +291,8 @@ class OrbitalSimulator:
 
 
 # Пример использования
-if __name__ == "__main__":
+def demo():
+    """Примеры: орбита Земли и тело с параметрами, введёнными пользователем"""
     # Пример 1: Земля
     print("Пример 1: Орбита Земли")
     earth = OrbitalSimulator(
@@ -249,4 +341,54 @@ if __name__ == "__main__":
             body_name="Тело по умолчанию"
         )
         default_body.calculate_orbit()
-        default_body.plot_results()
\ No newline at end of file
+        default_body.plot_results()
+
+
+def main(argv=None):
+    """
+    Точка входа. Без аргументов - примеры из demo(); с параметрами орбиты -
+    расчёт одного тела, с --no-plot - вывод рядов r, v, a, x, y в JSON/CSV
+    (с --store - запись рядов на диск и сводка).
+    """
+    parser = argparse.ArgumentParser(description="Орбита по уравнению Кеплера")
+    parser.add_argument('--a', type=float, help="начальное расстояние (перигелий), м")
+    parser.add_argument('--v0', type=float, default=30000, help="начальная скорость, м/с")
+    parser.add_argument('--name', default="Тело")
+    parser.add_argument('--periods', type=float, default=1.0, help="длительность в периодах")
+    parser.add_argument('--points', type=int, default=1000, help="число точек")
+    parser.add_argument('--sampling', choices=SAMPLINGS, default='time',
+                        help="расположение точек: по времени или по аномалии")
+    parser.add_argument('--store', help="каталог для записи рядов на диск (traj_store)")
+    parser.add_argument('--float32', action='store_true', help="хранить ряды r, v, a, x, y в float32")
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.a is None:
+        demo()
+        return 0
+
+    body = OrbitalSimulator(args.a, args.v0, body_name=args.name, verbose=not args.no_plot)
+    body.calculate_orbit(time_points=args.points, num_periods=args.periods, sampling=args.sampling,
+                         store=args.store, precision='float32' if args.float32 else 'float64')
+    if not args.no_plot:
+        body.plot_results()
+        return 0
+    if args.store:
+        # Ряды уже на диске: выводится только сводка
+        on_disk, raw = body.time.store.nbytes()
+        write_result({'body': body.body_name, 'store': args.store, 'points': len(body.time),
+                      'bytes_on_disk': on_disk, 'bytes_raw': raw}, 'json', args.output)
+        return 0
+    series = {'t': body.time, 'r': body.r_values, 'v': body.v_values, 'acc': body.a_values,
+              'x': body.x_values, 'y': body.y_values}
+    if args.format == 'csv':
+        write_result(series, 'csv', args.output)
+    else:
+        write_result({'body': body.body_name, 'semi_major_axis': body.a, 'eccentricity': body.e,
+                      'period': body.T, 'r_min': body.r_min, 'r_max': body.r_max,
+                      'orbit': series}, 'json', args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
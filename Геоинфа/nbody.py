@@ -0,0 +1,192 @@
+"""
+Ограниченная задача N тел: безмассовые пробные частицы (рой комет) в поле
+Солнца и нескольких возмущающих планет на кеплеровых орбитах.
+
+Орбиты планет задаются OrbitalSimulator и вычисляются аналитически
+(state_at), поэтому на каждом шаге считается только ускорение частиц -
+одной векторной операцией по массиву (частицы × планеты). Система
+гелиоцентрическая, с косвенным членом от притяжения Солнца планетами.
+Множество частиц делится на блоки, которые интегрируются в пуле процессов.
+
+Запуск:
+    python nbody.py [--particles 100000] [--periods 1] [--jobs N] [--no-plot]
+"""
+import argparse
+import os
+import sys
+from collections import namedtuple
+import numpy as np
+
+# Подключение общих модулей из корня репозитория
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from labkit.cli import add_output_arguments, write_result
+from labkit.parallel import process_pool, chunk_sizes
+from labkit.profiling import profiled, stage
+
+from m import OrbitalSimulator
+
+MU_SUN = 1.32712440018e20
+
+# Возмущающее тело: орбита (OrbitalSimulator), гравитационный параметр (м³/с²)
+# и момент прохождения перигелия (с)
+Perturber = namedtuple('Perturber', 'orbit mu t_peri')
+NBodyResult = namedtuple('NBodyResult', 't r v')
+
+
+def planets(t_peri_jupiter=0.0, t_peri_saturn=0.0):
+    """Юпитер и Сатурн - основные возмущающие тела для комет"""
+    jupiter = OrbitalSimulator(7.785e11, eccentricity=0.0489, body_name="Юпитер", verbose=False)
+    saturn = OrbitalSimulator(1.4335e12, eccentricity=0.0565, body_name="Сатурн", verbose=False)
+    return [Perturber(jupiter, 1.26687e17, t_peri_jupiter),
+            Perturber(saturn, 3.7931e16, t_peri_saturn)]
+
+
+def perturber_positions(perturbers, t):
+    """Положения возмущающих тел в момент t, массив (K, 3)"""
+    if not perturbers:
+        return np.zeros((0, 3))
+    return np.stack([p.orbit.state_at(t, p.t_peri)[0] for p in perturbers])
+
+
+def accelerations(t, r, perturbers, mu=MU_SUN):
+    """
+    Ускорения частиц r (N, 3) в момент t: притяжение Солнца, прямое
+    притяжение планет и косвенный член (ускорение самого Солнца).
+    """
+    r_norm = np.linalg.norm(r, axis=1)
+    acc = -mu * r / r_norm[:, None]**3
+    if not perturbers:
+        return acc
+    P = perturber_positions(perturbers, t)                   # (K, 3)
+    mu_p = np.array([p.mu for p in perturbers])              # (K,)
+    d = P[None, :, :] - r[:, None, :]                         # (N, K, 3)
+    d3 = np.linalg.norm(d, axis=2)**3                         # (N, K)
+    direct = np.einsum('k,nkj->nj', mu_p, d / d3[:, :, None])
+    indirect = (mu_p[:, None] * P / np.linalg.norm(P, axis=1)[:, None]**3).sum(axis=0)
+    return acc + direct - indirect
+
+
+def _integrate_chunk(r0, v0, perturbers, t_eval, mu, rtol, atol):
+    """Интегрирование одного блока частиц; состояние - плоский вектор (6N)"""
+    from scipy.integrate import solve_ivp
+
+    n = len(r0)
+
+    def rhs(t, y):
+        r = y[:3 * n].reshape(n, 3)
+        v = y[3 * n:]
+        return np.concatenate([v, accelerations(t, r, perturbers, mu).ravel()])
+
+    y0 = np.concatenate([r0.ravel(), v0.ravel()])
+    sol = solve_ivp(rhs, (t_eval[0], t_eval[-1]), y0, method='DOP853', t_eval=t_eval,
+                    rtol=rtol, atol=atol)
+    if not sol.success:
+        raise RuntimeError(f"Интегрирование не удалось: {sol.message}")
+    r = sol.y[:3 * n].T.reshape(len(t_eval), n, 3)
+    v = sol.y[3 * n:].T.reshape(len(t_eval), n, 3)
+    return r, v
+
+
+@profiled('integrate')
+def integrate(r0, v0, perturbers, t_eval, mu=MU_SUN, workers=None, chunk_size=2000,
+              rtol=1e-9, atol=1.0):
+    """
+    Движение пробных частиц с начальными r0, v0 (N, 3) в моменты t_eval.
+
+    Частицы делятся на блоки по chunk_size: у каждого блока свой адаптивный
+    шаг, общий для всех его частиц, - частица у перигелия дробит шаг своему
+    блоку, но не остальным; при workers > 1 блоки считаются в пуле процессов.
+    Возвращает NBodyResult с r, v формы (len(t_eval), N, 3).
+    """
+    r0 = np.atleast_2d(np.asarray(r0, dtype=float))
+    v0 = np.atleast_2d(np.asarray(v0, dtype=float))
+    t_eval = np.asarray(t_eval, dtype=float)
+    sizes = chunk_sizes(len(r0), chunk_size)
+    bounds = np.concatenate([[0], np.cumsum(sizes)])
+    args = [(r0[i0:i1], v0[i0:i1], perturbers, t_eval, mu, rtol, atol)
+            for i0, i1 in zip(bounds[:-1], bounds[1:])]
+
+    if workers == 1 or len(args) == 1:
+        parts = [_integrate_chunk(*a) for a in args]
+    else:
+        with process_pool(workers) as pool:
+            parts = list(pool.map(_integrate_chunk, *zip(*args)))
+    return NBodyResult(t_eval, np.concatenate([p[0] for p in parts], axis=1),
+                       np.concatenate([p[1] for p in parts], axis=1))
+
+
+def swarm(orbit, n, dv=1.0, seed=None, true_anomaly=0.0):
+    """
+    Рой из n частиц вблизи точки орбиты orbit: одинаковое положение и
+    скорости с нормальным разбросом dv (м/с) по каждой оси.
+    """
+    r, v = orbit.orbital_elements_to_state(true_anomaly)
+    rng = np.random.default_rng(seed)
+    return np.tile(r, (n, 1)), v + rng.normal(0, dv, (n, 3))
+
+
+def semi_major_axis(r, v, mu=MU_SUN):
+    """Оскулирующая большая полуось для массивов r, v (..., 3)"""
+    return 1 / (2 / np.linalg.norm(r, axis=-1) - np.sum(v**2, axis=-1) / mu)
+
+
+@profiled('plot')
+def plot_swarm(res, perturbers):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 10))
+    final = res.r[-1]
+    step = max(1, len(final) // 20000)
+    ax.plot(final[::step, 0], final[::step, 1], ',', color='tab:blue', label='частицы')
+    for p in perturbers:
+        t = np.linspace(0, p.orbit.period, 400)
+        r, _ = p.orbit.state_at(t, p.t_peri)
+        ax.plot(r[:, 0], r[:, 1], '--', linewidth=0.8, label=p.orbit.body_name)
+        pos = p.orbit.state_at(res.t[-1], p.t_peri)[0]
+        ax.plot(pos[0], pos[1], 'o')
+    ax.plot(0, 0, 'yo', markersize=12, label='Солнце')
+    ax.set_aspect('equal')
+    ax.grid(True, alpha=0.3)
+    ax.legend()
+    ax.set_title('Рой частиц в конце расчёта')
+    plt.show()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Рой комет под возмущениями Юпитера и Сатурна")
+    parser.add_argument('--particles', type=int, default=1000, help="число частиц")
+    parser.add_argument('--a', type=float, default=3.0e12, help="большая полуось орбиты роя, м")
+    parser.add_argument('--e', type=float, default=0.9, help="эксцентриситет орбиты роя")
+    parser.add_argument('--dv', type=float, default=1.0, help="разброс скоростей, м/с")
+    parser.add_argument('--periods', type=float, default=1.0, help="число периодов орбиты роя")
+    parser.add_argument('--points', type=int, default=50, help="число сохраняемых моментов")
+    parser.add_argument('--chunk', type=int, default=2000, help="частиц в блоке")
+    parser.add_argument('--jobs', type=int, default=None, help="число процессов")
+    parser.add_argument('--seed', type=int, default=0)
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    comet = OrbitalSimulator(args.a, eccentricity=args.e, body_name="Комета", verbose=False)
+    perturbers = planets()
+    r0, v0 = swarm(comet, args.particles, args.dv, args.seed)
+    t_eval = np.linspace(0, args.periods * comet.period, args.points)
+    res = integrate(r0, v0, perturbers, t_eval, workers=args.jobs, chunk_size=args.chunk)
+
+    with stage('elements'):
+        a = semi_major_axis(res.r, res.v)
+    series = {'t': res.t, 'a_mean': a.mean(axis=1), 'a_std': a.std(axis=1),
+              'spread': np.linalg.norm(res.r - res.r.mean(axis=1, keepdims=True), axis=2).mean(axis=1)}
+
+    if args.no_plot:
+        write_result(series, args.format, args.output)
+        return 0
+
+    print(f"Частиц: {args.particles}, интервал {t_eval[-1] / 86400 / 365.25:.1f} лет")
+    print(f"Большая полуось: {series['a_mean'][0]:.4e} -> {series['a_mean'][-1]:.4e} м, "
+          f"разброс {series['a_std'][-1]:.3e} м")
+    plot_swarm(res, perturbers)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
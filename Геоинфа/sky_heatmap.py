@@ -0,0 +1,148 @@
+"""
+Карта занятости неба: двумерная гистограмма (азимут, высота) точек над
+горизонтом для многих пролётов и спутников.
+
+Гистограмма накапливается по блокам моментов, поэтому окно в недели и
+месяцы считается при постоянной памяти, а рисуется один раз - картой
+плотности вместо линии через все точки трассы.
+
+Запуск:
+    python sky_heatmap.py [--start 2026-01-01 --days 30] [--tle каталог.tle] [--step 30]
+"""
+import argparse
+import os
+import sys
+import numpy as np
+
+# Подключение общих модулей из корня репозитория
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from labkit.cli import add_output_arguments, write_result
+from labkit.profiling import profiled, stage
+
+import TLE
+
+
+class SkyHistogram:
+    """
+    Полярная гистограмма неба: ячейки примерно d_az × d_alt градусов (число
+    ячеек округляется так, чтобы они покрывали 360° и 90° целиком), в каждой -
+    число точек; при заданном шаге выборки step (с) - время пребывания.
+    """
+
+    def __init__(self, d_az=5.0, d_alt=3.0, step=None):
+        n_az = max(1, round(360 / d_az))
+        n_alt = max(1, round(90 / d_alt))
+        # Границы и номера ячеек в add выводятся из одних и тех же n_az, n_alt
+        self.az_edges = np.linspace(0, 360, n_az + 1)
+        self.alt_edges = np.linspace(0, 90, n_alt + 1)
+        self.counts = np.zeros((n_az, n_alt), dtype=np.int64)
+        self.step = step
+
+    def add(self, az, alt):
+        """Добавление точек (градусы); точки под горизонтом отбрасываются"""
+        az = np.asarray(az, dtype=float).ravel()
+        alt = np.asarray(alt, dtype=float).ravel()
+        keep = alt >= 0
+        n_az, n_alt = self.counts.shape
+        i = np.clip((np.mod(az[keep], 360) / 360 * n_az).astype(int), 0, n_az - 1)
+        j = np.clip((alt[keep] / 90 * n_alt).astype(int), 0, n_alt - 1)
+        self.counts += np.bincount(i * n_alt + j, minlength=n_az * n_alt).reshape(n_az, n_alt)
+        return int(keep.sum())
+
+    def __iadd__(self, other):
+        self.counts += other.counts
+        return self
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def minutes(self):
+        """Время пребывания в ячейках, минуты (нужен step)"""
+        if self.step is None:
+            raise ValueError("Шаг выборки step не задан")
+        return self.counts * self.step / 60
+
+    def plot(self, ax=None, title=None):
+        """Карта плотности на полярных осях (север вверху, по часовой стрелке)"""
+        import matplotlib.pyplot as plt
+
+        if ax is None:
+            fig, ax = plt.subplots(subplot_kw={'projection': 'polar'})
+        ax.set_theta_zero_location('N')
+        ax.set_theta_direction(-1)
+        values = self.minutes() if self.step else self.counts
+        values = np.ma.masked_equal(values, 0)
+        mesh = ax.pcolormesh(np.radians(self.az_edges), self.alt_edges, values.T, shading='flat',
+                             cmap='magma_r')
+        ax.set_ylim(90, 0)
+        ax.set_yticks(range(0, 91, 30))
+        ax.figure.colorbar(mesh, ax=ax, pad=0.1, label='минут' if self.step else 'точек')
+        if title:
+            ax.set_title(title, fontsize=10)
+        return mesh
+
+
+@profiled('accumulate')
+def accumulate(satellites, observer, ts, t_start, t_end, step=30.0, chunk=20000, hist=None):
+    """
+    Гистограмма точек над горизонтом для спутников на [t_start, t_end] с
+    шагом step (с); моменты обрабатываются блоками по chunk.
+    """
+    from skyfield.nutationlib import iau2000b_radians
+
+    if hist is None:
+        hist = SkyHistogram(step=step)
+    n = int((t_end.tt - t_start.tt) * 86400 // step) + 1
+    for k0 in range(0, n, chunk):
+        times = ts.tt_jd(t_start.tt + np.arange(k0, min(n, k0 + chunk)) * step / 86400)
+        # Сокращённая нутация: точности карты хватает с большим запасом
+        times._nutation_angles_radians = iau2000b_radians(times)
+        for satellite in satellites:
+            az, alt = TLE.sky_track(satellite, observer, times)
+            with stage('histogram'):
+                hist.add(az, alt)
+    return hist
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Карта занятости неба над Долгопрудным")
+    parser.add_argument('--start', default='2026-01-01', help="начало окна, ГГГГ-ММ-ДД")
+    parser.add_argument('--days', type=float, default=30, help="длительность окна, сут")
+    parser.add_argument('--tle', help="файл TLE (по умолчанию - NOAA 19 из TLE.py)")
+    parser.add_argument('--step', type=float, default=30.0, help="шаг выборки, с")
+    parser.add_argument('--d-az', type=float, default=5.0, help="ширина ячейки по азимуту, °")
+    parser.add_argument('--d-alt', type=float, default=3.0, help="ширина ячейки по высоте, °")
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    ts, satellite, observer = TLE.setup()
+    if args.tle:
+        from visibility import load_satellites
+        satellites = load_satellites(ts, args.tle)
+    else:
+        satellites = [satellite]
+    t_start = TLE._utc(ts, args.start)
+    t_end = ts.tt_jd(t_start.tt + args.days)
+    hist = accumulate(satellites, observer, ts, t_start, t_end, args.step,
+                      hist=SkyHistogram(args.d_az, args.d_alt, args.step))
+
+    if args.no_plot:
+        az_c = (hist.az_edges[:-1] + hist.az_edges[1:]) / 2
+        alt_c = (hist.alt_edges[:-1] + hist.alt_edges[1:]) / 2
+        i, j = np.nonzero(hist.counts)
+        cells = {'az': az_c[i], 'alt': alt_c[j], 'minutes': hist.minutes()[i, j]}
+        if args.format == 'csv':
+            write_result(cells, 'csv', args.output)
+        else:
+            write_result({'samples': hist.total, 'step': args.step, 'cells': cells}, 'json', args.output)
+        return 0
+
+    import matplotlib.pyplot as plt
+    hist.plot(title=f'Занятость неба за {args.days:g} сут: {hist.total * args.step / 3600:.1f} ч над горизонтом')
+    plt.show()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
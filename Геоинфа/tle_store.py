@@ -0,0 +1,161 @@
+"""
+Локальная история TLE: наборы элементов по номеру NORAD и эпохе.
+
+Файлы TLE (по две или три строки на набор, любые эпохи и спутники вперемешку)
+добавляются методом ingest; для каждого спутника эпохи хранятся
+отсортированным списком, поэтому поиск ближайшей эпохи - бинарный поиск,
+O(log n) при любой длине истории. Повторяющиеся эпохи отбрасываются.
+
+Для прогноза на интервале segments() делит его на отрезки, на каждом из
+которых используется набор с ближайшей эпохой (границы - середины между
+соседними эпохами).
+
+Пример:
+    history = TLEHistory.from_files(['noaa19_2025.tle', 'noaa19_2026.tle'])
+    l1, l2 = history.nearest(33591, jd)
+    for jd0, jd1, l1, l2 in history.segments(33591, jd_start, jd_end): ...
+"""
+import bisect
+import os
+from collections import namedtuple
+import numpy as np
+
+Segment = namedtuple('Segment', 'jd_start jd_end line1 line2')
+
+
+def tle_epoch_jd(line1):
+    """Эпоха набора (юлианская дата UTC) по первой строке TLE"""
+    year = int(line1[18:20])
+    year += 2000 if year < 57 else 1900
+    day = float(line1[20:32])       # день года, 1.0 - полночь 1 января
+    return _jd_jan1(year) - 1 + day
+
+
+def _jd_jan1(year):
+    """Юлианская дата 1 января года year, 0h UTC (григорианский календарь)"""
+    y = year + 4799                 # год от -4800 с началом в марте
+    jdn = 1 + (153 * 10 + 2) // 5 + 365 * y + y // 4 - y // 100 + y // 400 - 32045
+    return jdn - 0.5
+
+
+def parse_tle_lines(lines):
+    """Пары строк (line1, line2) из текста TLE; строки имён пропускаются"""
+    lines = [line.rstrip() for line in lines if line.strip()]
+    pairs = []
+    k = 0
+    while k < len(lines) - 1:
+        if lines[k].startswith('1 ') and lines[k + 1].startswith('2 '):
+            pairs.append((lines[k], lines[k + 1]))
+            k += 2
+        else:
+            k += 1
+    return pairs
+
+
+class TLEHistory:
+    """История наборов элементов: {NORAD: отсортированные эпохи и строки}"""
+
+    def __init__(self):
+        self._epochs = {}     # NORAD -> список эпох (юлианские даты), по возрастанию
+        self._lines = {}      # NORAD -> список пар строк в том же порядке
+        self.names = {}       # NORAD -> имя из трёхстрочного формата, если было
+
+    @classmethod
+    def from_files(cls, paths):
+        history = cls()
+        for path in paths:
+            history.ingest(path)
+        return history
+
+    def ingest(self, source):
+        """
+        Добавление наборов из файла (путь) или из последовательности строк.
+        Возвращает число новых наборов.
+        """
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        else:
+            lines = list(source)
+        self._read_names(lines)
+        added = 0
+        grouped = {}
+        for l1, l2 in parse_tle_lines(lines):
+            grouped.setdefault(int(l1[2:7]), []).append((tle_epoch_jd(l1), l1, l2))
+        for norad, entries in grouped.items():
+            epochs = self._epochs.setdefault(norad, [])
+            pairs = self._lines.setdefault(norad, [])
+            if len(entries) > 64 or (epochs and entries[0][0] < epochs[-1]):
+                # Большая партия или эпохи не по порядку: слияние и одна сортировка
+                merged = {e: (l1, l2) for e, (l1, l2) in zip(epochs, pairs)}
+                before = len(merged)
+                for epoch, l1, l2 in entries:
+                    merged.setdefault(epoch, (l1, l2))
+                added += len(merged) - before
+                order = sorted(merged)
+                epochs[:] = order
+                pairs[:] = [merged[e] for e in order]
+                continue
+            for epoch, l1, l2 in entries:
+                i = bisect.bisect_left(epochs, epoch)
+                if i < len(epochs) and epochs[i] == epoch:
+                    continue
+                epochs.insert(i, epoch)
+                pairs.insert(i, (l1, l2))
+                added += 1
+        return added
+
+    def _read_names(self, lines):
+        for k in range(len(lines) - 1):
+            if lines[k + 1].startswith('1 ') and not lines[k].startswith(('1 ', '2 ')) and lines[k].strip():
+                self.names.setdefault(int(lines[k + 1][2:7]), lines[k].strip().lstrip('0 ').strip())
+
+    def satellites(self):
+        return sorted(self._epochs)
+
+    def epochs(self, norad):
+        """Эпохи спутника (юлианские даты) массивом"""
+        return np.array(self._epochs[norad])
+
+    def __len__(self):
+        return sum(len(e) for e in self._epochs.values())
+
+    def nearest_index(self, norad, jd):
+        """Номер набора с ближайшей к jd эпохой (бинарный поиск)"""
+        epochs = self._epochs.get(norad)
+        if not epochs:
+            raise KeyError(f"Нет наборов элементов для NORAD {norad}")
+        i = bisect.bisect_left(epochs, jd)
+        if i == len(epochs) or i > 0 and jd - epochs[i - 1] <= epochs[i] - jd:
+            i -= 1
+        return i
+
+    def nearest(self, norad, jd):
+        """Строки TLE с ближайшей к jd эпохой"""
+        return self._lines[norad][self.nearest_index(norad, jd)]
+
+    def segments(self, norad, jd_start, jd_end):
+        """
+        Деление [jd_start, jd_end] на отрезки с ближайшим по эпохе набором
+        на каждом: список Segment(jd_start, jd_end, line1, line2).
+        """
+        epochs = self._epochs[norad]
+        first = self.nearest_index(norad, jd_start)
+        last = self.nearest_index(norad, jd_end)
+        out = []
+        for i in range(first, last + 1):
+            lo = jd_start if i == first else (epochs[i - 1] + epochs[i]) / 2
+            hi = jd_end if i == last else (epochs[i] + epochs[i + 1]) / 2
+            if hi > lo:
+                out.append(Segment(lo, hi, *self._lines[norad][i]))
+        return out
+
+    def save(self, path):
+        """Запись всей истории одним файлом TLE (по спутникам и эпохам)"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for norad in self.satellites():
+                name = self.names.get(norad)
+                for l1, l2 in self._lines[norad]:
+                    if name:
+                        f.write(name + '\n')
+                    f.write(l1 + '\n' + l2 + '\n')
@@ -0,0 +1,264 @@
+"""
+Хранилище длинных траекторий на диске: блоки строк, сжатие zlib, ленивое
+чтение.
+
+Хранилище - каталог с файлом meta.json и по одному файлу <столбец>.bin на
+столбец (t, r, v, ...). Строки пишутся блоками по chunk_rows; при сжатии
+каждый блок столбца сжимается отдельно, и при чтении распаковываются только
+затронутые блоки. Без сжатия файл столбца - сплошной массив, который
+отображается в память (np.memmap) целиком.
+
+h5py и zarr не используются: формат собран из numpy и zlib стандартной
+библиотеки и читается без дополнительных зависимостей.
+
+Пример:
+    with TrajectoryWriter('comet.traj', {'t': (), 'r': (3,), 'v': (3,)},
+                          precision='float32') as w:
+        w.append(t=t_block, r=r_block, v=v_block)
+    store = open_trajectory('comet.traj')
+    r = store['r'][::100]          # читаются только нужные блоки
+"""
+import json
+import os
+import zlib
+from collections import OrderedDict
+import numpy as np
+
+META_FILE = 'meta.json'
+FORMAT_VERSION = 1
+
+# Время хранится в float64 всегда: в float32 секунды порядка 1e9 теряют точность
+TIME_COLUMNS = ('t',)
+
+
+class TrajectoryWriter:
+    """
+    Запись траектории блоками.
+
+    columns: {имя: форма одной строки}, например {'t': (), 'r': (3,)}
+    precision: 'float64' или 'float32' (кроме столбцов времени)
+    compression: 'zlib' или None (без сжатия - файлы отображаются в память)
+    """
+
+    def __init__(self, path, columns, precision='float64', chunk_rows=65536,
+                 compression='zlib', level=4, attrs=None):
+        if precision not in ('float64', 'float32'):
+            raise ValueError(f"Неизвестная точность: {precision}")
+        if compression not in ('zlib', None):
+            raise ValueError(f"Неизвестное сжатие: {compression}")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.chunk_rows = int(chunk_rows)
+        self.compression = compression
+        self.level = level
+        self.columns = {
+            name: {'dtype': np.dtype('float64' if name in TIME_COLUMNS else precision).str,
+                   'shape': list(shape)}
+            for name, shape in columns.items()
+        }
+        self.attrs = dict(attrs or {})
+        self.chunks = []
+        self._buffer = {name: [] for name in columns}
+        self._buffered = 0
+        self._files = {name: open(os.path.join(path, name + '.bin'), 'wb') for name in columns}
+        self.rows = 0
+
+    def append(self, **arrays):
+        """Добавление строк: все столбцы сразу, одинаковой длины"""
+        if set(arrays) != set(self.columns):
+            raise ValueError(f"Ожидались столбцы {sorted(self.columns)}, получены {sorted(arrays)}")
+        n = None
+        for name, values in arrays.items():
+            spec = self.columns[name]
+            values = np.asarray(values, dtype=spec['dtype']).reshape((-1,) + tuple(spec['shape']))
+            if n is None:
+                n = len(values)
+            elif len(values) != n:
+                raise ValueError("Столбцы разной длины")
+            self._buffer[name].append(values)
+        self._buffered += n
+        while self._buffered >= self.chunk_rows:
+            self._flush(self.chunk_rows)
+
+    def _flush(self, rows):
+        """Запись первых rows строк буфера одним блоком"""
+        entry = {'rows': rows, 'offsets': {}}
+        for name, parts in self._buffer.items():
+            data = np.concatenate(parts) if len(parts) > 1 else parts[0]
+            block, rest = data[:rows], data[rows:]
+            self._buffer[name] = [rest] if len(rest) else []
+            raw = np.ascontiguousarray(block).tobytes()
+            if self.compression == 'zlib':
+                raw = zlib.compress(raw, self.level)
+            f = self._files[name]
+            entry['offsets'][name] = [f.tell(), len(raw)]
+            f.write(raw)
+            f.flush()
+        self._buffered -= rows
+        self.rows += rows
+        self.chunks.append(entry)
+        # Оглавление обновляется после каждого блока: прерванный расчёт читается
+        self._write_meta()
+
+    def _write_meta(self):
+        meta = {'version': FORMAT_VERSION, 'compression': self.compression,
+                'chunk_rows': self.chunk_rows, 'rows': self.rows, 'columns': self.columns,
+                'chunks': self.chunks, 'attrs': self.attrs}
+        tmp = os.path.join(self.path, META_FILE + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(self.path, META_FILE))
+
+    def close(self):
+        if self._files is None:
+            return
+        if self._buffered:
+            self._flush(self._buffered)
+        else:
+            self._write_meta()
+        for f in self._files.values():
+            f.close()
+        self._files = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class Column:
+    """
+    Столбец хранилища с ленивым чтением: индексация строк (число, срез,
+    массив индексов, кортеж с индексами по остальным осям) распаковывает
+    только нужные блоки. np.asarray(column) читает столбец целиком.
+    """
+
+    def __init__(self, store, name, cache_size=4):
+        self.store = store
+        self.name = name
+        spec = store.meta['columns'][name]
+        self.dtype = np.dtype(spec['dtype'])
+        self.row_shape = tuple(spec['shape'])
+        self.shape = (store.rows,) + self.row_shape
+        self.ndim = len(self.shape)
+        self._path = os.path.join(store.path, name + '.bin')
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._memmap = None
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return f"Column({self.name!r}, shape={self.shape}, dtype={self.dtype})"
+
+    def _chunk(self, k):
+        """Распакованный блок k (с небольшим кэшем последних блоков)"""
+        if k in self._cache:
+            self._cache.move_to_end(k)
+            return self._cache[k]
+        entry = self.store.meta['chunks'][k]
+        offset, nbytes = entry['offsets'][self.name]
+        with open(self._path, 'rb') as f:
+            f.seek(offset)
+            raw = zlib.decompress(f.read(nbytes))
+        block = np.frombuffer(raw, dtype=self.dtype).reshape((entry['rows'],) + self.row_shape)
+        self._cache[k] = block
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return block
+
+    def _mapped(self):
+        if self._memmap is None:
+            self._memmap = np.memmap(self._path, dtype=self.dtype, mode='r', shape=self.shape)
+        return self._memmap
+
+    def _rows(self, index):
+        """Строки по индексу первой оси"""
+        if self.store.meta['compression'] is None:
+            return np.asarray(self._mapped()[index])
+        n = len(self)
+        if isinstance(index, (int, np.integer)):
+            i = index + n if index < 0 else index
+            if not 0 <= i < n:
+                raise IndexError(index)
+            k = np.searchsorted(self.store.starts, i, side='right') - 1
+            return self._chunk(k)[i - self.store.starts[k]].copy()
+        if isinstance(index, slice):
+            index = np.arange(*index.indices(n))
+        index = np.asarray(index)
+        if index.dtype == bool:
+            index = np.flatnonzero(index)
+        index = np.where(index < 0, index + n, index)
+        out = np.empty((len(index),) + self.row_shape, dtype=self.dtype)
+        if not len(index):
+            return out
+        chunk_of = np.searchsorted(self.store.starts, index, side='right') - 1
+        for k in np.unique(chunk_of):
+            sel = chunk_of == k
+            out[sel] = self._chunk(k)[index[sel] - self.store.starts[k]]
+        return out
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            rows = self._rows(key[0])
+            if isinstance(key[0], (int, np.integer)):
+                return rows[key[1:]]
+            return rows[(slice(None),) + key[1:]]
+        return self._rows(key)
+
+    def __array__(self, dtype=None, copy=None):
+        data = self._rows(slice(None))
+        return data if dtype is None else data.astype(dtype)
+
+    def iter_chunks(self):
+        """Последовательный обход столбца блоками хранилища (постоянная память)"""
+        for k, (i0, i1) in enumerate(zip(self.store.starts[:-1], self.store.starts[1:])):
+            if self.store.meta['compression'] is None:
+                yield np.asarray(self._mapped()[i0:i1])
+            else:
+                yield self._chunk(k)
+
+
+class TrajectoryStore:
+    """Открытое хранилище: столбцы по имени (store['r']), атрибуты в store.attrs"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META_FILE), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия хранилища: {self.meta.get('version')}")
+        self.rows = self.meta['rows']
+        self.attrs = self.meta.get('attrs', {})
+        self.starts = np.concatenate([[0], np.cumsum([c['rows'] for c in self.meta['chunks']])]).astype(int)
+        self._columns = {}
+
+    def __getitem__(self, name):
+        if name not in self.meta['columns']:
+            raise KeyError(f"Нет столбца {name}; есть: {', '.join(self.meta['columns'])}")
+        if name not in self._columns:
+            self._columns[name] = Column(self, name)
+        return self._columns[name]
+
+    def __contains__(self, name):
+        return name in self.meta['columns']
+
+    def keys(self):
+        return list(self.meta['columns'])
+
+    def __len__(self):
+        return self.rows
+
+    def nbytes(self):
+        """Размер на диске и без сжатия, байт"""
+        on_disk = sum(os.path.getsize(os.path.join(self.path, n + '.bin')) for n in self.keys())
+        raw = sum(self[n].dtype.itemsize * int(np.prod(self[n].shape)) for n in self.keys())
+        return on_disk, raw
+
+
+def open_trajectory(path):
+    """Ленивое открытие хранилища: данные читаются только при обращении"""
+    return TrajectoryStore(path)
@@ -0,0 +1,294 @@
+"""
+Оптически наблюдаемые пролёты: спутник над горизонтом и освещён Солнцем,
+а у наблюдателя Солнце ниже порога сумерек.
+
+Все условия вычисляются на одной сетке моментов для всего окна сразу:
+положение и поворот в горизонтальную систему наблюдателя и направление на
+Солнце считаются один раз и используются для всех спутников; для каждого
+спутника - один векторный вызов skyfield. Видимые участки - непрерывные
+серии точек сетки, где выполнены все условия.
+
+Положение Солнца по умолчанию - по формуле Астрономического ежегодника
+(точность ~0.01°, без файлов эфемерид); с --ephemeris - по эфемеридам JPL.
+
+Запуск:
+    python visibility.py [--start 2026-01-01 --days 30] [--tle каталог.tle]
+                         [--step 20] [--twilight -6] [--min-alt 10] [--no-plot] [--check]
+"""
+import argparse
+import os
+import sys
+from collections import namedtuple
+import numpy as np
+
+# Подключение общих модулей из корня репозитория
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from labkit.cli import add_output_arguments, write_result
+from labkit.profiling import profiled, stage
+
+import TLE
+
+AU_KM = 149597870.7
+EARTH_RADIUS_KM = 6378.137
+
+VisiblePass = namedtuple('VisiblePass', 'satellite start end max_alt start_az end_az')
+# Общие для всех спутников величины на сетке моментов
+Geometry = namedtuple('Geometry', 'times observer_km rotation sun_km sun_alt')
+
+
+def sun_position(times, ephemeris=None):
+    """
+    Геоцентрическое положение Солнца (GCRS, км), массив (3, N).
+    Без ephemeris - формула низкой точности с поправкой за прецессию к J2000.
+    """
+    if ephemeris is not None:
+        return (ephemeris['sun'] - ephemeris['earth']).at(times).position.km
+    n = times.tt - 2451545.0
+    g = np.radians(357.528 + 0.9856003 * n)
+    L = 280.460 + 0.9856474 * n
+    # Долгота в эклиптике даты, приведённая к равноденствию J2000
+    lam = np.radians(L + 1.915 * np.sin(g) + 0.020 * np.sin(2 * g) - 1.396971 * n / 36525)
+    eps = np.radians(23.4393)
+    R = (1.00014 - 0.01671 * np.cos(g) - 0.00014 * np.cos(2 * g)) * AU_KM
+    return np.array([R * np.cos(lam), R * np.cos(eps) * np.sin(lam), R * np.sin(eps) * np.sin(lam)])
+
+
+def sunlit(sat_km, sun_km):
+    """Освещённость спутника: вне цилиндрической тени Земли (массивы (3, N))"""
+    return shadow_margin(sat_km, sun_km) > 0
+
+
+def shadow_margin(sat_km, sun_km):
+    """
+    Непрерывная мера освещённости, км: положительна вне цилиндрической тени
+    (со стороны Солнца - расстояние вдоль оси тени, за Землёй - расстояние
+    от границы тени); нужна для уточнения моментов входа в тень.
+    """
+    s_hat = sun_km / np.linalg.norm(sun_km, axis=0)
+    along = np.sum(sat_km * s_hat, axis=0)
+    perp = np.linalg.norm(sat_km - along * s_hat, axis=0)
+    return np.maximum(along, perp - EARTH_RADIUS_KM)
+
+
+def _local(rotation, vec_km):
+    """Вектор в горизонтальной системе наблюдателя (x - север, y - восток, z - зенит)"""
+    return np.einsum('ij...,j...->i...', rotation, vec_km)
+
+
+def _alt_az(local):
+    dist = np.linalg.norm(local, axis=0)
+    alt = np.degrees(np.arcsin(local[2] / dist))
+    az = np.mod(np.degrees(np.arctan2(local[1], local[0])), 360)
+    return alt, az
+
+
+@profiled('geometry')
+def geometry(ts, observer, t_start, t_end, step=20.0, ephemeris=None):
+    """Сетка моментов с шагом step (с) и общие для всех спутников величины"""
+    n = int((t_end.tt - t_start.tt) * 86400 // step) + 1
+    times = ts.tt_jd(t_start.tt + np.arange(n) * step / 86400)
+    # Сокращённая теория нутации IAU2000B (ошибка ~1 мсек дуги) вместо полной
+    # 2000A - основная часть времени на длинных сетках (см. документацию skyfield)
+    from skyfield.nutationlib import iau2000b_radians
+    times._nutation_angles_radians = iau2000b_radians(times)
+    rotation = observer.rotation_at(times)
+    # В горизонтальной системе положение наблюдателя постоянно: поворот одного
+    # вектора назад в GCRS заметно быстрее, чем observer.at() для всей сетки
+    local = rotation[:, :, 0] @ observer.at(times[0]).position.km
+    observer_km = np.einsum('ji...,j->i...', rotation, local)
+    sun_km = sun_position(times, ephemeris)
+    sun_alt, _ = _alt_az(_local(rotation, sun_km - observer_km))
+    return Geometry(times, observer_km, rotation, sun_km, sun_alt)
+
+
+def _margins(alt, sat_km, geo, idx, twilight, min_alt):
+    """Запасы по условиям видимости в точках idx (положительны, если условие выполнено)"""
+    return np.stack([alt[idx] - min_alt, twilight - geo.sun_alt[idx],
+                     shadow_margin(sat_km[:, idx], geo.sun_km[:, idx])])
+
+
+def _crossing(before, after):
+    """
+    Доля шага до смены знака запасов при линейной интерполяции: (условия, N).
+    Для условий без смены знака - NaN.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        frac = before / (before - after)
+    return np.where((before > 0) != (after > 0), frac, np.nan)
+
+
+def _refine(margins_at, n, starts, ends):
+    """
+    Уточнение границ видимых серий линейной интерполяцией запасов по
+    условиям (margins_at(idx) -> (условия, len(idx))) между соседними точками
+    сетки: начало - последнее из выполнившихся условий, конец - первое
+    нарушенное. Возвращает для начал и концов номер точки сетки слева и долю
+    шага до границы; на краях сетки граница остаётся в точке сетки.
+    """
+    i_start, f_start = starts.copy(), np.zeros(len(starts))
+    inner = starts > 0
+    if inner.any():
+        i = starts[inner]
+        frac = _crossing(margins_at(i - 1), margins_at(i))
+        i_start[inner] = i - 1
+        f_start[inner] = np.max(np.nan_to_num(frac, nan=0.0), axis=0)
+    i_end, f_end = ends.copy(), np.zeros(len(ends))
+    inner = ends < n - 1
+    if inner.any():
+        i = ends[inner]
+        frac = _crossing(margins_at(i), margins_at(i + 1))
+        f_end[inner] = np.min(np.nan_to_num(frac, nan=1.0), axis=0)
+    return i_start, f_start, i_end, f_end
+
+
+def _runs(mask):
+    """Начала и концы (включительно) серий True в булевом массиве"""
+    padded = np.concatenate([[False], mask, [False]])
+    edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+    return edges[::2], edges[1::2] - 1
+
+
+@profiled('visible_passes')
+def visible_passes(satellite, geo, twilight=-6.0, min_alt=10.0):
+    """
+    Видимые участки пролётов одного спутника на сетке geo: список VisiblePass
+    с моментами skyfield начала и конца, наибольшей высотой и азимутами.
+    Серии точек сетки уточняются до моментов смены условий между точками
+    (см. _refine), так что и серия из одной точки имеет длительность.
+    """
+    with stage('sgp4'):
+        sat_km = satellite.at(geo.times).position.km
+    local = _local(geo.rotation, sat_km - geo.observer_km)
+    alt, _ = _alt_az(local)
+    visible = (alt > min_alt) & (geo.sun_alt < twilight)
+    # Освещённость проверяется только там, где спутник над горизонтом в темноте
+    idx = np.flatnonzero(visible)
+    visible[idx] = sunlit(sat_km[:, idx], geo.sun_km[:, idx])
+    starts, ends = _runs(visible)
+    name = getattr(satellite, 'name', '')
+    if not len(starts):
+        return []
+    n = len(geo.times)
+    i_start, f_start, i_end, f_end = _refine(
+        lambda idx: _margins(alt, sat_km, geo, idx, twilight, min_alt), n, starts, ends)
+    # Момент и направление на границе - интерполяция между соседними точками
+    tt = geo.times.tt
+
+    def at(i, f):
+        j = np.minimum(i + 1, n - 1)
+        vec = local[:, i] * (1 - f) + local[:, j] * f
+        edge_alt, edge_az = _alt_az(vec)
+        return geo.times.ts.tt_jd(tt[i] * (1 - f) + tt[j] * f), edge_alt, edge_az
+
+    t0, alt0, az0 = at(i_start, f_start)
+    t1, alt1, az1 = at(i_end, f_end)
+    return [VisiblePass(name, t0[k], t1[k], float(max(alt[i0:i1 + 1].max(), alt0[k], alt1[k])),
+                        float(az0[k]), float(az1[k]))
+            for k, (i0, i1) in enumerate(zip(starts, ends))]
+
+
+def visible_passes_many(satellites, geo, twilight=-6.0, min_alt=10.0):
+    """Видимые участки для списка спутников на общей сетке, по времени начала"""
+    out = []
+    for satellite in satellites:
+        out.extend(visible_passes(satellite, geo, twilight, min_alt))
+    out.sort(key=lambda p: p.start.tt)
+    return out
+
+
+def check(ts, satellite, observer, geo, n=20, tol=1e-3):
+    """
+    Сверка высоты и азимута спутника на n моментах сетки geo с
+    (satellite - observer).at(t).altaz() skyfield; наибольшие отклонения, °.
+    """
+    idx = np.linspace(0, len(geo.times) - 1, n).astype(int)
+    times = geo.times[idx]
+    sat_km = satellite.at(times).position.km
+    alt, az = _alt_az(_local(geo.rotation[:, :, idx], sat_km - geo.observer_km[:, idx]))
+    ref_alt, ref_az, _ = (satellite - observer).at(times).altaz()
+    d_alt = float(np.max(np.abs(alt - ref_alt.degrees)))
+    d_az = float(np.max(np.abs((az - ref_az.degrees + 180) % 360 - 180)))
+    if d_alt > tol or d_az > tol:
+        raise AssertionError(f"Расхождение со skyfield: высота {d_alt:.2e}°, азимут {d_az:.2e}°")
+    return d_alt, d_az
+
+
+def load_satellites(ts, path):
+    """Спутники skyfield из файла TLE"""
+    from skyfield.api import EarthSatellite
+    from tle_store import parse_tle_lines
+
+    with open(path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    names = {}
+    for k in range(len(lines) - 1):
+        if lines[k + 1].startswith('1 ') and not lines[k].startswith(('1 ', '2 ')):
+            names[lines[k + 1]] = lines[k].strip()
+    return [EarthSatellite(l1, l2, names.get(l1, l1[2:7]), ts) for l1, l2 in parse_tle_lines(lines)]
+
+
+@profiled('plot')
+def plot_passes(passes, geo, satellites):
+    """Видимые участки на полярной диаграмме неба"""
+    import matplotlib.pyplot as plt
+
+    by_name = {s.name: s for s in satellites}
+    fig, ax = plt.subplots(subplot_kw={'projection': 'polar'})
+    ax.set_theta_zero_location('N')
+    ax.set_theta_direction(-1)
+    ax.set_ylim(90, 0)
+    ax.set_yticks(range(0, 91, 30))
+    t_all = geo.times.tt
+    for p in passes:
+        i0, i1 = np.searchsorted(t_all, [p.start.tt, p.end.tt])
+        sat_km = by_name[p.satellite].at(geo.times[i0:i1 + 1]).position.km
+        alt, az = _alt_az(_local(geo.rotation[:, :, i0:i1 + 1], sat_km - geo.observer_km[:, i0:i1 + 1]))
+        ax.plot(np.radians(az), alt, linewidth=1)
+    ax.set_title(f'Видимые пролёты: {len(passes)}', fontsize=10)
+    plt.show()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Оптически наблюдаемые пролёты над Долгопрудным")
+    parser.add_argument('--start', default='2026-01-01', help="начало окна, ГГГГ-ММ-ДД")
+    parser.add_argument('--days', type=float, default=30, help="длительность окна, сут")
+    parser.add_argument('--tle', help="файл TLE (по умолчанию - NOAA 19 из TLE.py)")
+    parser.add_argument('--step', type=float, default=20.0, help="шаг сетки, с")
+    parser.add_argument('--twilight', type=float, default=-6.0, help="высота Солнца у наблюдателя, не выше, °")
+    parser.add_argument('--min-alt', type=float, default=10.0, help="минимальная высота спутника, °")
+    parser.add_argument('--ephemeris', help="файл эфемерид JPL (.bsp) для положения Солнца")
+    parser.add_argument('--check', action='store_true', help="сверка высоты и азимута со skyfield")
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    ts, satellite, observer = TLE.setup()
+    satellites = load_satellites(ts, args.tle) if args.tle else [satellite]
+    ephemeris = None
+    if args.ephemeris:
+        from skyfield.api import load
+        ephemeris = load(args.ephemeris)
+    t_start = TLE._utc(ts, args.start)
+    t_end = ts.tt_jd(t_start.tt + args.days)
+    geo = geometry(ts, observer, t_start, t_end, args.step, ephemeris)
+    if args.check:
+        for s in satellites:
+            d_alt, d_az = check(ts, s, observer, geo)
+            print(f"{s.name}: отклонение высоты {d_alt:.1e}°, азимута {d_az:.1e}°")
+        return 0
+    passes = visible_passes_many(satellites, geo, args.twilight, args.min_alt)
+
+    records = [{'satellite': p.satellite, 'start': p.start.utc_iso(), 'end': p.end.utc_iso(),
+                'duration_s': round((p.end.tt - p.start.tt) * 86400), 'max_alt': p.max_alt,
+                'start_az': p.start_az, 'end_az': p.end_az} for p in passes]
+    if args.no_plot:
+        write_result(records, args.format, args.output)
+        return 0
+    for rec in records:
+        print(f"{rec['satellite']:>12s}  {rec['start']} - {rec['end']}  "
+              f"{rec['duration_s']:4d} с, макс. высота {rec['max_alt']:5.1f}°")
+    plot_passes(passes, geo, satellites)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,38 +1,43 @@
+import os
+import sys
 import matplotlib.pyplot as plt
 import numpy as np
 
-# Данные
-Q1 = [0.60, 1.41, 2.13, 2.94, 3.63, 4.38, 4.80, 5.60, 6.00, 6.40, 7.02, 8.40, 9.00, 9.51, 10.05, 10.74, 11.49, 12.84]
-P1 = [3, 6, 9, 12, 15, 18, 20, 25, 30, 35, 40, 50, 60, 70, 80, 90, 100, 110]
+# Подключение общих модулей из корня репозитория
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+from labkit.datasets import open_store
+from labkit.regression import pad_series, segmented_fit
 
-Q2 = [0.38, 0.63, 0.90, 1.14, 1.32, 1.56, 1.77, 2.22, 2.55, 2.82, 3.06, 3.42, 3.68, 3.92, 4.12, 4.32, 4.50]
-P2 = [10, 15, 20, 25, 30, 35, 40, 50, 60, 70, 80, 90, 100, 110, 120, 130, 140]
-
-Q3 = [0.66, 1.05, 1.47, 1.83, 2.22, 2.58, 2.97, 3.66, 4.44, 5.04, 5.61, 6.00, 6.24, 6.42]
-P3 = [10, 15, 20, 25, 30, 35, 40, 50, 60, 70, 80, 90, 100, 110]
+# Данные - из хранилища измерений лабораторной работы (data.npz)
+store = open_store(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data.npz'))
+tubes = [store.load(f'tube{i}') for i in (1, 2, 3)]
 
 # Погрешности
-sigma_Q = 0.03  # л/мин
-sigma_P = 1     # деление
+sigma_Q = tubes[0].error('Q')  # л/мин
+sigma_P = tubes[0].error('P')  # деление
 
 # Цвета и маркеры
 colors = ['blue', 'red', 'green']
 markers = ['o', 's', '^']
 labels = ['Трубка 1 (d=5.1 мм)', 'Трубка 2 (d=3.95 мм)', 'Трубка 3 (d=3.0 мм)']
 
-datasets = [(P1, Q1), (P2, Q2), (P3, Q3)]
+datasets = [(tube['P'], tube['Q']) for tube in tubes]
+
+# Граница ламинарного участка ищется для всех трубок сразу:
+# двухсегментная МНК-аппроксимация с оптимальной точкой разбиения
+seg = segmented_fit(pad_series([P for P, Q in datasets]), pad_series([Q for P, Q in datasets]))
 
 plt.figure(figsize=(12, 8))
 
 for i, (P, Q) in enumerate(datasets):
-    # Берём первые 8 точек для ламинарного участка
-    P_lam = P[:8]
-    Q_lam = Q[:8]
+    # Ламинарный участок - точки до найденной границы
+    n_lam = seg.splits[i, 0]
     
-    # Линейная регрессия (МНК) по первым 8 точкам
-    coeffs = np.polyfit(P_lam, Q_lam, 1)
-    a, b = coeffs
-    print(f"{labels[i]} (ламинарный участок, 8 точек): Q = {a:.4f} * P + {b:.4f}")
+    # Линейная регрессия (МНК) по ламинарному участку
+    a, b = seg.b[i, 0], seg.a[i, 0]  # наклон и свободный член, как у np.polyfit
+    print(f"{labels[i]} (ламинарный участок, {n_lam} точек): Q = {a:.4f} * P + {b:.4f}")
+    print(f"  Турбулентный участок: Q = {seg.b[i, 1]:.4f} * P + {seg.a[i, 1]:.4f}")
+    print(f"  Критическая точка: ΔP = {seg.x_break[i, 0]:.1f} дел, Q = {seg.y_break[i, 0]:.2f} л/мин")
     
     # Построение всех точек с погрешностями
     plt.errorbar(P, Q, xerr=sigma_P, yerr=sigma_Q,
@@ -1,17 +1,19 @@
+import os
+import sys
 import matplotlib.pyplot as plt
 import numpy as np
 
-# Данные для трубки 1 (кумулятивные длина и перепад давления)
-l1 = [10.7, 40.7, 80.7, 130.7]
-dp1 = [17, 32, 47, 67]
-
-# Данные для трубки 2
-l2 = [11, 31, 61]
-dp2 = [72, 56 + 72, 60 + 56 + 72]  # = [72, 128, 188]
-
-# Данные для трубки 3
-l3 = [10.9, 40.9, 80.9, 130.9]
-dp3 = [24, 29 + 24, 38 + 29 + 24, 45 + 38 + 29 + 24]  # = [24, 53, 91, 136]
+# Подключение общих модулей из корня репозитория
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+from labkit.datasets import open_store
+
+# Данные - из хранилища измерений лабораторной работы (data.npz):
+# кумулятивные длина и перепад давления для каждой трубки
+store = open_store(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data.npz'))
+length1, length2, length3 = (store.load(f'length{i}') for i in (1, 2, 3))
+l1, dp1 = length1['l'], length1['dp']
+l2, dp2 = length2['l'], length2['dp']
+l3, dp3 = length3['l'], length3['dp']
 
 def plot_with_regression(l, dp, title, xlabel, ylabel, color, marker_style):
     """
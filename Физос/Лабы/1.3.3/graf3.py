@@ -1,40 +1,42 @@
+import os
+import sys
 import matplotlib.pyplot as plt
 import numpy as np
 
-# Исходные данные по трём трубкам
+# Подключение общих модулей из корня репозитория
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+from labkit.datasets import open_store
+from labkit.interp import pack_tables, interp_tables
+from labkit.regression import batched_line_fit
+
+# Исходные данные по трём трубкам - из хранилища измерений (data.npz)
+store = open_store(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data.npz'))
+tubes = [store.load(f'tube{i}') for i in (1, 2, 3)]
+
 # Радиусы в мм (для логарифмического масштаба можно оставить в мм)
-R_mm = np.array([2.55, 1.5, 1.975])   # трубки 1, 2, 3
-l_m = np.array([0.5, 0.3, 0.5])       # длины в метрах
+R_mm = np.array([tube.meta['R_mm'] for tube in tubes])   # трубки 1, 2, 3
+l_m = np.array([tube.meta['l_m'] for tube in tubes])     # длины в метрах
 
 # Экспериментальные таблицы Q(ΔP) для каждой трубки (л/мин, ΔP в делениях)
-# Трубка 1
-P1 = [3, 6, 9, 12, 15, 18, 20, 25, 30, 35, 40, 50, 60, 70, 80, 90, 100, 110]
-Q1 = [0.60, 1.41, 2.13, 2.94, 3.63, 4.38, 4.80, 5.60, 6.00, 6.40, 7.02, 8.40, 9.00, 9.51, 10.05, 10.74, 11.49, 12.84]
-
-# Трубка 2
-P2 = [10, 15, 20, 25, 30, 35, 40, 50, 60, 70, 80, 90, 100, 110, 120, 130, 140]
-Q2 = [0.38, 0.63, 0.90, 1.14, 1.32, 1.56, 1.77, 2.22, 2.55, 2.82, 3.06, 3.42, 3.68, 3.92, 4.12, 4.32, 4.50]
-
-# Трубка 3
-P3 = [10, 15, 20, 25, 30, 35, 40, 50, 60, 70, 80, 90, 100, 110]
-Q3 = [0.66, 1.05, 1.47, 1.83, 2.22, 2.58, 2.97, 3.66, 4.44, 5.04, 5.61, 6.00, 6.24, 6.42]
-
-# Функция линейной интерполяции с экстраполяцией по двум ближайшим точкам
-def interp_linear(x, xp, yp):
-    if x <= xp[0]:
-        # Экстраполяция влево по первым двум точкам
-        x1, x2 = xp[0], xp[1]
-        y1, y2 = yp[0], yp[1]
-    elif x >= xp[-1]:
-        # Экстраполяция вправо по последним двум точкам
-        x1, x2 = xp[-2], xp[-1]
-        y1, y2 = yp[-2], yp[-1]
-    else:
-        # Интерполяция между соседними
-        idx = np.searchsorted(xp, x)
-        x1, x2 = xp[idx-1], xp[idx]
-        y1, y2 = yp[idx-1], yp[idx]
-    return y1 + (x - x1) * (y2 - y1) / (x2 - x1)
+(P1, Q1), (P2, Q2), (P3, Q3) = [(tube['P'], tube['Q']) for tube in tubes]
+
+# Таблицы Q(ΔP) всех трубок, упакованные для векторной интерполяции
+# (линейная интерполяция, за пределами таблицы - экстраполяция по двум крайним точкам)
+tables = pack_tables([(P1, Q1), (P2, Q2), (P3, Q3)])
+
+
+def beta_sweep(lam):
+    """
+    Показатель β в зависимости Q ∝ R^β для каждого значения градиента λ (дел/м).
+    Q всех трубок интерполируется сразу для всей сетки λ, а прямые
+    ln Q = ln C + β ln R для всех λ решаются одной пачкой.
+    Возвращает β и его погрешность (по разбросу точек относительно прямой).
+    """
+    lam = np.asarray(lam, dtype=float)
+    Q = interp_tables(lam[:, None] * l_m, tables)            # (число λ, трубки)
+    ln_R_all = np.broadcast_to(np.log(R_mm), Q.shape)
+    _, beta, _, dbeta = batched_line_fit(ln_R_all, np.log(Q), full=True)
+    return beta, dbeta
 
 # Заданные значения градиента давления λ (дел/м)
 lam_lam = 30.0   # ламинарный режим
@@ -53,20 +55,7 @@ for i, (dP, tube) in enumerate(zip(dP_turb, ['Трубка1','Трубка2','Т
     print(f"  {tube}: ΔP = {dP:.1f} дел")
 
 # ---- Получение Q при этих ΔP с помощью интерполяции ----
-Q_lam = np.zeros(3)
-Q_turb = np.zeros(3)
-
-# Трубка 1
-Q_lam[0] = interp_linear(dP_lam[0], P1, Q1)
-Q_turb[0] = interp_linear(dP_turb[0], P1, Q1)
-
-# Трубка 2
-Q_lam[1] = interp_linear(dP_lam[1], P2, Q2)
-Q_turb[1] = interp_linear(dP_turb[1], P2, Q2)
-
-# Трубка 3
-Q_lam[2] = interp_linear(dP_lam[2], P3, Q3)
-Q_turb[2] = interp_linear(dP_turb[2], P3, Q3)
+Q_lam, Q_turb = interp_tables(np.stack([dP_lam, dP_turb]), tables)
 
 print("\nРасходы в л/мин:")
 print(f"Ламинарный режим: Q_lam = {Q_lam}")
@@ -129,3 +118,28 @@ print("\nПо трубкам 2 и 3:")
 beta_lam_23 = np.log(Q_lam[1]/Q_lam[2]) / np.log(R_mm[1]/R_mm[2])
 beta_turb_23 = np.log(Q_turb[1]/Q_turb[2]) / np.log(R_mm[1]/R_mm[2])
 print(f"  Ламинарный: β = {beta_lam_23:.3f}")
+
+# ---- β(λ) во всём диапазоне градиентов давления ----
+lam_sweep = np.linspace(10, 250, 4000)
+beta_curve, dbeta_curve = beta_sweep(lam_sweep)
+# Диапазон λ, в котором Q всех трубок получено интерполяцией, без экстраполяции
+lam_min = max(P[0] / l for P, l in zip((P1, P2, P3), l_m))
+lam_max = min(P[-1] / l for P, l in zip((P1, P2, P3), l_m))
+print(f"\nβ(λ): {len(lam_sweep)} значений λ от {lam_sweep[0]:.0f} до {lam_sweep[-1]:.0f} дел/м")
+print(f"  Интерполяция без экстраполяции при λ от {lam_min:.1f} до {lam_max:.1f} дел/м")
+
+plt.figure(figsize=(10, 6))
+plt.plot(lam_sweep, beta_curve, 'b-', label='β(λ)')
+plt.fill_between(lam_sweep, beta_curve - dbeta_curve, beta_curve + dbeta_curve,
+                 color='blue', alpha=0.2, label='±σ')
+plt.axhline(4, color='green', linestyle=':', label='Ламинарный режим (β = 4)')
+plt.axhline(2.5, color='red', linestyle=':', label='Турбулентный режим (β = 2.5)')
+plt.axvline(lam_min, color='gray', linestyle='--', linewidth=1)
+plt.axvline(lam_max, color='gray', linestyle='--', linewidth=1)
+plt.xlabel('λ, дел/м')
+plt.ylabel('β')
+plt.title('Показатель степени β в зависимости от градиента давления')
+plt.grid(True)
+plt.legend()
+plt.tight_layout()
+plt.show()
@@ -1,5 +1,11 @@
+import os
+import sys
 import matplotlib.pyplot as plt
 import numpy as np
+
+# Подключение общих модулей из корня репозитория
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+from labkit.datasets import open_store
 #погрешности (здесь они настолько малы, что не видны на графике)
 df = [1]*5
 dk = [0]*5
@@ -30,10 +36,11 @@ def dmnk(x,y,a,b):
 #f1 = [244, 494, 744, 992, 1238]
 #f1 = [248, 503, 756, 1007, 1257]
 #f1 = [251, 512, 768, 1023, 1277]
-f1 = [265, 519, 780, 1038, 1297] #пересчитанные данные с вольтметра (со 150 до 600)
-f1 = np.array(f1) #для дальнейшего удобства в массив numpy
-k1 = [1,2,3,4,5] #данные с амперметра
-k1 = np.array(k1) #так как изначально амперметр показал значение силы тока на параллельном соединении, а вольтметр на проволке, то пересчитаем силлу тока на проволке
+#f1 = [265, 519, 780, 1038, 1297] #пересчитанные данные с вольтметра (со 150 до 600)
+store = open_store(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data.npz'))
+resonance = store.load('resonance') #данные из хранилища измерений лабораторной работы (data.npz)
+f1 = np.array(resonance['f']) #для дальнейшего удобства в массив numpy
+k1 = np.array(resonance['k']) #так как изначально амперметр показал значение силы тока на параллельном соединении, а вольтметр на проволке, то пересчитаем силлу тока на проволке
 plt.errorbar(k1, f1, xerr=dk, yerr=df, fmt="o", color="r", capsize=0.1)#отображение точек с погрешностями (если увеличить график, то они все же будут видны)
 plt.title('График зависимости резонансной частоты от номера резонанса', fontsize=20)#добавляем название графику
 plt.xlabel("Номер резонанса", fontsize=20)
@@ -1,15 +1,20 @@
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 
-# Данные
-P = np.array([3.9, 4.1, 3.8, 4.2, 3.5, 3.0, 2.0])
-T = np.array([3.63636363636364, 3.83292383292383, 3.46437346437346,
-              3.95577395577396, 3.12039312039312, 2.57985257985258,
-              1.4987714987715])
-err_T = np.array([0.0759437123073487, 0.0773925589650405, 0.0746759714818683,
-                  0.0782980881260979, 0.0721404898309075, 0.0681561615222549,
-                  0.0601875049049496])
-err_P = 0.1  # погрешность давления (постоянная)
+# Подключение общих модулей из корня репозитория
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+from labkit.datasets import open_store
+from labkit.regression import york_fit
+
+# Данные - из хранилища измерений лабораторной работы (data.npz)
+store = open_store(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data.npz'))
+series = store.load('T20')
+P = series['P']            # перепад давления, атм
+T = series['T']            # изменение температуры, °C
+err_T = series['err_T']    # погрешности T
+err_P = series.error('P')  # погрешность давления (постоянная для всех точек)
 
 # Линейная регрессия (МНК)
 coeffs = np.polyfit(P, T, 1)
@@ -24,6 +29,12 @@ var_slope = s2 / np.sum((P - np.mean(P))**2)
 std_slope = np.sqrt(var_slope)
 print(f"Погрешность наклона: {std_slope:.4f} °C/атм")
 
+# Аппроксимация с учётом погрешностей по обеим осям (метод York)
+york = york_fit(P, T, err_P, err_T)
+print(f"York: наклон (μ) = {york.b:.4f} ± {york.sb:.4f} °C/атм")
+print(f"York: свободный член = {york.a:.4f} ± {york.sa:.4f} °C")
+print(f"York: приведённый хи-квадрат = {york.chi2_red:.2f}")
+
 # Построение графика
 plt.figure(figsize=(8,6))
 plt.errorbar(P, T, yerr=err_T, xerr=err_P, fmt='o', capsize=3, color='blue', markersize=6)
@@ -1,15 +1,20 @@
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 
-# Данные
-P = np.array([4.0, 3.7, 3.4, 3.1, 2.8, 2.5])          # перепад давления, атм
-T = np.array([3.37349397590361, 3.06024096385542,
-              2.72289156626506, 2.43373493975904,
-              2.04819277108434, 1.80722891566265])    # изменение температуры, °C
-err_T = np.array([0.0725794745246045, 0.0703149949194368,
-                  0.0678763245754101, 0.0657860357091015,
-                  0.0629989838873567, 0.0612570764987662])  # погрешности T
-err_P = 0.1  # погрешность давления (постоянная для всех точек)
+# Подключение общих модулей из корня репозитория
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+from labkit.datasets import open_store
+from labkit.regression import york_fit
+
+# Данные - из хранилища измерений лабораторной работы (data.npz)
+store = open_store(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data.npz'))
+series = store.load('T30')
+P = series['P']            # перепад давления, атм
+T = series['T']            # изменение температуры, °C
+err_T = series['err_T']    # погрешности T
+err_P = series.error('P')  # погрешность давления (постоянная для всех точек)
 
 # Линейная регрессия (МНК)
 coeffs = np.polyfit(P, T, 1)
@@ -24,6 +29,12 @@ var_slope = s2 / np.sum((P - np.mean(P))**2)
 std_slope = np.sqrt(var_slope)
 print(f"Погрешность наклона: {std_slope:.4f} °C/атм")
 
+# Аппроксимация с учётом погрешностей по обеим осям (метод York)
+york = york_fit(P, T, err_P, err_T)
+print(f"York: наклон (μ) = {york.b:.4f} ± {york.sb:.4f} °C/атм")
+print(f"York: свободный член = {york.a:.4f} ± {york.sa:.4f} °C")
+print(f"York: приведённый хи-квадрат = {york.chi2_red:.2f}")
+
 # Построение графика
 plt.figure(figsize=(8,6))
 plt.errorbar(P, T, yerr=err_T, xerr=err_P, fmt='o', capsize=3, color='blue', markersize=6)
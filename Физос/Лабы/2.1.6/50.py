@@ -1,15 +1,20 @@
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 
-# Данные
-P = np.array([4.0, 3.7, 3.4, 3.1, 2.8, 2.5])          # перепад давления, атм
-T = np.array([2.40566037735849, 2.02830188679245,
-              1.74528301886792, 1.4622641509434,
-              1.27358490566038, 1.0377358490566])     # изменение температуры, °C
-err_T = np.array([0.0641909932360271, 0.0615210039159843,
-                  0.0595185119259523, 0.0575160199359203,
-                  0.0561810252758989, 0.0545122819508722])  # погрешности T
-err_P = 0.1  # погрешность давления (постоянная для всех точек)
+# Подключение общих модулей из корня репозитория
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+from labkit.datasets import open_store
+from labkit.regression import york_fit
+
+# Данные - из хранилища измерений лабораторной работы (data.npz)
+store = open_store(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data.npz'))
+series = store.load('T50')
+P = series['P']            # перепад давления, атм
+T = series['T']            # изменение температуры, °C
+err_T = series['err_T']    # погрешности T
+err_P = series.error('P')  # погрешность давления (постоянная для всех точек)
 
 # Линейная регрессия (МНК)
 coeffs = np.polyfit(P, T, 1)
@@ -24,6 +29,12 @@ var_slope = s2 / np.sum((P - np.mean(P))**2)
 std_slope = np.sqrt(var_slope)
 print(f"Погрешность наклона: {std_slope:.4f} °C/атм")
 
+# Аппроксимация с учётом погрешностей по обеим осям (метод York)
+york = york_fit(P, T, err_P, err_T)
+print(f"York: наклон (μ) = {york.b:.4f} ± {york.sb:.4f} °C/атм")
+print(f"York: свободный член = {york.a:.4f} ± {york.sa:.4f} °C")
+print(f"York: приведённый хи-квадрат = {york.chi2_red:.2f}")
+
 # Построение графика
 plt.figure(figsize=(8,6))
 plt.errorbar(P, T, yerr=err_T, xerr=err_P, fmt='o', capsize=3, color='blue', markersize=6)
@@ -1,12 +1,21 @@
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 
-# Данные: коэффициент Джоуля-Томсона и обратная температура
-mu = np.array([1.12, 1.06, 0.89])              # коэффициент μ, K   /атм
-err_mu = np.array([0.02, 0.02, 0.05])           # погрешности μ
+# Подключение общих модулей из корня репозитория
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+from labkit.datasets import open_store
+from labkit.regression import york_fit, bootstrap_line
 
-invT = np.array([0.00338741912536838, 0.00329793549238177,	0.00309453814018258])  # 1/T, 1/K
-err_invT = np.array([1.14746083309115E-06,	1.08763785119114E-06,	9.57616630104465E-07])  # погрешности 1/T
+# Данные: коэффициент Джоуля-Томсона и обратная температура (из data.npz)
+store = open_store(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data.npz'))
+series = store.load('kT')
+mu = series['mu']              # коэффициент μ, K   /атм
+err_mu = series['err_mu']      # погрешности μ
+
+invT = series['invT']          # 1/T, 1/K
+err_invT = series['err_invT']  # погрешности 1/T
 
 # Линейная регрессия (МНК) для μ = A * (1/T) + B
 coeffs = np.polyfit(invT, mu, 1)
@@ -34,6 +43,12 @@ std_B = np.sqrt(var_B)
 print(f"Погрешность наклона: {std_A:.4f} °C·К/атм")
 print(f"Погрешность свободного члена: {std_B:.4f} °C/атм")
 
+# Аппроксимация с учётом погрешностей по обеим осям (метод York)
+york = york_fit(invT, mu, err_invT, err_mu)
+print(f"York: наклон (A) = {york.b:.4f} ± {york.sb:.4f} °C·К/атм")
+print(f"York: свободный член (B) = {york.a:.4f} ± {york.sa:.4f} °C/атм")
+print(f"York: приведённый хи-квадрат = {york.chi2_red:.2f}")
+
 # Построение графика с учётом погрешностей
 plt.figure(figsize=(8, 6))
 plt.errorbar(invT, mu, yerr=err_mu, xerr=err_invT, fmt='o', capsize=3,
@@ -71,6 +86,12 @@ y_conf = A * x_conf + B
 se_pred = np.sqrt(s2 * (1/n + (x_conf - x_mean)**2 / x_var))
 ci = t_val * se_pred  # полуширина доверительного интервала
 
+# Бутстреп-полоса (выборка остатков) - без предположения о нормальности остатков
+boot = bootstrap_line(invT, mu, x_conf, n_boot=10**5)
+print(f"\n95% бутстреп-интервалы ({boot.n_valid} выборок):")
+print(f"Наклон A: [{boot.coef_lower[1]:.4f}, {boot.coef_upper[1]:.4f}] °C·К/атм")
+print(f"Свободный член B: [{boot.coef_lower[0]:.4f}, {boot.coef_upper[0]:.4f}] °C/атм")
+
 plt.figure(figsize=(8, 6))
 plt.errorbar(invT, mu, yerr=err_mu, xerr=err_invT, fmt='o', capsize=3,
              label='Экспериментальные точки', color='blue', markersize=8,
@@ -78,6 +99,8 @@ plt.errorbar(invT, mu, yerr=err_mu, xerr=err_invT, fmt='o', capsize=3,
 plt.plot(x_conf, y_conf, 'r-', linewidth=2, label='Регрессионная прямая')
 plt.fill_between(x_conf, y_conf - ci, y_conf + ci, alpha=0.2, color='red',
                  label='95% доверительная полоса')
+plt.fill_between(x_conf, boot.lower, boot.upper, alpha=0.2, color='green',
+                 label='95% бутстреп-полоса')
 plt.xlabel('Обратная температура 1/T, 1/°C', fontsize=20)
 plt.ylabel('Коэффициент Джоуля–Томсона μ, °C/атм', fontsize=20)
 plt.title('Зависимость μ от 1/T с доверительной полосой', fontsize=20)
@@ -1,11 +1,30 @@
-import pandas as pd
+import argparse
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy import stats
 import os
+import sys
 
-# Устанавливаем размер шрифта для всех элементов графиков
-plt.rcParams.update({'font.size': 20})
+# Подключение общих модулей из корня репозитория
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', '..'))
+from labkit.cli import add_output_arguments, write_result
+from labkit.denoise import clean as clean_signal, fit_log_line
+from labkit.profiling import stage
+from labkit.uncertainty import Normal, propagate
+
+# pandas, scipy и matplotlib импортируются при первом использовании:
+# расчёт без графиков (--no-plot) запускается без их загрузки
+
+
+def _pyplot():
+    """matplotlib.pyplot с размером шрифта 20 для всех элементов графиков"""
+    import matplotlib.pyplot as plt
+    plt.rcParams.update({'font.size': 20})
+    return plt
+
+
+def _linregress(x, y):
+    with stage('import_scipy'):
+        from scipy import stats
+    return stats.linregress(x, y)
 
 # Геометрические параметры установки (из задания)
 V = 775          # см³
@@ -19,17 +38,25 @@ R = 8.314462618         # Дж/(моль·К)
 mu_He = 0.0040026       # кг/моль (молярная масса гелия)
 torr_to_Pa = 133.322    # 1 торр = 133.322 Па
 
-def process_file(filename, T):
+def process_file(filename, T, plot=True, verbose=True, clean=False, decimate=1):
     """
     Чтение CSV-файла с двумя столбцами: время (с), напряжение (мВ).
+    plot: построить графики U(t) и ln U(t); verbose: вывести результаты.
+    clean: вместо отбрасывания U <= 0 - очистка labkit.denoise (смещение нуля,
+    обрезка хвоста ниже уровня шума по сглаженному сигналу) и взвешенная
+    аппроксимация несглаженных точек; decimate - усреднение блоками по
+    стольку точек перед очисткой.
     Возвращает:
         time, voltage (массивы),
         tau, dtau (характерное время и его погрешность, с),
         D, dD (коэффициент диффузии и его погрешность, см²/с),
         результаты регрессии (slope, intercept, r_value)
     """
+    with stage('import_pandas'):
+        import pandas as pd
     try:
-        data = pd.read_csv(filename)
+        with stage('read_csv'):
+            data = pd.read_csv(filename)
     except Exception as e:
         print(f"Ошибка чтения файла {filename}: {e}")
         return None
@@ -45,10 +72,15 @@ def process_file(filename, T):
     time = time[mask]
     voltage = voltage[mask]
 
-    # Для логарифмирования нужны положительные напряжения
-    pos_mask = voltage > 0
-    time_pos = time[pos_mask]
-    voltage_pos = voltage[pos_mask]
+    if clean:
+        with stage('denoise'):
+            cleaned = clean_signal(time, voltage, factor=decimate)
+        time_pos, voltage_pos = cleaned.t, cleaned.y
+    else:
+        # Для логарифмирования нужны положительные напряжения
+        pos_mask = voltage > 0
+        time_pos = time[pos_mask]
+        voltage_pos = voltage[pos_mask]
 
     if len(time_pos) < 3:
         print("Недостаточно положительных значений напряжения.")
@@ -58,7 +90,12 @@ def process_file(filename, T):
     lnV = np.log(voltage_pos)
 
     # Линейная регрессия: lnV = a + b*t, где b = -1/tau
-    slope, intercept, r_value, p_value, std_err = stats.linregress(time_pos, lnV)
+    with stage('linregress'):
+        if clean:
+            # Веса U²/σ² и погрешность вычтенного смещения (labkit.denoise)
+            slope, intercept, r_value, std_err, _ = fit_log_line(cleaned)
+        else:
+            slope, intercept, r_value, p_value, std_err = _linregress(time_pos, lnV)
 
     tau = -1.0 / slope          # характеристическое время, с
     # Погрешность tau: dt/t = |ds/s|, где s = slope
@@ -70,12 +107,33 @@ def process_file(filename, T):
     rel_err_D = np.sqrt((dV/V)**2 + (dL_over_S/L_over_S)**2 + (dtau/tau)**2)
     dD = D * rel_err_D
 
-    # Построение графиков
+    if plot:
+        with stage('plot'):
+            plot_file(filename, time, voltage, time_pos, voltage_pos, intercept, tau)
+
+    if verbose:
+        # Вывод результатов
+        print(f"\nРезультаты для файла {filename}:")
+        if clean:
+            print(f"  Очистка: смещение {cleaned.offset:.4f} мВ, шум {cleaned.noise:.4f} мВ, "
+                  f"в аппроксимации {len(time_pos)} точек из {cleaned.n_raw}")
+        print(f"  Наклон (lnU/t) = {slope:.6f} ± {std_err:.6f} 1/с")
+        print(f"  R² = {r_value**2:.4f}")
+        print(f"  τ = {tau:.2f} ± {dtau:.2f} с")
+        print(f"  D = {D:.4f} ± {dD:.4f} см²/с")
+
+    return time, voltage, tau, dtau, D, dD, slope, intercept, r_value
+
+def plot_file(filename, time, voltage, time_pos, voltage_pos, intercept, tau):
+    """Графики U(t) и полулогарифмический с аппроксимацией"""
+    from labkit import lod
+    plt = _pyplot()
+
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
     fig.suptitle(f'Файл: {os.path.basename(filename)}', fontsize=20)
 
-    # График U(t)
-    ax1.plot(time, voltage, 'o', markersize=5, label='Данные')
+    # График U(t); длинные записи прореживаются до ширины оси в пикселях
+    lod.plot(ax1, time, voltage, 'o', markersize=5, label='Данные')
     ax1.set_xlabel('Время, с', fontsize=20)
     ax1.set_ylabel('Напряжение, мВ', fontsize=20)
     ax1.set_title('U(t)', fontsize=20)
@@ -84,7 +142,8 @@ def process_file(filename, T):
     ax1.tick_params(labelsize=18)
 
     # Полулогарифмический график с аппроксимацией
-    ax2.semilogy(time_pos, voltage_pos, 'o', markersize=5, label='Данные (ln)')
+    lod.plot(ax2, time_pos, voltage_pos, 'o', markersize=5, label='Данные (ln)')
+    ax2.set_yscale('log')
     t_fit = np.linspace(time_pos.min(), time_pos.max(), 100)
     v_fit = np.exp(intercept) * np.exp(-t_fit / tau)
     ax2.semilogy(t_fit, v_fit, 'r-', linewidth=2, label=f'Аппроксимация: τ = {tau:.1f} с')
@@ -98,15 +157,6 @@ def process_file(filename, T):
     plt.tight_layout()
     plt.show()
 
-    # Вывод результатов
-    print(f"\nРезультаты для файла {filename}:")
-    print(f"  Наклон (lnU/t) = {slope:.6f} ± {std_err:.6f} 1/с")
-    print(f"  R² = {r_value**2:.4f}")
-    print(f"  τ = {tau:.2f} ± {dtau:.2f} с")
-    print(f"  D = {D:.4f} ± {dD:.4f} см²/с")
-
-    return time, voltage, tau, dtau, D, dD, slope, intercept, r_value
-
 def calculate_lambda_sigma(D, dD, P, T, dT=1.0):
     """
     Расчёт длины свободного пробега λ (мкм) и сечения σ (Å²) по D и P.
@@ -148,12 +198,29 @@ def calculate_lambda_sigma(D, dD, P, T, dT=1.0):
 
     return lambda_um, dlambda_um, sigma_A2, dsigma_A2
 
-def main():
-    print("Обработка данных для лабораторной работы 2.2.1")
-    print("Геометрические параметры:")
-    print(f"  V = {V} ± {dV} см³")
-    print(f"  L/S = {L_over_S} ± {dL_over_S} 1/см\n")
+def lambda_sigma(D, P, T):
+    """
+    Векторный расчёт λ (мкм) и σ (Å²) по D (см²/с), P (торр), T (К)
+    без оценки погрешностей - для метода Монте-Карло.
+    """
+    v_mean = np.sqrt(8 * R * T / (np.pi * mu_He))
+    lambda_m = 3 * D * 1e-4 / v_mean
+    n0 = P * torr_to_Pa / (k_B * T)
+    sigma_m2 = 1 / (n0 * lambda_m)
+    return lambda_m * 1e6, sigma_m2 * 1e20
 
+def calculate_lambda_sigma_mc(D, dD, P, T, dT=1.0, dP=0.5, n_draws=10**6):
+    """
+    Те же λ и σ, что и в calculate_lambda_sigma, но погрешности получены
+    методом Монте-Карло (D, P, T распределены нормально).
+    Возвращает MCResult; выходы: 0 - λ (мкм), 1 - σ (Å²).
+    """
+    inputs = {'D': Normal(D, dD), 'P': Normal(P, dP), 'T': Normal(T, dT)}
+    with stage('lambda_sigma_mc'):
+        return propagate(lambda_sigma, inputs, n_draws=n_draws)
+
+def interactive_input():
+    """Диалоговый ввод температуры, файлов и давлений; возвращает T (К) и список (P, D, dD)"""
     # Ввод температуры
     T_c = float(input("Введите температуру в лаборатории (°C): "))
     T = T_c + 273.15  # Кельвины
@@ -184,7 +251,18 @@ def main():
         cont = input("Обработать ещё один файл? (y/n): ").lower()
         if cont != 'y':
             break
-
+    return T, results
+
+def fit_inverse_pressure(results):
+    """Линейная аппроксимация D(1/P); возвращает (наклон, свободный член, D при 760 торр)"""
+    pressures = np.array([r[0] for r in results])
+    D_vals = np.array([r[1] for r in results])
+    slope_fit, intercept_fit, r_fit, p_fit, err_fit = _linregress(1.0 / pressures, D_vals)
+    P_atm = 760
+    return slope_fit, intercept_fit, slope_fit / P_atm + intercept_fit
+
+def report(results, T):
+    """График D(1/P), экстраполяция к атмосферному давлению, λ и σ для всех измерений"""
     # Если есть данные для разных давлений, строим график D(1/P)
     if len(results) >= 2:
         results.sort()  # по возрастанию давления
@@ -193,6 +271,7 @@ def main():
         D_errs = np.array([r[2] for r in results])
         invP = 1.0 / pressures
 
+        plt = _pyplot()
         plt.figure(figsize=(10, 8))
         plt.errorbar(invP, D_vals, yerr=D_errs, fmt='o', capsize=5, markersize=8, label='Измерения')
         plt.xlabel('1/P, 1/торр', fontsize=20)
@@ -202,7 +281,7 @@ def main():
         plt.tick_params(labelsize=18)
 
         # Линейная аппроксимация (ожидается D ~ const/P)
-        slope_fit, intercept_fit, r_fit, p_fit, err_fit = stats.linregress(invP, D_vals)
+        slope_fit, intercept_fit, D_atm = fit_inverse_pressure(results)
         fit_line = slope_fit * invP + intercept_fit
         plt.plot(invP, fit_line, 'r-', linewidth=2, label=f'Линейный fit: D = {slope_fit:.2f}/P + {intercept_fit:.2f}')
         plt.legend(fontsize=18)
@@ -210,7 +289,6 @@ def main():
 
         # Оценка D при атмосферном давлении (760 торр)
         P_atm = 760
-        D_atm = slope_fit / P_atm + intercept_fit
         print(f"\nЭкстраполяция к атмосферному давлению (P = {P_atm} торр):")
         print(f"  D(атм) ≈ {D_atm:.4f} см²/с")
 
@@ -224,8 +302,78 @@ def main():
             print(f"\nИзмерение {i+1}: P = {P:.1f} торр, D = {D:.4f} ± {dD:.4f} см²/с")
             print(f"  Длина свободного пробега λ = {lambda_um:.2f} ± {dlambda_um:.2f} мкм")
             print(f"  Эффективное сечение σ = {sigma_A2:.2f} ± {dsigma_A2:.2f} Å²")
+            mc = calculate_lambda_sigma_mc(D, dD, P, T)
+            (lam_lo, sig_lo), (lam_hi, sig_hi) = mc.percentiles[:, 0], mc.percentiles[:, -1]
+            print(f"  Монте-Карло, 95% интервалы: λ ∈ [{lam_lo:.2f}; {lam_hi:.2f}] мкм, "
+                  f"σ ∈ [{sig_lo:.2f}; {sig_hi:.2f}] Å²")
+
+def batch(files, T, pressures=None, clean=False, decimate=1):
+    """
+    Обработка файлов без графиков и диалога: по записи на файл
+    (τ, D и, если задано давление, λ и σ) и аппроксимация D(1/P).
+    """
+    records, results = [], []
+    for k, filename in enumerate(files):
+        res = process_file(filename, T, plot=False, verbose=False, clean=clean, decimate=decimate)
+        if res is None:
+            continue
+        time, voltage, tau, dtau, D, dD, slope, intercept, r_value = res
+        rec = {'file': filename, 'n': len(time), 'tau': tau, 'dtau': dtau, 'D': D, 'dD': dD,
+               'slope': slope, 'r2': r_value**2}
+        if pressures:
+            P = pressures[k]
+            lambda_um, dlambda_um, sigma_A2, dsigma_A2 = calculate_lambda_sigma(D, dD, P, T)
+            rec.update(P=P, lambda_um=lambda_um, dlambda_um=dlambda_um,
+                       sigma_A2=sigma_A2, dsigma_A2=dsigma_A2)
+            results.append((P, D, dD))
+        records.append(rec)
+    fit = None
+    if len(results) >= 2:
+        slope_fit, intercept_fit, D_atm = fit_inverse_pressure(results)
+        fit = {'slope': slope_fit, 'intercept': intercept_fit, 'D_atm': D_atm}
+    return records, fit
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Обработка данных для лабораторной работы 2.2.1")
+    parser.add_argument('files', nargs='*', help="CSV-файлы (без файлов - диалоговый режим)")
+    parser.add_argument('--T', type=float, default=25.0, help="температура в лаборатории, °C")
+    parser.add_argument('--pressure', type=float, nargs='+', default=None,
+                        help="рабочие давления P (торр) в порядке файлов")
+    parser.add_argument('--clean', action='store_true',
+                        help="очистка сигнала (смещение нуля, сглаживание, порог шума) перед аппроксимацией")
+    parser.add_argument('--decimate', type=int, default=1,
+                        help="усреднение блоками по N точек при --clean (длинные записи)")
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.pressure and len(args.pressure) != len(args.files):
+        parser.error("Число давлений должно совпадать с числом файлов")
+    T = args.T + 273.15
+
+    if args.no_plot:
+        records, fit = batch(args.files, T, args.pressure, args.clean, args.decimate)
+        if args.format == 'csv':
+            write_result(records, 'csv', args.output)
+        else:
+            write_result({'T': T, 'files': records, 'fit_inverse_pressure': fit}, 'json', args.output)
+        return 0
+
+    print("Обработка данных для лабораторной работы 2.2.1")
+    print("Геометрические параметры:")
+    print(f"  V = {V} ± {dV} см³")
+    print(f"  L/S = {L_over_S} ± {dL_over_S} 1/см\n")
+
+    if not args.files:
+        T, results = interactive_input()
+    else:
+        results = []
+        for k, filename in enumerate(args.files):
+            res = process_file(filename, T, clean=args.clean, decimate=args.decimate)
+            if res is not None and args.pressure:
+                results.append((args.pressure[k], res[4], res[5]))
+    report(results, T)
 
     print("\nРабота завершена.")
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,6 +1,14 @@
+import os
+import sys
+from functools import partial
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.optimize import curve_fit
+
+# Подключение общих модулей из корня репозитория
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+from labkit.datasets import open_store
+from labkit.uncertainty import Normal, Const, propagate
+from surface_tension import load_sessions, process_sessions, water_chain
 
 # ------------------------------------------------------------
 # Настройка размера шрифта на графиках
@@ -17,37 +25,36 @@ plt.rcParams.update({
 # ------------------------------------------------------------
 # Исходные данные с погрешностями (по условию)
 # ------------------------------------------------------------
+# Данные для воды (t в °C, P2 в отсчётах) и калибровка сессии -
+# из хранилища измерений (data.npz); другие сессии обрабатываются
+# пакетно: python surface_tension.py [data.npz] [серии] -o таблица.csv
+store = open_store(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data.npz'))
+session = load_sessions(store, ['water'])[0]
+water = store.load('water')
+data = list(zip(water['t'], water['P2']))
+
 # Калибровка по спирту
-sigma_sp = 22.3                     # мН/м, табличное значение (погрешностью пренебрегаем)
-deltaP_sp_meas = 41                 # отсчётов, измеренное давление спирта
-delta_deltaP_sp = 1                 # погрешность измерения давления спирта (отсчёты)
+sigma_sp = session['sigma_sp']                # мН/м, табличное значение (погрешностью пренебрегаем)
+deltaP_sp_meas = session['deltaP_sp']         # отсчётов, измеренное давление спирта
+delta_deltaP_sp = session['delta_deltaP_sp']  # погрешность измерения давления спирта (отсчёты)
 
 # Коэффициент перевода отсчётов в Па
-K = 0.2 * 9.81                      # Па/отсчёт
+K = session['K']                    # Па/отсчёт
 
 # Диаметр иглы по микроскопу (для сравнения)
 d_micro = 1.1                       # мм
 delta_d_micro = 0.05                # мм
 
-# Данные для воды (t в °C, P2 в отсчётах)
-data = [
-    (23.5, 173),   # при 23.5 °C P2 = 173 (игла погружена)
-    (30.0, 163),
-    (40.0, 159),
-    (50.0, 156),
-    (60.0, 153)
-]
-
-# Измерения для гидростатической поправки при 23.5 °C
-P1_surface = 114                    # отсчётов, игла касается поверхности
-P2_bottom = 173                     # отсчётов, игла на дне
+# Измерения для гидростатической поправки при комнатной температуре
+P1_surface = session['P1_surface']  # отсчётов, игла касается поверхности
+P2_bottom = session['P2_bottom']    # отсчётов, игла на дне
 h1 = 19                             # мм, выступание при касании
 h2 = 7                              # мм, выступание при погружении
 delta_h_meas = 1                    # мм, погрешность измерения высоты
 
 # Погрешности измерений
-delta_P = 1                         # погрешность отсчётов давления (1 деление)
-delta_t = 0.1                       # °C, погрешность температуры
+delta_P = session['delta_P']        # погрешность отсчётов давления (1 деление)
+delta_t = water.error('t')          # °C, погрешность температуры
 
 # ------------------------------------------------------------
 # 1. Определение радиуса иглы по эталонной жидкости
@@ -96,24 +103,16 @@ print("Сравнение: в пределах погрешностей согл
 t_arr = np.array([d[0] for d in data])
 P2_arr = np.array([d[1] for d in data])
 
-# Лапласовское давление (отсчёты) и его погрешность
-P_lapl = np.zeros_like(P2_arr)
-delta_P_lapl = np.zeros_like(P2_arr)
-
-for i, (t, P2) in enumerate(data):
-    if t == 23.5:   # для комнатной температуры используем P1_surface как лапласовское
-        P_lapl[i] = P1_surface
-        delta_P_lapl[i] = delta_P
-    else:
-        P_lapl[i] = P2 - P_hydro
-        delta_P_lapl[i] = np.sqrt(delta_P**2 + delta_P_hydro**2)
+# Лапласовское давление (для комнатной температуры - P1_surface), σ и их
+# погрешности, аппроксимация σ(T), q и U/F - векторный расчёт (surface_tension.py)
+res = process_sessions([session])
+P_lapl = res.P_lapl[0]
+delta_P_lapl = res.delta_P_lapl[0]
 
-# Коэффициент поверхностного натяжения воды (мН/м)
-sigma = sigma_sp * (P_lapl / deltaP_sp_meas)
-
-# Погрешность sigma (без учёта погрешности sigma_sp)
-delta_sigma_rel = np.sqrt((delta_P_lapl / P_lapl)**2 + (delta_deltaP_sp / deltaP_sp_meas)**2)
-delta_sigma = sigma * delta_sigma_rel
+# Коэффициент поверхностного натяжения воды (мН/м) и его погрешность
+# (без учёта погрешности sigma_sp)
+sigma = res.sigma[0]
+delta_sigma = res.delta_sigma[0]
 
 # Абсолютная температура
 T_arr = t_arr + 273.15
@@ -132,10 +131,9 @@ for i in range(len(t_arr)):
 def linear_func(T, a, b):
     return a + b * T
 
-# Взвешенная аппроксимация (веса = 1/Δσ²)
-popt, pcov = curve_fit(linear_func, T_arr, sigma, sigma=delta_sigma, absolute_sigma=True)
-a_fit, b_fit = popt
-da_fit, db_fit = np.sqrt(np.diag(pcov))
+# Взвешенная аппроксимация (веса = 1/Δσ², погрешности абсолютные)
+a_fit, b_fit = res.a[0], res.b[0]
+da_fit, db_fit = res.da[0], res.db[0]
 
 print(f"\nЛинейная аппроксимация σ(T) = {a_fit:.3f} + {b_fit:.4f} * T")
 print(f"dσ/dT = {b_fit:.4f} ± {db_fit:.4f} мН/(м·К)")
@@ -144,11 +142,11 @@ print(f"dσ/dt (в °C) = {b_fit:.4f} ± {db_fit:.4f} мН/(м·°C)")
 # ------------------------------------------------------------
 # 5. Термодинамические величины
 # ------------------------------------------------------------
-q_exp = -T_arr * b_fit
-U_over_F_exp = sigma - T_arr * b_fit
+q_exp = res.q[0]
+U_over_F_exp = res.U[0]
 
-delta_q = T_arr * db_fit
-delta_U = np.sqrt(delta_sigma**2 + (T_arr * db_fit)**2)
+delta_q = res.delta_q[0]
+delta_U = res.delta_U[0]
 
 print("\nТермодинамические характеристики поверхности воды:")
 print(f"{'t, °C':<8} {'q, мН/м':<12} {'Δq, мН/м':<12} {'U/F, мН/м':<12} {'Δ(U/F), мН/м':<12}")
@@ -156,6 +154,35 @@ for i in range(len(t_arr)):
     print(f"{t_arr[i]:<8.1f} {q_exp[i]:<12.1f} {delta_q[i]:<12.1f} "
           f"{U_over_F_exp[i]:<12.1f} {delta_U[i]:<12.1f}")
 
+# ------------------------------------------------------------
+# 5а. Погрешности методом Монте-Карло (без линеаризации формул)
+# ------------------------------------------------------------
+mc_inputs = {
+    'sigma_sp': Const(sigma_sp),
+    'deltaP_sp': Normal(deltaP_sp_meas, delta_deltaP_sp),
+    'K': Const(K),
+    'P1_surface': Normal(P1_surface, delta_P),
+    'P2_bottom': Normal(P2_bottom, delta_P),
+    'P2': Normal(P2_arr, delta_P),
+    't': Normal(t_arr, delta_t),
+}
+room = int(np.flatnonzero(np.isclose(t_arr, session['room_t']))[0])
+mc = propagate(partial(water_chain, delta_sigma=delta_sigma, room_index=room), mc_inputs,
+               n_draws=10**6)
+n_pts = len(t_arr)
+# Порядок выходов: r, P_hydro, sigma (n), dσ/dT, q (n), U/F (n)
+lo, hi = mc.percentiles[:, 0], mc.percentiles[:, -1]
+print(f"\nМонте-Карло ({mc.n_draws:.0e} испытаний), 95% интервалы:")
+print(f"  r = {mc.mean[0]*1e3:.3f} мм, [{lo[0]*1e3:.3f}; {hi[0]*1e3:.3f}] мм")
+print(f"  P_hydro = {mc.mean[1]:.1f} отсч., [{lo[1]:.1f}; {hi[1]:.1f}]")
+k_b = 2 + n_pts
+print(f"  dσ/dT = {mc.mean[k_b]:.4f} ± {mc.std[k_b]:.4f} мН/(м·К), [{lo[k_b]:.4f}; {hi[k_b]:.4f}]")
+print(f"{'t, °C':<8} {'σ, мН/м':<20} {'q, мН/м':<20} {'U/F, мН/м':<20}")
+for i in range(n_pts):
+    ks, kq, ku = 2 + i, k_b + 1 + i, k_b + 1 + n_pts + i
+    print(f"{t_arr[i]:<8.1f} {f'[{lo[ks]:.2f}; {hi[ks]:.2f}]':<20} "
+          f"{f'[{lo[kq]:.1f}; {hi[kq]:.1f}]':<20} {f'[{lo[ku]:.1f}; {hi[ku]:.1f}]':<20}")
+
 # ------------------------------------------------------------
 # 6. Построение графиков с увеличенным шрифтом
 # ------------------------------------------------------------
@@ -0,0 +1,184 @@
+import argparse
+import os
+import sys
+from collections import namedtuple
+import numpy as np
+
+# Подключение общих модулей из корня репозитория
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+from labkit.regression import batched_line_fit, pad_series
+
+# ------------------------------------------------------------
+# Расчётные формулы лабораторной работы 2.5.1 в векторном виде:
+# каждый аргумент может быть числом или массивом (например,
+# выборкой Монте-Карло), результат вычисляется поэлементно.
+# ------------------------------------------------------------
+
+
+def needle_radius(sigma_sp, deltaP_sp, K):
+    """Радиус иглы (м) по формуле Лапласа: r = 2*sigma / deltaP (sigma в мН/м, deltaP в отсчётах)"""
+    return 2 * sigma_sp * 1e-3 / (deltaP_sp * K)
+
+
+def hydrostatic_correction(P2_bottom, P1_surface):
+    """Гидростатическая поправка (отсчёты)"""
+    return P2_bottom - P1_surface
+
+
+def surface_tension(P_lapl, sigma_sp, deltaP_sp):
+    """Коэффициент поверхностного натяжения (мН/м) относительно эталонной жидкости"""
+    return sigma_sp * (P_lapl / deltaP_sp)
+
+
+def linear_slope(T, sigma, delta_sigma):
+    """
+    Взвешенная (веса 1/Δσ²) прямая sigma = a + b*T по последней оси.
+    Возвращает a и b; для выборок форма результата - без последней оси.
+    """
+    w = 1.0 / np.asarray(delta_sigma, dtype=float)**2
+    sw = np.sum(w, axis=-1)
+    T_mean = np.sum(w * T, axis=-1) / sw
+    s_mean = np.sum(w * sigma, axis=-1) / sw
+    dT = T - T_mean[..., None]
+    b = np.sum(w * dT * (sigma - s_mean[..., None]), axis=-1) / np.sum(w * dT**2, axis=-1)
+    a = s_mean - b * T_mean
+    return a, b
+
+
+def water_chain(sigma_sp, deltaP_sp, K, P1_surface, P2_bottom, P2, t, delta_sigma, room_index=0):
+    """
+    Полная цепочка расчёта для воды (для распространения погрешностей).
+
+    P2: массив формы (выборка, точки) или (точки,) - отсчёты с погруженной иглой
+    t: температуры в °C той же формы
+    delta_sigma: веса аппроксимации (погрешности σ по точкам)
+    room_index: номер точки при комнатной температуре, для которой
+                лапласовское давление равно P1_surface
+
+    Возвращает кортеж: r (м), P_hydro (отсч.), sigma по точкам, dσ/dT, q и U/F по точкам.
+    """
+    r = needle_radius(sigma_sp, deltaP_sp, K)
+    P_hydro = hydrostatic_correction(P2_bottom, P1_surface)
+    P2 = np.asarray(P2, dtype=float)
+    P_lapl = P2 - np.asarray(P_hydro)[..., None]
+    P_lapl[..., room_index] = P1_surface
+    sigma = surface_tension(P_lapl, np.asarray(sigma_sp)[..., None], np.asarray(deltaP_sp)[..., None])
+    T = np.asarray(t, dtype=float) + 273.15
+    a, b = linear_slope(T, sigma, delta_sigma)
+    q = -T * b[..., None]
+    U = sigma - T * b[..., None]
+    return r, P_hydro, sigma, b, q, U
+
+
+# ------------------------------------------------------------
+# Пакетная обработка: много образцов/сессий измерений, у каждой
+# своя калибровка по эталонной жидкости и гидростатическая поправка.
+# Серии разной длины дополняются NaN и обрабатываются одним массивом.
+# ------------------------------------------------------------
+
+# Параметры калибровки сессии (ключ 'calibration' в метаданных серии data.npz)
+CALIBRATION_KEYS = ('sigma_sp', 'deltaP_sp', 'delta_deltaP_sp', 'K',
+                    'P1_surface', 'P2_bottom', 'delta_P', 'room_t')
+
+# Результаты по сессиям: массивы формы (сессии, точки) и (сессии,)
+BatchResult = namedtuple('BatchResult', 'names t T P_lapl delta_P_lapl sigma delta_sigma '
+                                        'a b da db q delta_q U delta_U r delta_r P_hydro delta_P_hydro')
+
+
+def load_sessions(store, names=None):
+    """
+    Сессии измерений из хранилища data.npz: серии со столбцами t (°C) и P2 (отсч.)
+    и калибровкой в метаданных. По умолчанию - все такие серии.
+    """
+    sessions = []
+    for name in names or store.series:
+        series = store.load(name)
+        calibration = series.meta.get('calibration')
+        if calibration is None:
+            if names:
+                raise KeyError(f"У серии {name} нет калибровки в метаданных")
+            continue
+        session = {'name': name, 't': np.asarray(series['t'], dtype=float),
+                   'P2': np.asarray(series['P2'], dtype=float)}
+        session.update({key: calibration[key] for key in CALIBRATION_KEYS})
+        sessions.append(session)
+    return sessions
+
+
+def process_sessions(sessions):
+    """
+    σ(T), dσ/dT, q и U/F для всех сессий сразу.
+
+    sessions: список словарей с ключами name, t, P2 и CALIBRATION_KEYS.
+    Погрешности - как в 2.5.1.py; прямые σ = a + b*T для всех сессий
+    находятся одним взвешенным решением нормальных уравнений (веса 1/Δσ²).
+    """
+    t = pad_series([s['t'] for s in sessions])
+    P2 = pad_series([s['P2'] for s in sessions])
+    cal = {key: np.array([float(s[key]) for s in sessions])[:, None] for key in CALIBRATION_KEYS}
+    valid = np.isfinite(t) & np.isfinite(P2)
+
+    r = needle_radius(cal['sigma_sp'], cal['deltaP_sp'], cal['K'])
+    delta_r = r * cal['delta_deltaP_sp'] / cal['deltaP_sp']
+    P_hydro = hydrostatic_correction(cal['P2_bottom'], cal['P1_surface'])
+    delta_P_hydro = np.sqrt(2) * cal['delta_P']
+
+    # При комнатной температуре лапласовское давление - отсчёт у поверхности
+    room = np.isclose(t, cal['room_t'])
+    P_lapl = np.where(room, cal['P1_surface'], P2 - P_hydro)
+    delta_P_lapl = np.where(room, cal['delta_P'], np.sqrt(cal['delta_P']**2 + delta_P_hydro**2))
+    sigma = surface_tension(P_lapl, cal['sigma_sp'], cal['deltaP_sp'])
+    delta_sigma = sigma * np.sqrt((delta_P_lapl / P_lapl)**2
+                                  + (cal['delta_deltaP_sp'] / cal['deltaP_sp'])**2)
+
+    T = t + 273.15
+    W = np.where(valid, 1.0 / np.where(valid, delta_sigma, 1.0)**2, 0.0)
+    a, b, da, db = batched_line_fit(np.where(valid, T, 0.0), np.where(valid, sigma, 0.0), W,
+                                    full=True, absolute_sigma=True)
+    q = -T * b[:, None]
+    delta_q = T * db[:, None]
+    U = sigma - T * b[:, None]
+    delta_U = np.sqrt(delta_sigma**2 + (T * db[:, None])**2)
+    return BatchResult([s['name'] for s in sessions], t, T, P_lapl, delta_P_lapl, sigma, delta_sigma,
+                       a, b, da, db, q, delta_q, U, delta_U,
+                       r[:, 0], delta_r[:, 0], P_hydro[:, 0], delta_P_hydro[:, 0])
+
+
+def combined_table(res):
+    """Общая таблица: по строке на точку каждой сессии (дополнение NaN пропускается)"""
+    rows = []
+    for k, name in enumerate(res.names):
+        for i in np.flatnonzero(np.isfinite(res.t[k])):
+            rows.append({
+                'session': name, 't_C': res.t[k, i], 'T_K': res.T[k, i],
+                'P_lapl': res.P_lapl[k, i], 'delta_P_lapl': res.delta_P_lapl[k, i],
+                'sigma': res.sigma[k, i], 'delta_sigma': res.delta_sigma[k, i],
+                'dsigma_dT': res.b[k], 'delta_dsigma_dT': res.db[k],
+                'q': res.q[k, i], 'delta_q': res.delta_q[k, i],
+                'U_F': res.U[k, i], 'delta_U_F': res.delta_U[k, i],
+                'r_mm': res.r[k] * 1e3, 'delta_r_mm': res.delta_r[k] * 1e3,
+            })
+    return rows
+
+
+def main(argv=None):
+    """Пакетная обработка сессий из data.npz с выводом общей таблицы в CSV/JSON"""
+    from labkit.cli import write_result
+    from labkit.datasets import open_store
+
+    parser = argparse.ArgumentParser(description="Пакетная обработка сессий 2.5.1")
+    parser.add_argument('store', nargs='?', help="хранилище data.npz (по умолчанию - рядом со скриптом)",
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data.npz'))
+    parser.add_argument('series', nargs='*', help="серии-сессии (по умолчанию все с калибровкой)")
+    parser.add_argument('--format', choices=('csv', 'json'), default='csv')
+    parser.add_argument('--output', '-o', default=None, help="файл таблицы (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+
+    with open_store(args.store) as store:
+        res = process_sessions(load_sessions(store, args.series))
+    write_result(combined_table(res), args.format, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())